@@ -1,3 +1,5 @@
+import argparse
+import os
 import subprocess
 import signal
 import webbrowser
@@ -33,7 +35,46 @@ def signal_handler(sig, frame):
         frontend_process.terminate()
     exit(0)
 
+def preload_backend():
+    # Runs in the launcher after the app is imported, before the workers are forked
+    from backend import server
+    server.preload()
+
+def serve_production(host, port, workers, graceful_timeout):
+    """
+    Serve the backend with pre-forked workers sharing one socket (no reload, no frontend dev server).
+
+    Send SIGHUP to the launcher for a graceful restart of the workers, SIGTERM to stop.
+    """
+    # Split the cores between the workers instead of giving each the whole machine;
+    # set before the app is imported since the config and torch read them at import time
+    cores = os.cpu_count() or 1
+    os.environ.setdefault("MESH_CPU_WORKERS", str(max(1, cores // workers)))
+    os.environ.setdefault("OMP_NUM_THREADS", str(max(1, cores // workers)))
+
+    from backend.src.utils.prefork import PreforkServer
+    PreforkServer(
+        "backend.server:app", host=host, port=port, workers=workers,
+        preload=[preload_backend], graceful_timeout=graceful_timeout
+    ).run()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Start the application.")
+    parser.add_argument("--mode", choices=["dev", "prod"], default="dev",
+                        help="dev: reloading backend and webpack dev server; prod: multi-worker backend only")
+    parser.add_argument("--host", default=backend_ip, help="Address the backend binds to")
+    parser.add_argument("--port", type=int, default=int(backend_port), help="Port of the backend")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Backend worker processes (prod)")
+    parser.add_argument("--graceful-timeout", type=int, default=30,
+                        help="Seconds workers get to finish in-flight requests when stopping (prod)")
+    args = parser.parse_args()
+
+    if args.mode == "prod":
+        serve_production(args.host, args.port, args.workers, args.graceful_timeout)
+        raise SystemExit(0)
+
+    backend_ip, backend_port = args.host, str(args.port)
+
     # Setup signal handler to catch Ctrl+C
     signal.signal(signal.SIGINT, signal_handler)
 
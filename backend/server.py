@@ -1,29 +1,65 @@
-from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from fastapi import FastAPI, UploadFile, File, Form, Request, Query
+from fastapi.responses import JSONResponse, StreamingResponse, Response, PlainTextResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.routing import Match
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional
-import torch
-import shutil
-import uuid
-import os
-import json
+from pydantic import BaseModel, Field, ValidationError
+from typing import Optional, Literal, Tuple, List
+from contextlib import AsyncExitStack
+from collections import namedtuple
+import asyncio
+import functools
+import time
+
 import numpy as np
 
+from backend.src.utils import config, metrics, profiling, sequence_codec, shared_frames
 from backend.src.utils.calculate_data import calculate_data
-from backend.src.utils.synthetic_data_generator import (
-    generate_points_data, 
-    generate_synthetic_time_series, 
-    apply_sinusoidal_transformation_with_noise_and_anomalies,
-    generate_hallow_sphere_point_cloud,
-    generate_filled_sphere_point_cloud,
-    apply_harmonic_sinusoidal_transformation,
-    apply_harmonic_transformation_with_noise_and_anomalies
+from backend.src.utils.result_store import ResultStore
+from backend.src.utils.response_cache import ResponseCache
+from backend.src.utils.spatial_index import SpatialIndexCache
+from backend.src.utils.live_frames import LiveFrame
+from backend.src.utils.metric_streams import MetricStream
+from backend.src.utils.sessions import SessionStore
+from backend.src.utils.serialization import encode
+from backend.src.utils.uploads import spooled_upload, UploadTooLarge
+from backend.src.utils.jobs import (
+    AdmissionController,
+    Overloaded,
+    ClientDisconnected,
+    DisconnectWatch,
+    cancel_on_disconnect,
+    configure_executor,
+    shutdown_executor,
+    recover_executor,
+    executor_status,
+    run_in_thread,
+    run_cpu,
+    call_cpu,
+    map_cpu,
+    map_cpu_until,
+    wait_until
 )
-from backend.src.utils.data_generator_from_video import (
-    load_model,
-    video_to_point_clouds
+from backend.src.utils.scenarios import (
+    READY_DATASETS,
+    ready_dataset_frames,
+    time_series_frames,
+    scaled_sphere_frames,
+    harmonic_oscillating_frames,
+    analyse_frame,
+    analyse_stream_frame,
+    analyse_shared_frame,
+    copy_shared_frames,
+    shared_generation,
+    track_shared_anomalies,
+    level_of_detail_frame,
+    progressive_frame,
+    encode_frame_detail,
+    encode_frames,
+    seeded
 )
 
 app = FastAPI()
@@ -35,13 +71,441 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Continuation-Token"],  # Read by clients of requests cut short by their deadline
+)
+
+def route_path(scope):
+    """
+    Return the path template of the route matching a request scope (e.g. "/retrieve_data/{data_id}").
+    """
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+# The middlewares below are plain ASGI middlewares: Starlette's BaseHTTPMiddleware hides the
+# client's `http.disconnect` message from the endpoints, which then never see a client go away.
+
+class RequestMetricsMiddleware:
+    """
+    Attribute stage timings of the request to its endpoint and record latency, status and bytes out.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics.ENABLED:
+            return await self.app(scope, receive, send)
+
+        endpoint = route_path(scope)
+        start = time.perf_counter()
+        status = None
+        sent = 0
+
+        # Latency runs until the response starts; the body is counted while it is being sent, so
+        # streamed responses are measured too
+        async def send_counted(message):
+            nonlocal status, sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                metrics.observe_request(endpoint, status, time.perf_counter() - start)
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        token = metrics.set_endpoint(endpoint)
+        try:
+            await self.app(scope, receive, send_counted)
+        except Exception:
+            if status is None:
+                metrics.observe_request(endpoint, 500, time.perf_counter() - start)
+            raise
+        finally:
+            if status is not None:
+                metrics.count("response_bytes", sent)
+            metrics.reset_endpoint(token)
+
+class ProfilingMiddleware:
+    """
+    Profile requests sent with an `X-Profile: 1` header or a `profile=1` query parameter.
+
+    Only active when MESH_PROFILING=1, for one request per process at a time. The id of the stored
+    profile is returned in the `X-Profile-Id` header and can be read from `/profiles/{profile_id}`.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.PROFILING_ENABLED:
+            return await self.app(scope, receive, send)
+        connection = HTTPConnection(scope)
+        flagged = connection.headers.get("x-profile") in ("1", "true") or connection.query_params.get("profile") in ("1", "true")
+        if not flagged:
+            return await self.app(scope, receive, send)
+
+        with profiling.profile_request() as profile_id:
+            if profile_id is None:
+                # Another request of this process is being profiled; this one runs unprofiled
+                return await self.app(scope, receive, send)
+
+            async def send_with_id(message):
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message)["X-Profile-Id"] = profile_id
+                await send(message)
+
+            await self.app(scope, receive, send_with_id)
+
+class UploadSizeMiddleware:
+    """
+    Reject video uploads whose declared size is over the limit before the body is read.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == "/uploadvideo/":
+            content_length = Headers(scope=scope).get("content-length")
+            if content_length and content_length.isdigit() and int(content_length) > config.MAX_UPLOAD_BYTES:
+                response = JSONResponse(content={"error": str(UploadTooLarge(config.MAX_UPLOAD_BYTES))}, status_code=413)
+                return await response(scope, receive, send)
+        await self.app(scope, receive, send)
+
+# The last middleware added runs first
+app.add_middleware(RequestMetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(UploadSizeMiddleware)
+
+@app.exception_handler(UploadTooLarge)
+async def upload_too_large_handler(request: Request, exc: UploadTooLarge):
+    return JSONResponse(content={"error": str(exc)}, status_code=413)
+
+# CPU-bound work runs in a process pool; heavy requests are admitted up to a limit, then rejected
+configure_executor(config.CPU_WORKERS)
+heavy_jobs = AdmissionController(config.MAX_HEAVY_JOBS, config.MAX_QUEUED_JOBS, config.RETRY_AFTER_SECONDS)
+
+# Readiness: set once startup completes and cleared when shutdown begins, so the worker is drained
+serving = False
+
+@app.on_event("startup")
+def mark_serving():
+    global serving
+    serving = True
+
+@app.on_event("shutdown")
+def stop_executor():
+    global serving
+    serving = False
+    shutdown_executor()
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(content={"error": str(exc)}, status_code=429, headers={"Retry-After": str(exc.retry_after)})
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request: Request, exc: ClientDisconnected):
+    # Nobody reads this response; its status (nginx's "client closed request") only shows in the metrics
+    return Response(status_code=499)
+
+metrics.register_gauge(
+    "mesh_heavy_jobs",
+    "Heavy jobs running and waiting for a slot.",
+    lambda: {(("state", "in_flight"),): heavy_jobs.in_flight, (("state", "queued"),): heavy_jobs.queued}
+)
+metrics.register_gauge(
+    "mesh_inference_mode_info",
+    "Inference mode of the depth network.",
+    lambda: {(("mode", config.INFERENCE_MODE),): 1}
+)
+
+@app.get("/metrics", summary="Prometheus Metrics")
+async def get_metrics():
+    """
+    Endpoint exposing per-endpoint stage histograms and counters in the Prometheus text format.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/healthz", summary="Liveness Probe")
+async def healthz():
+    """
+    Endpoint answering as long as the worker's event loop is running.
+    """
+    return {"status": "ok"}
+
+@app.get("/readyz", summary="Readiness Probe")
+async def readyz():
+    """
+    Endpoint answering 200 when the worker accepts new work: it has started, is not shutting down,
+    its heavy-job queue is not full and its process pool works. Answers 503 otherwise.
+    """
+    saturated = heavy_jobs.queued >= heavy_jobs.max_queued
+    # A pool broken by a dead worker is replaced here as well, so an idle worker does not stay unready
+    recover_executor()
+    pool = executor_status()
+    content = {
+        "ready": serving and not saturated and pool["state"] != "broken",
+        "serving": serving,
+        "heavy_jobs": {"in_flight": heavy_jobs.in_flight, "queued": heavy_jobs.queued},
+        "process_pool": pool,
+        "depth_model_loaded": get_depth_model.cache_info().currsize > 0,
+    }
+    return JSONResponse(content=content, status_code=200 if content["ready"] else 503)
+
+@app.get("/profiles", summary="List Stored Profiles")
+async def get_profiles():
+    """
+    Endpoint listing the ids of the stored request profiles (requires MESH_PROFILING=1).
+    """
+    if not config.PROFILING_ENABLED:
+        return JSONResponse(content={"error": "Profiling is disabled"}, status_code=404)
+    return {"profiles": await run_in_threadpool(profiling.list_profiles)}
+
+@app.get("/profiles/{profile_id}", summary="Retrieve a Request Profile")
+async def get_profile(profile_id: str, format: str = "pstats", sort: str = "cumulative", limit: int = 50):
+    """
+    Endpoint returning a stored request profile (requires MESH_PROFILING=1).
+
+    Args:
+        - `profile_id`: Id from the `X-Profile-Id` header of the profiled response.
+        - `format`: "pstats" for a text report, or "collapsed" for flame graph input.
+        - `sort`: pstats sort key of the text report.
+        - `limit`: Number of functions in the text report.
+    """
+    if not config.PROFILING_ENABLED:
+        return JSONResponse(content={"error": "Profiling is disabled"}, status_code=404)
+    if format == "collapsed":
+        content = await run_in_threadpool(profiling.collapsed_stacks, profile_id)
+    else:
+        content = await run_in_threadpool(profiling.report, profile_id, sort, limit)
+    if content is None:
+        return JSONResponse(content={"error": "Profile not found"}, status_code=404)
+    return PlainTextResponse(content)
+
+# Response formats: plain JSON, or the quantized and delta-encoded sequence codec (sequence_codec.py)
+MEDIA_TYPES = {"json": "application/json", "sequence": sequence_codec.MEDIA_TYPE}
+ResponseFormat = Literal["json", "sequence"]
+
+async def serialize_frames(frames, response_format):
+    """
+    Join frames serialized by the pool workers into a JSON array, or encode frame dicts as a sequence.
+    """
+    if response_format == "sequence":
+        return await run_cpu(encode_frames, frames)
+    return b"[" + b",".join(frames) + b"]"
+
+async def level_of_detail(frames, point_budget, response_format, data_id=None):
+    """
+    Store the full frames (unless they are stored already under `data_id`) and return the
+    serialized decimated frames; each one carries the id and index to fetch more detail from.
+    """
+    if data_id is None:
+        data_id = await asyncio.to_thread(profiling.maybe_profiled, processed_data.put, frames)
+    count = len(frames)
+    decimated = await map_cpu(
+        level_of_detail_frame, frames, [point_budget] * count, [data_id] * count, range(count),
+        [response_format == "json"] * count
+    )
+    return await serialize_frames(decimated, response_format)
+
+def deadline_after(seconds):
+    """
+    Return the `time.monotonic()` value `seconds` from now, or None when no deadline is given.
+    """
+    return None if seconds is None else time.monotonic() + seconds
+
+# Frames of a request left over at its deadline: their points (copied out of shared memory) and
+# anomaly points, the frames (analysed, a task still running in the pool, or None when not started)
+# and the response encoding. They live in this worker's memory, like the live frames
+Continuation = namedtuple("Continuation", ["points", "anomaly_points", "frames", "response_format", "point_budget"])
+continuations = SessionStore(config.MAX_CONTINUATIONS)
+
+def completed_prefix(frames):
+    """
+    Number of leading frames analysed; frames are returned in order, so later ones wait for them.
+    """
+    for index, frame in enumerate(frames):
+        if frame is None or isinstance(frame, asyncio.Future):
+            return index
+    return len(frames)
+
+def defer_frames(points, anomaly_points, frames, response_format, point_budget):
+    """
+    Keep the frames that missed the deadline for `/continue/{token}` and return the token.
+    """
+    metrics.count("partial_responses")
+    return continuations.add(Continuation(points, anomaly_points, frames, response_format, point_budget))
+
+async def finish_frames(frames, response_format, point_budget):
+    """
+    Serialize analysed frames, decimated to `point_budget` points per frame if given.
+    """
+    if point_budget is not None:
+        return await level_of_detail(frames, point_budget, response_format)
+    return await serialize_frames(frames, response_format)
+
+def frames_response(body, response_format, token=None):
+    """
+    Response holding serialized frames, with the continuation token of the frames left for later, if any.
+    """
+    headers = {"X-Continuation-Token": token} if token is not None else None
+    return Response(content=body, media_type=MEDIA_TYPES[response_format], headers=headers)
+
+def release_when_done(handles, futures):
+    """
+    Free the segment of generated frames once the pool calls that may still read it are done.
+    """
+    if not futures:
+        shared_frames.release(handles)
+    else:
+        asyncio.gather(*futures, return_exceptions=True).add_done_callback(lambda _: shared_frames.release(handles))
+
+async def analyse_frames(handles, anomaly_points=None, response_format="json", point_budget=None, deadline=None,
+                         release=False):
+    """
+    Analyse every frame (given by its shared memory handle) in the process pool and return the
+    serialized sequence of all frames, decimated to `point_budget` points per frame if given.
+
+    Frames not analysed by `deadline` are kept for a continuation; the ones already running in the
+    pool keep running meanwhile. The first frame is always waited for, so every response makes
+    progress even when a single frame takes longer than the deadline. With `release`, the segment
+    of the frames is freed afterwards.
+
+    Returns:
+    - Tuple (body, token): the serialized frames analysed in time, and the continuation token of
+      the others (None when every frame is in the body).
+    """
+    if anomaly_points is None:
+        anomaly_points = [None] * len(handles)
+    serialize = [response_format == "json" and point_budget is None] * len(handles)
+    running = []
+    try:
+        frames = await map_cpu_until(deadline, analyse_shared_frame, handles, anomaly_points, serialize, wait_first=True)
+        running = [frame for frame in frames if isinstance(frame, asyncio.Future)]
+        done = completed_prefix(frames)
+        token = None
+        if done < len(frames):
+            # The continuation outlives the segment, so the points left are copied out
+            points = await run_in_thread(copy_shared_frames, handles[done:])
+            token = defer_frames(points, anomaly_points[done:], frames[done:], response_format, point_budget)
+    finally:
+        if release:
+            release_when_done(handles, running)
+    return await finish_frames(frames[:done], response_format, point_budget), token
+
+async def resume_frames(continuation, deadline=None):
+    """
+    Analyse the frames of a continuation that are still missing, like `analyse_frames`; the
+    response holds at least one frame.
+    """
+    serialize = continuation.response_format == "json" and continuation.point_budget is None
+    frames = list(continuation.frames)
+    missing = [index for index, frame in enumerate(frames) if frame is None]
+    running = [index for index, frame in enumerate(frames) if isinstance(frame, asyncio.Future)]
+    results, _ = await asyncio.gather(
+        map_cpu_until(
+            deadline, analyse_frame,
+            [continuation.points[index] for index in missing],
+            [continuation.anomaly_points[index] for index in missing],
+            [serialize] * len(missing),
+            wait_first=bool(missing) and missing[0] == 0
+        ),
+        wait_until(deadline, [frames[index] for index in running])
+    )
+    if running and running[0] == 0:
+        # Like `analyse_frames`, the response holds at least the first frame left
+        await asyncio.wait(frames[:1])
+    for index, frame in zip(missing, results):
+        frames[index] = frame
+    for index in running:
+        if frames[index].done():
+            frames[index] = frames[index].result()
+    done = completed_prefix(frames)
+    token = None
+    if done < len(frames):
+        token = defer_frames(
+            continuation.points[done:], continuation.anomaly_points[done:], frames[done:],
+            continuation.response_format, continuation.point_budget
+        )
+    return await finish_frames(frames[:done], continuation.response_format, continuation.point_budget), token
+
+async def analyse_generated_frames(handles, response_format, point_budget=None, anomaly_tracking=False, deadline=None):
+    """
+    Analyse frames placed in shared memory by `shared_generation`, then free their segment.
+
+    With `anomaly_tracking`, anomalies are tracked across the sequence in one pool task first, and
+    the frame analyses use them instead of detecting anomalies frame by frame.
+    """
+    try:
+        anomaly_points = await run_cpu(track_shared_anomalies, handles) if anomaly_tracking else None
+    except BaseException:
+        shared_frames.release(handles)
+        raise
+    return await analyse_frames(handles, anomaly_points, response_format, point_budget, deadline, release=True)
+
+# Seeded synthetic requests are pure functions of their body, so their responses are cached
+response_cache = ResponseCache(config.RESPONSE_CACHE_BYTES)
+metrics.register_gauge(
+    "mesh_response_cache",
+    "Response cache entries, bytes, hits, misses and shared computations.",
+    lambda: {(("field", field),): value for field, value in response_cache.stats().items()}
 )
 
+async def cached_response(endpoint, request, response_format, compute, http_request, deadline=None):
+    """
+    Return the response of `compute()`, served from the response cache when the request has a seed.
+
+    `compute` returns the body and the continuation token of the frames left at the deadline. It is
+    cancelled, along with the pool tasks it waits for, when the client disconnects.
+    """
+    # Decimated responses point to stored frames that expire, and responses with a deadline may be
+    # partial, so neither is cached
+    if request.seed is None or request.point_budget is not None or deadline is not None:
+        body, token = await cancel_on_disconnect(http_request, compute())
+        return frames_response(body, response_format, token)
+
+    async def compute_body():
+        body, _ = await compute()
+        return body
+
+    key = ResponseCache.make_key(endpoint, request.model_dump(), response_format)
+    body = await cancel_on_disconnect(http_request, response_cache.get_or_compute(key, compute_body))
+    return frames_response(body, response_format)
+
+# Generation function and arguments of each synthetic scenario, shared by its endpoint and /batch
+SYNTHETIC_SCENARIOS = {
+    "time_series_noise_anomalies": lambda request: (
+        time_series_frames,
+        request.num_frames, request.num_points_per_frame, request.noise_level, request.anomaly_level
+    ),
+    "animated_scaled_sphere": lambda request: (
+        scaled_sphere_frames,
+        request.num_points, request.num_frames, request.scale_min, request.scale_max, request.num_cycles,
+        request.noise_level, request.anomaly_percentage, request.distortion_coefficient, False
+    ),
+    "custom_scaled_hollow_sphere": lambda request: (
+        scaled_sphere_frames,
+        request.num_points, request.num_frames, request.scale_min, request.scale_max, request.num_cycles,
+        request.noise_level, request.anomaly_percentage, request.distortion_coefficient, True
+    ),
+    "custom_harmonic_oscillating": lambda request: (
+        harmonic_oscillating_frames,
+        request.num_points, request.num_frames, request.d, request.w0,
+        request.noise_level, request.anomaly_percentage, request.distortion_coefficient
+    ),
+}
+
+async def generate_shared_frames(scenario, request):
+    """
+    Generate the frames of a synthetic scenario request in the process pool, placed in shared memory.
+    """
+    return await run_cpu(seeded, request.seed, shared_generation, *SYNTHETIC_SCENARIOS[scenario](request))
+
 # Scenario 1: Random Scaled Point Generation
 class RandomScaledPointsRequest(BaseModel):
     ready_data: str                     # The ready data to be processed
     start_index: Optional[int] = 0      # Index of the first frame to generate; defaults to 0
     end_index: Optional[int] = 100      # Index of the last frame to generate; defaults to 100
+    point_budget: Optional[int] = None  # Approximate number of points per frame; all points by default
 
     class Config:
         schema_extra = {
@@ -53,7 +517,12 @@ class RandomScaledPointsRequest(BaseModel):
         }
 
 @app.post("/generate_ready_dataset_points", summary="Generate Ready Dataset Points")
-async def generate_ready_dataset_points(request: RandomScaledPointsRequest):
+async def generate_ready_dataset_points(
+    request: RandomScaledPointsRequest,
+    http_request: Request,
+    response_format: ResponseFormat = Query("json", alias="format"),
+    deadline: Optional[float] = Query(None, gt=0)
+):
     """
     Generates a list of point clouds from a ready dataset.
         
@@ -63,46 +532,32 @@ async def generate_ready_dataset_points(request: RandomScaledPointsRequest):
         - `ready_data`: The ready data to be processed.
         - `start_index`: Index of the first frame to generate; defaults to 0.
         - `end_index`: Index of the last frame to generate; defaults to 100.
+        - `point_budget`: Approximate number of points per frame; hull vertices and anomalies are always kept and
+          the rest of the detail can be fetched from `/frame_detail`. All points are returned by default.
+        - `format` (query): "json" (default) or "sequence" for the compact binary sequence encoding.
+        - `deadline` (query): Seconds the request may take. The frames analysed by then (at least the first one)
+          are returned, and the `X-Continuation-Token` header holds the token to fetch the others from
+          `/continue/{token}` on the same worker.
 
     Returns:
         JSONResponse: A list of point clouds.
     """
-    
-    if request.ready_data == "serverMachineDatasetPca":
-        dataset_folder_name = "serverMachineDataset"
-        dataset_name = "SMD_pca"
-        anomaly_dataset_name = "SMD_anomaly_pca"
-    elif request.ready_data == "serverMachineDatasetUmap":
-        dataset_folder_name = "serverMachineDataset"
-        dataset_name = "SMD_umap"
-        anomaly_dataset_name = "SMD_anomaly_umap"
-    elif request.ready_data == "serverMachineDatasetTsne":
-        dataset_folder_name = "serverMachineDataset"
-        dataset_name = "SMD_tsne"
-        anomaly_dataset_name = "SMD_anomaly_tsne"
-    elif request.ready_data == "serverMachineDatasetAutoencoder":
-        dataset_folder_name = "serverMachineDataset"
-        dataset_name = "SMD_autoencoder"
-        anomaly_dataset_name = "SMD_anomaly_autoencoder"
-    
-    # Read the JSON file
-    with open('./backend/data/' + dataset_folder_name + '/' + dataset_name + '.json', 'r') as file:
-        pca_list = json.load(file)
-        
-    with open('./backend/data/' + dataset_folder_name + '/' + anomaly_dataset_name + '.json', 'r') as file:
-        anomaly_points_list = json.load(file)
+    if request.ready_data not in READY_DATASETS:
+        return JSONResponse(content={"error": "Unknown ready dataset"}, status_code=404)
 
-    # Convert each sublist into a NumPy array
-    frames_data = [np.array(sublist) for sublist in pca_list[request.start_index:request.end_index]]
-        
-    data = [calculate_data(points) for points in frames_data]
-    
-    # Iterate through enumarated data to add anomaly points
-    for index, frame in enumerate(data):
-        selected_anomaly_points_list = anomaly_points_list[request.start_index:request.end_index]
-        frame["anomaly_points"] = selected_anomaly_points_list[index]["anomaly_points"]
-        
-    return JSONResponse(content=jsonable_encoder(data))
+    deadline = deadline_after(deadline)
+
+    async def compute():
+        async with heavy_jobs.admit():
+            # The dataset is loaded into shared memory once; pool workers read the frames in place
+            handles, anomaly_points = await run_in_thread(
+                ready_dataset_frames, request.ready_data, request.start_index, request.end_index
+            )
+            # Anomaly points come from the dataset instead of being detected
+            return await analyse_frames(handles, anomaly_points, response_format, request.point_budget, deadline)
+
+    body, token = await cancel_on_disconnect(http_request, compute())
+    return frames_response(body, response_format, token)
 
 # Scenario 2: Time Series with Noise and Anomalies
 class TimeSeriesNoiseAnomaliesRequest(BaseModel):
@@ -110,6 +565,9 @@ class TimeSeriesNoiseAnomaliesRequest(BaseModel):
     num_points_per_frame: int  # Number of points in each frame
     noise_level: float = 0.1   # Standard deviation of the random noise
     anomaly_level: float = 0.5 # Ratio of points that are anomalies
+    seed: Optional[int] = None # Random seed; seeded requests are deterministic and cached
+    point_budget: Optional[int] = None # Approximate number of points per frame; all points by default
+    anomaly_tracking: bool = False     # Track anomalies across frames instead of detecting them per frame
 
     class Config:
         schema_extra = {
@@ -122,7 +580,12 @@ class TimeSeriesNoiseAnomaliesRequest(BaseModel):
         }
 
 @app.post("/generate_time_series_noise_anomalies", summary="Generate Time Series with Noise and Anomalies")
-async def generate_time_series_noise_anomalies(request: TimeSeriesNoiseAnomaliesRequest):
+async def generate_time_series_noise_anomalies(
+    request: TimeSeriesNoiseAnomaliesRequest,
+    http_request: Request,
+    response_format: ResponseFormat = Query("json", alias="format"),
+    deadline: Optional[float] = Query(None, gt=0)
+):
     """
     Generates a synthetic time series dataset with noise and anomalies.
 
@@ -136,13 +599,29 @@ async def generate_time_series_noise_anomalies(request: TimeSeriesNoiseAnomalies
         - `num_points_per_frame`: Number of points in each frame.
         - `noise_level`: Standard deviation of the random noise.
         - `anomaly_level`: Ratio of points that are anomalies.
+        - `seed`: Random seed; seeded requests are deterministic and served from the response cache.
+        - `point_budget`: Approximate number of points per frame; hull vertices and anomalies are always kept and
+          the rest of the detail can be fetched from `/frame_detail`. All points are returned by default.
+        - `anomaly_tracking`: Track anomalies across frames: only points that leave their cluster are flagged, and
+          their alerts persist while they stay out, instead of running DBSCAN on every frame independently.
+        - `format` (query): "json" (default) or "sequence" for the compact binary sequence encoding.
+        - `deadline` (query): Seconds the request may take. The frames analysed by then (at least the first one)
+          are returned, and the `X-Continuation-Token` header holds the token to fetch the others from
+          `/continue/{token}` on the same worker.
 
     Returns:
         JSONResponse: A list of time series data, each frame containing points with added noise and anomalies.
     """
-    frames_data = generate_synthetic_time_series(request.num_frames, request.num_points_per_frame, request.noise_level, request.anomaly_level)
-    data = [calculate_data(points) for points in frames_data]
-    return JSONResponse(content=jsonable_encoder(data))
+    deadline = deadline_after(deadline)
+
+    async def compute():
+        async with heavy_jobs.admit():
+            handles = await generate_shared_frames("time_series_noise_anomalies", request)
+            return await analyse_generated_frames(
+                handles, response_format, request.point_budget, request.anomaly_tracking, deadline
+            )
+
+    return await cached_response("/generate_time_series_noise_anomalies", request, response_format, compute, http_request, deadline)
 
 # Scenario 3: Animated Scaled Sphere Point Cloud
 class AnimatedSphereRequest(BaseModel):
@@ -154,6 +633,9 @@ class AnimatedSphereRequest(BaseModel):
     noise_level: float = 0.1    # Standard deviation of the random noise
     anomaly_percentage: float = 0.1 # Percentage of points that are anomalies
     distortion_coefficient: float = 0.5 # Distortion coefficient for anomaly points
+    seed: Optional[int] = None  # Random seed; seeded requests are deterministic and cached
+    point_budget: Optional[int] = None # Approximate number of points per frame; all points by default
+    anomaly_tracking: bool = False     # Track anomalies across frames instead of detecting them per frame
 
     class Config:
         schema_extra = {
@@ -170,7 +652,12 @@ class AnimatedSphereRequest(BaseModel):
         }
 
 @app.post("/generate_animated_scaled_sphere", summary="Generate Animated Scaled Sphere Point Cloud")
-async def generate_animated_scaled_sphere(request: AnimatedSphereRequest):
+async def generate_animated_scaled_sphere(
+    request: AnimatedSphereRequest,
+    http_request: Request,
+    response_format: ResponseFormat = Query("json", alias="format"),
+    deadline: Optional[float] = Query(None, gt=0)
+):
     """
     Generates an animated series of scaled 3D sphere point clouds.
 
@@ -188,26 +675,29 @@ async def generate_animated_scaled_sphere(request: AnimatedSphereRequest):
         - `noise_level`: Standard deviation of the random noise.
         - `anomaly_percentage`: Percentage of points that are anomalies.
         - `distortion_coefficient`: Distortion coefficient for anomaly points.
+        - `seed`: Random seed; seeded requests are deterministic and served from the response cache.
+        - `point_budget`: Approximate number of points per frame; hull vertices and anomalies are always kept and
+          the rest of the detail can be fetched from `/frame_detail`. All points are returned by default.
+        - `anomaly_tracking`: Track anomalies across frames: only points that leave their cluster are flagged, and
+          their alerts persist while they stay out, instead of running DBSCAN on every frame independently.
+        - `format` (query): "json" (default) or "sequence" for the compact binary sequence encoding.
+        - `deadline` (query): Seconds the request may take. The frames analysed by then (at least the first one)
+          are returned, and the `X-Continuation-Token` header holds the token to fetch the others from
+          `/continue/{token}` on the same worker.
 
     Returns:
         JSONResponse: A list of point clouds representing an animated scaled sphere.
     """
-    # Generate the base point cloud
-    base_point_cloud = generate_filled_sphere_point_cloud(request.num_points)
-    
-    # Generate the animated point clouds
-    frames_data = [
-        apply_sinusoidal_transformation_with_noise_and_anomalies(
-                base_point_cloud, frame, 
-                request.num_frames, request.scale_min, request.scale_max, 
-                request.num_cycles, request.noise_level, 
-                request.anomaly_percentage, request.distortion_coefficient
-            ) 
-        for frame in range(request.num_frames)
-    ]
-    
-    data = [calculate_data(points) for points in frames_data]
-    return JSONResponse(content=jsonable_encoder(data))
+    deadline = deadline_after(deadline)
+
+    async def compute():
+        async with heavy_jobs.admit():
+            handles = await generate_shared_frames("animated_scaled_sphere", request)
+            return await analyse_generated_frames(
+                handles, response_format, request.point_budget, request.anomaly_tracking, deadline
+            )
+
+    return await cached_response("/generate_animated_scaled_sphere", request, response_format, compute, http_request, deadline)
 
 # Scenario 4: Custom Scaled Hollow Sphere Point Cloud
 class CustomScaledHollowSphereRequest(BaseModel):
@@ -219,6 +709,9 @@ class CustomScaledHollowSphereRequest(BaseModel):
     noise_level: float = 0.1    # Standard deviation of the random noise
     anomaly_percentage: float = 0.1 # Percentage of points that are anomalies
     distortion_coefficient: float = 0.5 # Distortion coefficient for anomaly points
+    seed: Optional[int] = None  # Random seed; seeded requests are deterministic and cached
+    point_budget: Optional[int] = None # Approximate number of points per frame; all points by default
+    anomaly_tracking: bool = False     # Track anomalies across frames instead of detecting them per frame
 
     class Config:
         schema_extra = {
@@ -235,7 +728,12 @@ class CustomScaledHollowSphereRequest(BaseModel):
         }
 
 @app.post("/generate_custom_scaled_hollow_sphere", summary="Generate Custom Scaled Hollow Sphere Point Cloud")
-async def generate_custom_scaled_hollow_sphere(request: CustomScaledHollowSphereRequest):
+async def generate_custom_scaled_hollow_sphere(
+    request: CustomScaledHollowSphereRequest,
+    http_request: Request,
+    response_format: ResponseFormat = Query("json", alias="format"),
+    deadline: Optional[float] = Query(None, gt=0)
+):
     """
     Generates a custom series of scaled 3D hollow sphere point clouds.
 
@@ -253,26 +751,29 @@ async def generate_custom_scaled_hollow_sphere(request: CustomScaledHollowSphere
         - `noise_level`: Standard deviation of the random noise.
         - `anomaly_percentage`: Percentage of points that are anomalies.
         - `distortion_coefficient`: Distortion coefficient for anomaly points.
+        - `seed`: Random seed; seeded requests are deterministic and served from the response cache.
+        - `point_budget`: Approximate number of points per frame; hull vertices and anomalies are always kept and
+          the rest of the detail can be fetched from `/frame_detail`. All points are returned by default.
+        - `anomaly_tracking`: Track anomalies across frames: only points that leave their cluster are flagged, and
+          their alerts persist while they stay out, instead of running DBSCAN on every frame independently.
+        - `format` (query): "json" (default) or "sequence" for the compact binary sequence encoding.
+        - `deadline` (query): Seconds the request may take. The frames analysed by then (at least the first one)
+          are returned, and the `X-Continuation-Token` header holds the token to fetch the others from
+          `/continue/{token}` on the same worker.
     
     Returns:
         JSONResponse: A list of point clouds representing a custom scaled hollow sphere.
     """
-    # Generate the base point cloud
-    base_point_cloud = generate_hallow_sphere_point_cloud(request.num_points)
-    
-    # Generate the animated point clouds
-    frames_data = [
-        apply_sinusoidal_transformation_with_noise_and_anomalies(
-                base_point_cloud, frame, 
-                request.num_frames, request.scale_min, request.scale_max, 
-                request.num_cycles, request.noise_level, 
-                request.anomaly_percentage, request.distortion_coefficient
-            ) 
-        for frame in range(request.num_frames)
-    ]
-    
-    data = [calculate_data(points) for points in frames_data]
-    return JSONResponse(content=jsonable_encoder(data))
+    deadline = deadline_after(deadline)
+
+    async def compute():
+        async with heavy_jobs.admit():
+            handles = await generate_shared_frames("custom_scaled_hollow_sphere", request)
+            return await analyse_generated_frames(
+                handles, response_format, request.point_budget, request.anomaly_tracking, deadline
+            )
+
+    return await cached_response("/generate_custom_scaled_hollow_sphere", request, response_format, compute, http_request, deadline)
 
 # Scenario 5: Custom Harmonic Oscillating Point Cloud
 class CustomHarmonicOscillatingRequest(BaseModel):
@@ -283,6 +784,9 @@ class CustomHarmonicOscillatingRequest(BaseModel):
     noise_level: float = 0.1    # Standard deviation of the random noise
     anomaly_percentage: float = 0.1 # Percentage of points that are anomalies
     distortion_coefficient: float = 1.5 # Distortion coefficient for anomaly points
+    seed: Optional[int] = None  # Random seed; seeded requests are deterministic and cached
+    point_budget: Optional[int] = None # Approximate number of points per frame; all points by default
+    anomaly_tracking: bool = False     # Track anomalies across frames instead of detecting them per frame
 
     class Config:
         schema_extra = {
@@ -298,7 +802,12 @@ class CustomHarmonicOscillatingRequest(BaseModel):
         }
 
 @app.post("/generate_custom_harmonic_oscillating", summary="Generate Custom Harmonic Oscillating Point Cloud")
-async def generate_custom_harmonic_oscillating(request: CustomHarmonicOscillatingRequest):
+async def generate_custom_harmonic_oscillating(
+    request: CustomHarmonicOscillatingRequest,
+    http_request: Request,
+    response_format: ResponseFormat = Query("json", alias="format"),
+    deadline: Optional[float] = Query(None, gt=0)
+):
     """
     Generates a custom series of 3D point clouds with harmonic oscillations.
 
@@ -314,71 +823,671 @@ async def generate_custom_harmonic_oscillating(request: CustomHarmonicOscillatin
         - `noise_level`: Standard deviation of the random noise.
         - `anomaly_percentage`: Percentage of points that are anomalies.
         - `distortion_coefficient`: Distortion coefficient for anomaly points.
+        - `seed`: Random seed; seeded requests are deterministic and served from the response cache.
+        - `point_budget`: Approximate number of points per frame; hull vertices and anomalies are always kept and
+          the rest of the detail can be fetched from `/frame_detail`. All points are returned by default.
+        - `anomaly_tracking`: Track anomalies across frames: only points that leave their cluster are flagged, and
+          their alerts persist while they stay out, instead of running DBSCAN on every frame independently.
+        - `format` (query): "json" (default) or "sequence" for the compact binary sequence encoding.
+        - `deadline` (query): Seconds the request may take. The frames analysed by then (at least the first one)
+          are returned, and the `X-Continuation-Token` header holds the token to fetch the others from
+          `/continue/{token}` on the same worker.
     
     Returns:
         JSONResponse: A list of point clouds representing a custom harmonic oscillating sphere.
     """
-    # Generate the base point cloud
-    base_point_cloud = generate_filled_sphere_point_cloud(request.num_points)
-    
-    # Generate the animated point clouds
-    frames_data = [
-        apply_harmonic_transformation_with_noise_and_anomalies(
-                base_point_cloud, frame, 
-                request.num_frames, request.d, request.w0, 
-                request.noise_level, request.anomaly_percentage, 
-                request.distortion_coefficient
-            ) 
-        for frame in range(request.num_frames)
-    ]
-    
-    data = [calculate_data(points) for points in frames_data]
-    return JSONResponse(content=jsonable_encoder(data))
+    deadline = deadline_after(deadline)
+
+    async def compute():
+        async with heavy_jobs.admit():
+            handles = await generate_shared_frames("custom_harmonic_oscillating", request)
+            return await analyse_generated_frames(
+                handles, response_format, request.point_budget, request.anomaly_tracking, deadline
+            )
+
+    return await cached_response("/generate_custom_harmonic_oscillating", request, response_format, compute, http_request, deadline)
+
+@app.post("/continue/{token}", summary="Continue a Request Cut Short by Its Deadline")
+async def continue_frames(token: str, http_request: Request, deadline: Optional[float] = Query(None, gt=0)):
+    """
+    Endpoint returning the next frames of a scenario request that reached its deadline.
+
+    The response has the format and point budget of the original request. A token is used once:
+    when frames are still left at the new deadline, the response carries the next token in its
+    `X-Continuation-Token` header.
+
+    Continuations are held in the memory of the worker that answered the original request; with several
+    workers, `/continue/{token}` must be routed to the same worker, or it is not found.
+
+    - `token`: The `X-Continuation-Token` of the previous response.
+    - `deadline` (query): Seconds this request may take, past which only the next frame is waited for; all
+      remaining frames by default.
+    """
+    if continuations.get(token) is None:
+        return JSONResponse(content={"error": "Continuation not found"}, status_code=404)
+    deadline = deadline_after(deadline)
+
+    async with heavy_jobs.admit():
+        continuation = continuations.pop(token)
+        if continuation is None:
+            return JSONResponse(content={"error": "Continuation not found"}, status_code=404)
+        body, next_token = await cancel_on_disconnect(http_request, resume_frames(continuation, deadline))
+    return frames_response(body, continuation.response_format, next_token)
+
+# Batches: several scenario requests (e.g. the projections of a comparison view) in one stream
+BATCH_SCENARIOS = {
+    "ready_dataset_points": RandomScaledPointsRequest,
+    "time_series_noise_anomalies": TimeSeriesNoiseAnomaliesRequest,
+    "animated_scaled_sphere": AnimatedSphereRequest,
+    "custom_scaled_hollow_sphere": CustomScaledHollowSphereRequest,
+    "custom_harmonic_oscillating": CustomHarmonicOscillatingRequest,
+}
+
+class BatchItem(BaseModel):
+    id: str         # Id tagging the lines of this sub-request in the response stream
+    scenario: Literal[
+        "ready_dataset_points", "time_series_noise_anomalies", "animated_scaled_sphere",
+        "custom_scaled_hollow_sphere", "custom_harmonic_oscillating"
+    ]               # Scenario, named after its endpoint without the "generate_" prefix
+    params: dict    # Body of the scenario's own endpoint
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem] = Field(min_length=1)
+
+def batch_line(content, frame=None):
+    """
+    Serialize one line of the batch stream; `frame` (JSON bytes from the pool) is spliced in as is.
+    """
+    line = encode(content)
+    if frame is not None:
+        line = line[:-1] + b',"frame":' + frame + b"}"
+    return line + b"\n"
+
+def release_generated(task):
+    # Generated sequences are freed once analysed, or as soon as a generation left running finishes
+    if not task.cancelled() and task.exception() is None:
+        shared_frames.release(task.result())
+
+async def batch_stream(items, admission):
+    """
+    Plan the frames of all sub-requests, analyse every distinct frame once in the process pool and
+    emit it to each sub-request that includes it as soon as it is ready.
+
+    Ready dataset frames are shared memory handles into the dataset, so overlapping frame ranges
+    (of one or several sub-requests) map to the same handle and are analysed once. Seeded synthetic
+    sub-requests with identical parameters are generated once.
+    """
+    generations = {}    # generation key -> task producing the frame handles
+    sources = []        # (id, scenario, parameters, task producing its frames)
+    tasks = {}          # frame handle -> analysis task
+    subscribers = {}    # frame handle -> [(id, frame_index)]
+    totals = {}         # id -> number of frames
+    remaining = {}      # id -> number of frames not emitted yet
+    async with admission:
+        try:
+            for item_id, scenario, params in items:
+                if scenario == "ready_dataset_points":
+                    source = asyncio.ensure_future(run_in_thread(
+                        ready_dataset_frames, params.ready_data, params.start_index, params.end_index
+                    ))
+                else:
+                    # Unseeded requests are random, so only seeded ones can share a generation
+                    key = (scenario, params.model_dump_json()) if params.seed is not None else item_id
+                    if key not in generations:
+                        generations[key] = asyncio.ensure_future(generate_shared_frames(scenario, params))
+                    source = generations[key]
+                sources.append((item_id, scenario, params, source))
+            await asyncio.wait([source for _, _, _, source in sources])
+
+            # All frames of all sub-requests are submitted at once, so the pool works through the whole plan
+            for item_id, scenario, params, source in sources:
+                if source.exception() is not None:
+                    yield batch_line({"id": item_id, "error": str(source.exception())})
+                    continue
+                if scenario == "ready_dataset_points":
+                    # Anomaly points come from the dataset instead of being detected
+                    handles, anomaly_points = source.result()
+                else:
+                    handles = source.result()
+                    anomaly_points = [None] * len(handles)
+                    if params.anomaly_tracking:
+                        try:
+                            anomaly_points = await run_cpu(track_shared_anomalies, handles)
+                        except Exception as error:
+                            yield batch_line({"id": item_id, "error": str(error)})
+                            continue
+                totals[item_id] = remaining[item_id] = len(handles)
+                for frame_index, (handle, anomalies) in enumerate(zip(handles, anomaly_points)):
+                    subscribers.setdefault(handle, []).append((item_id, frame_index))
+                    if handle not in tasks:
+                        tasks[handle] = asyncio.ensure_future(run_cpu(analyse_shared_frame, handle, anomalies, True))
+            yield batch_line({"plan": {
+                "requests": len(items),
+                "frames": sum(totals.values()),
+                "distinct_frames": len(tasks),
+            }})
+            for item_id, count in totals.items():
+                if count == 0:
+                    yield batch_line({"id": item_id, "done": True, "num_frames": 0})
+
+            handle_of = {task: handle for handle, task in tasks.items()}
+            failed = set()
+            pending = set(tasks.values())
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    for item_id, frame_index in subscribers[handle_of[task]]:
+                        if item_id in failed:
+                            continue
+                        if task.exception() is not None:
+                            failed.add(item_id)
+                            yield batch_line({"id": item_id, "error": str(task.exception())})
+                            continue
+                        yield batch_line({"id": item_id, "frame_index": frame_index}, task.result())
+                        remaining[item_id] -= 1
+                        if remaining[item_id] == 0:
+                            yield batch_line({"id": item_id, "done": True, "num_frames": totals[item_id]})
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            for task in generations.values():
+                if task.done():
+                    release_generated(task)
+                else:
+                    task.add_done_callback(release_generated)
+
+@app.post("/batch", summary="Run Several Scenario Requests in One Stream")
+async def batch(request: BatchRequest):
+    """
+    Runs several scenario requests together and streams their frames as they are analysed.
+
+    The response is newline-delimited JSON. A first line describes the plan (`requests`, `frames`
+    and `distinct_frames` once shared inputs are deduplicated); then every line carries the `id` of
+    its sub-request and either a `frame_index` and `frame`, `done` with `num_frames`, or an `error`.
+    Frames of different sub-requests are interleaved in completion order.
+
+    Args:
+        - `requests`: List of sub-requests, each with an `id`, a `scenario` (the name of its endpoint
+          without the "generate_" prefix, e.g. "ready_dataset_points") and the `params` that endpoint takes.
+          `point_budget` is not supported in batches.
+    """
+    ids = [item.id for item in request.requests]
+    if len(set(ids)) != len(ids):
+        return JSONResponse(content={"error": "Sub-request ids must be unique"}, status_code=400)
+
+    items = []
+    for item in request.requests:
+        try:
+            params = BATCH_SCENARIOS[item.scenario].model_validate(item.params)
+        except ValidationError as exc:
+            return JSONResponse(content={
+                "error": "Invalid parameters for sub-request {}".format(item.id),
+                "detail": exc.errors(include_url=False, include_context=False)
+            }, status_code=422)
+        if params.point_budget is not None:
+            return JSONResponse(content={"error": "point_budget is not supported in batches"}, status_code=400)
+        if item.scenario == "ready_dataset_points" and params.ready_data not in READY_DATASETS:
+            return JSONResponse(content={"error": "Unknown ready dataset"}, status_code=404)
+        items.append((item.id, item.scenario, params))
+
+    # The whole batch is one heavy job; the slot is held until the stream ends, or the client goes away
+    admission = AsyncExitStack()
+    await admission.enter_async_context(heavy_jobs.admit())
+    return StreamingResponse(
+        batch_stream(items, admission),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(admission.aclose)
+    )
 
 # Scenario 6: Upload a Video to Generate a Time Series Point Cloud
-processed_data = {} # Temporary storage for processed data
-@app.post("/uploadvideo/")
-async def create_upload_file(file: UploadFile = File(...), num_points_per_frame: int = Form(...)):
+# Storage for processed data, shared by all worker processes and bounded by TTL and memory budget
+processed_data = ResultStore(
+    config.RESULT_DIR,
+    ttl=config.RESULT_TTL_SECONDS,
+    memory_budget=config.RESULT_MEMORY_BUDGET_BYTES,
+    spill_bytes=config.RESULT_SPILL_BYTES
+)
+
+@functools.lru_cache(maxsize=None)
+def get_depth_model(mode=config.INFERENCE_MODE):
     """
-    Endpoint to upload a video and process it to generate point clouds.
+    Load (and optimize, depending on the mode) the Monodepth2 model once per process.
     """
-    # Load Monodepth2 model
+    # torch and the video stack take seconds to import and only video uploads need them, so they
+    # are imported on first use instead of with the server
+    import torch
+    from backend.src.utils.data_generator_from_video import load_model
+
     model_name = "mono+stereo_640x192"
     model_path = "./backend/src/models/monodepth2/" + model_name
     encoder_path = model_path + "/encoder.pth"
     depth_decoder_path = model_path + "/depth.pth"
 
     # Load the model onto CPU
-    encoder, depth_decoder = load_model(encoder_path, depth_decoder_path, device=torch.device("cpu"))
-    
-    # Save temporary video file
-    temp_video_path = "temp_video.mp4"
-    with open(temp_video_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    return load_model(encoder_path, depth_decoder_path, device=torch.device("cpu"), mode=mode)
+
+def preload():
+    """
+    Load the depth model and the ready datasets before the production launcher forks its workers,
+    so they share one copy instead of each loading their own on first use.
+    """
+    try:
+        get_depth_model()
+    except FileNotFoundError as exc:
+        print("Depth model not preloaded: {}".format(exc))
+    # Ready datasets go to shared memory once instead of once per worker
+    for ready_data in READY_DATASETS:
+        try:
+            ready_dataset_frames(ready_data, 0, 0)
+        except FileNotFoundError as exc:
+            print("Ready dataset {} not preloaded: {}".format(ready_data, exc))
+
+@app.post("/uploadvideo/")
+async def create_upload_file(
+    http_request: Request,
+    file: UploadFile = File(...),
+    num_points_per_frame: int = Form(...),
+    target_fps: Optional[float] = Form(None),
+    start_time: Optional[float] = Form(None),
+    end_time: Optional[float] = Form(None),
+    max_frames: Optional[int] = Form(None),
+    skip_threshold: Optional[float] = Form(None),
+    deadline: Optional[float] = Form(None)
+):
+    """
+    Endpoint to upload a video and process it to generate point clouds.
 
-    # Process the video
-    point_clouds = video_to_point_clouds(temp_video_path, encoder, depth_decoder, num_points_per_frame=num_points_per_frame)
+    Args:
+        - `file`: The video file.
+        - `num_points_per_frame`: Number of points to sample in each point cloud.
+        - `target_fps`: Output frame rate; frames above this rate are skipped without being decoded.
+        - `start_time`: Timestamp (seconds) of the first frame to process.
+        - `end_time`: Timestamp (seconds) after which processing stops.
+        - `max_frames`: Maximum number of frames to process.
+        - `skip_threshold`: When set, frames whose downscaled difference to the last inferred frame
+          is below this value (0-1) reuse its depth map instead of running the network.
+        - `deadline`: Seconds of processing after which the video is cut short. The frames processed by
+          then are stored and `complete` is false; upload the video again with a later `start_time` for the rest.
+
+    Processing stops, and nothing is stored, if the client disconnects.
+    """
+    if any(value is not None and value <= 0 for value in (target_fps, max_frames, deadline)):
+        return JSONResponse(content={"error": "target_fps, max_frames and deadline must be positive"}, status_code=400)
+    if start_time is not None and end_time is not None and end_time <= start_time:
+        return JSONResponse(content={"error": "end_time must be greater than start_time"}, status_code=400)
+
+    async with heavy_jobs.admit():
+        # Load Monodepth2 model (this also imports the video stack on the first upload)
+        encoder, depth_decoder = await run_in_thread(get_depth_model)
+        from backend.src.utils.data_generator_from_video import build_video_pipeline
 
-    # Clean up: remove the temporary file
-    os.remove(temp_video_path)
+        # Stream the upload into a file of its own; it is removed when processing ends, even on error
+        async with spooled_upload(file, config.SPOOL_DIR, config.MAX_UPLOAD_BYTES) as video_path:
+            # Process the video: decode, depth inference, point cloud generation and analysis run as
+            # overlapping stages, so only a bounded number of frames is held in flight at any time.
+            # The analysis stage hands each frame to the process pool.
+            pipeline = build_video_pipeline(
+                video_path, encoder, depth_decoder,
+                num_points_per_frame=num_points_per_frame,
+                analyse=lambda points: call_cpu(calculate_data, points),
+                target_fps=target_fps,
+                start_time=start_time,
+                end_time=end_time,
+                max_frames=max_frames,
+                skip_threshold=skip_threshold
+            )
 
-    # Calculate data for each point cloud    
-    data = [calculate_data(points) for points in point_clouds]
+            # The pipeline stops early when the deadline passes or the client goes away
+            timer = asyncio.get_running_loop().call_later(deadline, pipeline.stop) if deadline is not None else None
+            try:
+                # Frames are written to the result store as they leave the pipeline, under a new unique ID
+                # (asyncio.to_thread carries the request context, so stage timings keep their endpoint and
+                # a profiled request profiles the store writes)
+                async with DisconnectWatch(http_request, pipeline.stop) as watch:
+                    data_id = await asyncio.to_thread(profiling.maybe_profiled, processed_data.put, pipeline.run())
+            finally:
+                if timer is not None:
+                    timer.cancel()
 
-    # Generate a unique ID for this data
-    data_id = str(uuid.uuid4())
-    processed_data[data_id] = data
+    if watch.disconnected:
+        # Nobody is left to retrieve the frames processed so far
+        await asyncio.to_thread(profiling.maybe_profiled, processed_data.delete, data_id)
+        raise ClientDisconnected()
+    if pipeline.stopped:
+        metrics.count("partial_responses")
 
     # Return the unique ID as reference
-    return {"data_id": data_id}
+    return {
+        "data_id": data_id,
+        "complete": not pipeline.stopped,
+        "inference_mode": config.INFERENCE_MODE,
+        "pipeline": pipeline.stats()
+    }
 
 @app.get("/retrieve_data/{data_id}")
-async def retrieve_data(data_id: str):
+async def retrieve_data(
+    data_id: str,
+    response_format: ResponseFormat = Query("json", alias="format"),
+    point_budget: Optional[int] = None
+):
     """
     Endpoint to retrieve processed data using a unique ID.
+
+    - `format` (query): "json" (default) or "sequence" for the compact binary sequence encoding.
+    - `point_budget` (query): Approximate number of points per frame; hull vertices and anomalies are
+      always kept and the rest of the detail can be fetched from `/frame_detail`.
     """
-    if data_id in processed_data:
-        return JSONResponse(content=jsonable_encoder(processed_data[data_id]))
-    else:
+    if not await run_in_thread(processed_data.exists, data_id):
+        return JSONResponse(content={"error": "Data not found"}, status_code=404)
+    if response_format == "sequence" or point_budget is not None:
+        frames = await run_in_thread(processed_data.get, data_id)
+        if frames is None:
+            return JSONResponse(content={"error": "Data not found"}, status_code=404)
+        if point_budget is not None:
+            body = await level_of_detail(frames, point_budget, response_format, data_id)
+        else:
+            body = await run_cpu(encode_frames, frames)
+        return Response(content=body, media_type=MEDIA_TYPES[response_format])
+    # Stream the stored frames one by one instead of loading the whole result into memory
+    return StreamingResponse(processed_data.iter_json(data_id), media_type="application/json")
+
+# Progressive orders of stored frames, computed in the pool on the first /frame_detail request of a frame
+detail_orders = SpatialIndexCache(
+    processed_data.get_frame, config.DETAIL_ORDER_CACHE_BYTES, functools.partial(call_cpu, progressive_frame)
+)
+metrics.register_gauge(
+    "mesh_detail_order_cache",
+    "Progressive order cache entries, bytes, hits and misses.",
+    lambda: {(("field", field),): value for field, value in detail_orders.stats().items()}
+)
+
+@app.get("/frame_detail/{data_id}/{frame_index}", summary="Retrieve More Detail of a Decimated Frame")
+async def get_frame_detail(data_id: str, frame_index: int, start: int = Query(0, ge=0), count: int = Query(10000, ge=1)):
+    """
+    Endpoint returning the next points of a frame in level-of-detail order.
+
+    A decimated frame holds the first `lod.next` points of that order; requesting `start=lod.next`
+    returns the following `count` points, and so on, so the client refines a frame while zooming in.
+
+    - `data_id`, `frame_index`: The `lod.data_id` and `lod.frame_index` of the decimated frame.
+    - `start`: Position in the order to start from.
+    - `count`: Number of points to return.
+    """
+    # Cached orders outlive their result, so expiry is checked on the store
+    if not await run_in_thread(processed_data.exists, data_id):
+        return JSONResponse(content={"error": "Frame not found"}, status_code=404)
+    frame = await run_in_thread(detail_orders.get, data_id, frame_index)
+    if frame is None:
+        return JSONResponse(content={"error": "Frame not found"}, status_code=404)
+    # Only `count` points are sliced and encoded, so this stays out of the pool
+    return Response(content=await run_in_thread(encode_frame_detail, frame, start, count), media_type="application/json")
+
+# Region queries over stored frames, answered from per-frame KD-trees cached in memory
+spatial_indexes = SpatialIndexCache(processed_data.get_frame, config.SPATIAL_INDEX_CACHE_BYTES)
+metrics.register_gauge(
+    "mesh_spatial_index_cache",
+    "Spatial index cache entries, bytes, hits and misses.",
+    lambda: {(("field", field),): value for field, value in spatial_indexes.stats().items()}
+)
+
+class SpatialQueryRequest(BaseModel):
+    data_id: str                    # Id of a stored result (from /uploadvideo/ or a point_budget request)
+    start_frame: int = 0            # First frame of the window
+    end_frame: Optional[int] = None # End of the window (exclusive); defaults to start_frame + 1
+    limit: Optional[int] = Field(default=None, ge=1) # Maximum number of points returned per frame
+
+class BoxQueryRequest(SpatialQueryRequest):
+    box_min: Tuple[float, float, float] # Lower corner of the box
+    box_max: Tuple[float, float, float] # Upper corner of the box
+
+class RadiusQueryRequest(SpatialQueryRequest):
+    center: Tuple[float, float, float]  # Centre of the sphere
+    radius: float                       # Radius of the sphere
+
+class NearestQueryRequest(SpatialQueryRequest):
+    center: Tuple[float, float, float]  # Query point
+    k: int = Field(default=10, ge=1)    # Number of neighbours
+
+async def query_frames(request, query):
+    """
+    Run `query(index)` on the spatial index of every frame of the requested window.
+
+    `query` returns (indices, distances or None); the response lists, per frame, the matching point
+    indices and coordinates, and the distances when the query has them.
+    """
+    if not await run_in_thread(processed_data.exists, request.data_id):
         return JSONResponse(content={"error": "Data not found"}, status_code=404)
+    end_frame = request.end_frame if request.end_frame is not None else request.start_frame + 1
+
+    def run():
+        results = []
+        for frame_index in range(max(request.start_frame, 0), end_frame):
+            index = spatial_indexes.get(request.data_id, frame_index)
+            if index is None:
+                break
+            indices, distances = query(index)
+            if request.limit is not None:
+                indices = indices[:request.limit]
+                distances = distances[:request.limit] if distances is not None else None
+            # Points are returned in single precision, like the frames themselves
+            points = index.points[indices].astype(np.float32)
+            result = {"frame_index": frame_index, "point_indices": indices, "points": points}
+            if distances is not None:
+                result["distances"] = distances
+            results.append(result)
+        return encode(results) if results else None
+
+    body = await run_in_thread(run)
+    if body is None:
+        return JSONResponse(content={"error": "Frame not found"}, status_code=404)
+    return Response(content=body, media_type="application/json")
+
+@app.post("/query_box", summary="Points of Stored Frames Inside a Box")
+async def query_box(request: BoxQueryRequest):
+    """
+    Returns the points of a frame (or a window of frames) of a stored result inside an axis-aligned box.
+
+    Args:
+        - `data_id`: Id of the stored result.
+        - `start_frame`, `end_frame`: Window of frames to query; a single frame by default.
+        - `limit`: Maximum number of points returned per frame.
+        - `box_min`, `box_max`: Lower and upper corners of the box.
+    """
+    return await query_frames(request, lambda index: (index.box(request.box_min, request.box_max), None))
+
+@app.post("/query_radius", summary="Points of Stored Frames Within a Radius")
+async def query_radius(request: RadiusQueryRequest):
+    """
+    Returns the points of a frame (or a window of frames) of a stored result within a radius of a
+    point, nearest first, with their distances.
+
+    Args:
+        - `data_id`: Id of the stored result.
+        - `start_frame`, `end_frame`: Window of frames to query; a single frame by default.
+        - `limit`: Maximum number of points returned per frame.
+        - `center`, `radius`: The sphere to search.
+    """
+    return await query_frames(request, lambda index: index.radius(request.center, request.radius))
+
+@app.post("/query_nearest", summary="Nearest Points of Stored Frames")
+async def query_nearest(request: NearestQueryRequest):
+    """
+    Returns the `k` points nearest to a point in a frame (or each frame of a window) of a stored
+    result, nearest first, with their distances.
+
+    Args:
+        - `data_id`: Id of the stored result.
+        - `start_frame`, `end_frame`: Window of frames to query; a single frame by default.
+        - `limit`: Maximum number of points returned per frame.
+        - `center`, `k`: Query point and number of neighbours.
+    """
+    return await query_frames(request, lambda index: index.nearest(request.center, request.k))
+
+# Live frames: points appended over time, with an incremental hull and versioned changes (live_frames.py)
+live_frames = SessionStore(config.MAX_LIVE_FRAMES)
+metrics.register_gauge(
+    "mesh_live_frames",
+    "Live frames held by this worker.",
+    lambda: {(): len(live_frames)}
+)
+
+class LiveFrameRequest(BaseModel):
+    points: List[Tuple[float, float, float]] = []   # Initial points of the frame
+
+class LivePointsRequest(BaseModel):
+    points: List[Tuple[float, float, float]]        # Points to append
+    since: Optional[int] = None                     # Version held by the client; defaults to the version before this update
+
+def live_changes(live_id, changes):
+    return Response(content=encode({"live_id": live_id, **changes}), media_type="application/json")
+
+@app.post("/live_frames", summary="Create a Live Frame")
+async def create_live_frame(request: LiveFrameRequest):
+    """
+    Creates a frame whose points are appended over time, and returns its `live_id` with a full snapshot.
+
+    Live frames are held in the memory of the worker that created them; with several workers, their
+    updates must be routed to the same worker.
+
+    Args:
+        - `points`: Initial points of the frame; may be empty.
+    """
+    frame = LiveFrame(config.LIVE_FRAME_HISTORY)
+    live_id = live_frames.add(frame)
+    if request.points:
+        await run_in_thread(frame.add_points, request.points)
+    return live_changes(live_id, await run_in_thread(frame.changes_since, None))
+
+@app.post("/live_frames/{live_id}/points", summary="Append Points to a Live Frame")
+async def append_live_points(live_id: str, request: LivePointsRequest):
+    """
+    Appends points to a live frame, inserting them into its convex hull incrementally, and returns
+    what changed since the client's version.
+
+    The response holds the new `version`, the new `points` (the first one at index `start`), the hull
+    vertices added and removed (as point indices; other points are inner points), the faces that are
+    new or changed (`faces`, by `id`) and the ids of the `removed_faces`. When `reset` is true, the
+    client's version was too old and the response is a full snapshot instead.
 
+    Args:
+        - `points`: Points to append.
+        - `since`: Version held by the client; defaults to the version before this update.
+    """
+    frame = live_frames.get(live_id)
+    if frame is None:
+        return JSONResponse(content={"error": "Live frame not found"}, status_code=404)
+    version = await run_in_thread(frame.add_points, request.points)
+    since = request.since if request.since is not None else version - 1
+    return live_changes(live_id, await run_in_thread(frame.changes_since, since))
+
+@app.get("/live_frames/{live_id}", summary="Changes of a Live Frame")
+async def get_live_changes(live_id: str, since: Optional[int] = None):
+    """
+    Returns the changes of a live frame since the client's version (see `/live_frames/{live_id}/points`).
+
+    - `since` (query): Version held by the client; a full snapshot is returned without it.
+    """
+    frame = live_frames.get(live_id)
+    if frame is None:
+        return JSONResponse(content={"error": "Live frame not found"}, status_code=404)
+    return live_changes(live_id, await run_in_thread(frame.changes_since, since))
+
+@app.get("/live_frames/{live_id}/frame", summary="Current State of a Live Frame")
+async def get_live_frame(live_id: str):
+    """
+    Returns the current state of a live frame as a regular frame (all, inner, outermost and anomaly
+    points, and faces).
+    """
+    frame = live_frames.get(live_id)
+    if frame is None:
+        return JSONResponse(content={"error": "Live frame not found"}, status_code=404)
+    return Response(content=encode(await run_in_thread(frame.frame)), media_type="application/json")
+
+@app.delete("/live_frames/{live_id}", summary="Delete a Live Frame")
+async def delete_live_frame(live_id: str):
+    """
+    Deletes a live frame.
+    """
+    if not live_frames.delete(live_id):
+        return JSONResponse(content={"error": "Live frame not found"}, status_code=404)
+    return {"deleted": live_id}
+
+# Metric streams: raw multivariate telemetry projected to 3-D online and analysed like the ready datasets
+metric_streams = SessionStore(config.MAX_METRIC_STREAMS)
+metrics.register_gauge(
+    "mesh_metric_streams",
+    "Metric streams held by this worker.",
+    lambda: {(): len(metric_streams)}
+)
+
+class MetricStreamRequest(BaseModel):
+    num_features: int                         # Number of metrics in a row (at least 3)
+    window: int = 500                         # Number of most recent rows shown by a frame
+    batch_size: int = 50                      # Rows per projection update (at least 4); a frame is emitted after every batch
+    method: Literal["pca", "random"] = "pca"  # IncrementalPCA, or a fixed Gaussian random projection
+    seed: int = 0                             # Seed of the random projection
+
+class MetricRowsRequest(BaseModel):
+    rows: List[List[float]]                   # Rows of raw metrics, oldest first
+
+@app.post("/metric_streams", summary="Create a Metric Stream")
+async def create_metric_stream(request: MetricStreamRequest):
+    """
+    Creates a stream ingesting rows of raw multivariate metrics (e.g. live server telemetry) and
+    returns its `stream_id`.
+
+    Rows are standardized with running statistics and projected to 3-D by a projection updated once
+    per batch of rows. Metric streams are held in the memory of the worker that created them.
+
+    Args:
+        - `num_features`: Number of metrics in a row (at least 3).
+        - `window`: Number of most recent rows shown by a frame.
+        - `batch_size`: Rows per projection update (at least 4); a frame is emitted after every batch.
+        - `method`: "pca" for an IncrementalPCA updated with every batch, or "random" for a fixed random projection.
+        - `seed`: Seed of the random projection.
+    """
+    try:
+        stream = MetricStream(request.num_features, request.window, request.batch_size, request.method, request.seed)
+    except ValueError as exc:
+        return JSONResponse(content={"error": str(exc)}, status_code=400)
+    return {"stream_id": metric_streams.add(stream)}
+
+@app.post("/metric_streams/{stream_id}/rows", summary="Ingest Rows of a Metric Stream")
+async def ingest_metric_rows(stream_id: str, request: MetricRowsRequest):
+    """
+    Adds rows to a metric stream and returns the frames they complete, analysed like any other frame.
+
+    Every completed batch yields one frame: the rows of the window projected to 3-D, with its inner
+    and outermost points, anomalies and faces. The response holds the total number of `rows`
+    ingested and the list of new `frames`, empty when no batch was completed. Frames without a 3-D
+    hull (e.g. constant metrics projecting to a single point) are left out and counted in
+    `skipped_frames`; their rows are still part of the stream.
+
+    Args:
+        - `rows`: Rows of raw metrics, oldest first; an empty list adds nothing.
+    """
+    stream = metric_streams.get(stream_id)
+    if stream is None:
+        return JSONResponse(content={"error": "Metric stream not found"}, status_code=404)
+    try:
+        points = await run_in_thread(stream.ingest, request.rows)
+    except ValueError as exc:
+        return JSONResponse(content={"error": str(exc)}, status_code=400)
+
+    frames = []
+    if points:
+        async with heavy_jobs.admit():
+            frames = await map_cpu(analyse_stream_frame, points)
+    analysed = [frame for frame in frames if frame is not None]
+    body = encode({"stream_id": stream_id, "rows": stream.rows, "skipped_frames": len(frames) - len(analysed)})
+    body = body[:-1] + b',"frames":[' + b",".join(analysed) + b"]}"
+    return Response(content=body, media_type="application/json")
+
+@app.delete("/metric_streams/{stream_id}", summary="Delete a Metric Stream")
+async def delete_metric_stream(stream_id: str):
+    """
+    Deletes a metric stream.
+    """
+    if not metric_streams.delete(stream_id):
+        return JSONResponse(content={"error": "Metric stream not found"}, status_code=404)
+    return {"deleted": stream_id}
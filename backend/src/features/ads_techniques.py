@@ -1,4 +1,5 @@
 from sklearn.cluster import DBSCAN
+from scipy.spatial import cKDTree
 import numpy as np
 
 def detect_anomalies(point_cloud_points, eps=1.0, min_samples=2):
@@ -6,14 +7,122 @@ def detect_anomalies(point_cloud_points, eps=1.0, min_samples=2):
     Detect anomalies in a 3D point cloud using DBSCAN clustering.
 
     Parameters:
-    point_cloud_points (list): A list containing 3D points of a frame.
+    point_cloud_points (array-like): The 3D points of a frame.
     eps (float): The maximum distance between two samples for one to be considered as in the neighborhood of the other.
     min_samples (int): The number of samples in a neighborhood for a point to be considered as a core point.
 
     Returns:
-    list: A list containing the anomalies detected in the point cloud.
+    numpy.ndarray: The anomalies detected in the point cloud.
     """
-    db = DBSCAN(eps=eps, min_samples=min_samples).fit(np.array(point_cloud_points))
+    points = np.asarray(point_cloud_points)
+    db = DBSCAN(eps=eps, min_samples=min_samples).fit(points)
     labels = db.labels_
-    anomalies = np.array(point_cloud_points)[labels == -1]
-    return anomalies.tolist()  # Convert to list
\ No newline at end of file
+    return points[labels == -1]
+
+class TemporalAnomalyTracker:
+    """
+    Anomaly detection over a sequence of frames whose points keep their index from frame to frame.
+
+    Points are classified as in `detect_anomalies`: DBSCAN noise is a point that is not a core point
+    (a point with at least `min_samples` points, itself included, within `eps`) and has no core
+    point within `eps`. The classification is exact, but the neighbour search is not redone for
+    every point: each point keeps the neighbours that made it a core point (or the core point that
+    made it a border point) in the previous frame, and while they are still within `eps`, which is
+    the common case when frames are correlated, the point keeps its status after a single distance
+    check. Only the other points are queried in a KD-tree. Frames with a different number of points
+    start over.
+
+    Cluster membership and a persistence score per point (an exponential average of how often it
+    was noise) are kept between frames. A point raises an alert when it leaves its cluster: it is
+    noise, belonged to a cluster before, and its score reaches `enter`. The alert holds until the
+    score falls below `exit`, so points wavering at the edge of a cluster do not flicker, and
+    outliers that never belonged to a cluster stay quiet.
+
+    Args:
+    - eps, min_samples: DBSCAN parameters, as in `detect_anomalies`.
+    - decay: Weight of the previous score in the persistence average.
+    - enter, exit: Persistence scores raising and clearing an alert.
+    """
+    def __init__(self, eps=1.0, min_samples=2, decay=0.5, enter=0.5, exit=0.2):
+        self.eps = eps
+        self.min_samples = min_samples
+        self.decay = decay
+        self.enter = enter
+        self.exit = exit
+        self.noise = None
+        self.scores = None
+        self.alerts = None
+        self.requeried = 0
+        self._members = None
+        self._core_witnesses = None
+        self._border_witnesses = None
+
+    def update(self, points):
+        """
+        Classify the points of the next frame and update the alerts.
+
+        Returns:
+        - numpy.ndarray: The points with an active alert.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        n = len(points)
+        if self.scores is None or len(self.scores) != n:
+            self.scores = np.zeros(n)
+            self.alerts = np.zeros(n, dtype=bool)
+            self._members = np.zeros(n, dtype=bool)
+            self._core_witnesses = np.full((n, self.min_samples - 1), -1)
+            self._border_witnesses = np.full(n, -1)
+
+        if n < self.min_samples:
+            self.noise = np.ones(n, dtype=bool)
+        else:
+            core = self._core_points(points)
+            self.noise = ~core & ~self._border_points(points, core)
+
+        self.scores = self.decay * self.scores + (1 - self.decay) * self.noise
+        self.alerts = (self.alerts & (self.scores >= self.exit)) | (
+            self.noise & self._members & (self.scores >= self.enter)
+        )
+        self._members |= ~self.noise
+        return points[self.alerts]
+
+    def _within_eps(self, points, indices, witnesses):
+        # Witnesses of -1 (none yet) always fail
+        distances = np.sum((points[indices, None, :] - points[witnesses]) ** 2, axis=2)
+        return np.all((distances <= self.eps ** 2) & (witnesses >= 0), axis=1)
+
+    def _core_points(self, points):
+        k = self.min_samples - 1
+        n = len(points)
+        if k == 0:
+            return np.ones(n, dtype=bool)
+        core = self._within_eps(points, np.arange(n), self._core_witnesses)
+
+        stale = np.flatnonzero(~core)
+        if len(stale):
+            self.requeried += len(stale)
+            distances, neighbours = cKDTree(points).query(points[stale], k=k + 1)
+            distances, neighbours = distances.reshape(len(stale), -1), neighbours.reshape(len(stale), -1)
+            core[stale] = distances[:, k] <= self.eps
+            # The point itself is among its nearest neighbours (unless it has many duplicates); the others are witnesses
+            others = np.argsort(neighbours == stale[:, None], axis=1, kind="stable")[:, :k]
+            self._core_witnesses[stale] = np.take_along_axis(neighbours, others, axis=1)
+        return core
+
+    def _border_points(self, points, core):
+        candidates = np.flatnonzero(~core)
+        witnesses = self._border_witnesses[candidates]
+        border = np.zeros(len(points), dtype=bool)
+        kept = (witnesses >= 0) & core[np.maximum(witnesses, 0)]
+        kept[kept] = self._within_eps(points, candidates[kept], witnesses[kept, None])
+        border[candidates[kept]] = True
+
+        stale = candidates[~kept]
+        core_indices = np.flatnonzero(core)
+        if len(stale) and len(core_indices):
+            self.requeried += len(stale)
+            distances, nearest = cKDTree(points[core_indices]).query(points[stale], k=1, distance_upper_bound=self.eps)
+            found = np.isfinite(distances)
+            border[stale[found]] = True
+            self._border_witnesses[stale[found]] = core_indices[nearest[found]]
+        return border
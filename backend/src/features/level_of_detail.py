@@ -0,0 +1,143 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def progressive_order(points, keep=(), max_levels=10, seed=0):
+    """
+    Order the points of a frame so that every prefix is an evenly spread subset of the frame.
+
+    The points to keep come first. The others follow level by level on voxel grids of 2, 4, 8, ...
+    cells per axis: each level adds one point for every cell of the grid that is still empty, so
+    the first `k` points are a voxel-grid decimation of the frame at a budget of `k` points, and a
+    longer prefix only adds detail to a shorter one.
+
+    Args:
+    - points: The (N, 3) points of the frame.
+    - keep: Indices of the points that must come first (hull vertices, anomalies).
+    - max_levels: Number of voxel levels; the points left after the finest level come last, shuffled.
+    - seed: Seed of the shuffles, so the order of a frame is reproducible.
+
+    Returns:
+    - Permutation of range(N) as an integer array.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    rng = np.random.default_rng(seed)
+    keep = np.unique(np.asarray(keep, dtype=np.int64))
+    assigned = np.zeros(n, dtype=bool)
+    assigned[keep] = True
+    order = [keep]
+    if n == 0:
+        return keep
+
+    lower = points.min(axis=0)
+    extent = max(float(np.ptp(points, axis=0).max()), 1e-12)
+    for level in range(1, max_levels + 1):
+        if assigned.all():
+            break
+        cells = 2 ** level
+        voxels = np.minimum(((points - lower) / extent * cells).astype(np.int64), cells - 1)
+        keys = (voxels[:, 0] * cells + voxels[:, 1]) * cells + voxels[:, 2]
+
+        # One new point per cell that no earlier point represents, picked at random within the cell
+        candidates = np.flatnonzero(~assigned & ~np.isin(keys, keys[assigned]))
+        candidates = rng.permutation(candidates)
+        _, first = np.unique(keys[candidates], return_index=True)
+        chosen = rng.permutation(candidates[first])
+        assigned[chosen] = True
+        order.append(chosen)
+
+    order.append(rng.permutation(np.flatnonzero(~assigned)))
+    return np.concatenate(order)
+
+
+def frame_order(frame):
+    """
+    Progressive order of a frame from `calculate_data`, keeping hull vertices and anomalies first.
+
+    Returns:
+    - Tuple (order, inner, num_kept): the permutation of the frame's points, a boolean mask of its
+      inner points (points not equal to a hull vertex) and the number of points kept first.
+    """
+    points = np.asarray(frame["all_points"], dtype=np.float64).reshape(-1, 3)
+    outermost = np.asarray(frame["outermost_points"], dtype=np.float64).reshape(-1, 3)
+    anomalies = np.asarray(frame["anomaly_points"], dtype=np.float64).reshape(-1, 3)
+
+    distances, _ = cKDTree(outermost).query(points)
+    inner = distances != 0
+    keep = np.flatnonzero(~inner)
+    if len(anomalies):
+        # Anomalies given by a dataset may not be points of the frame; those stay explicit anyway
+        distances, indices = cKDTree(points).query(anomalies)
+        keep = np.concatenate([keep, indices[distances == 0]])
+    keep = np.unique(keep)
+    return progressive_order(points, keep), inner, len(keep)
+
+
+def decimate_frame(frame, point_budget):
+    """
+    Level-of-detail version of a frame limited to about `point_budget` points.
+
+    Hull vertices, anomaly points and faces are always kept, so the budget can be exceeded when they
+    alone are more numerous. The kept points are listed in their original order; `point_indices`
+    maps them back to the full frame, and `lod.next` is where `frame_detail` continues.
+
+    Returns:
+    - The decimated frame dict, with an extra "lod" entry describing the level of detail.
+    """
+    # Responses carry float32 coordinates, like the full frames
+    points = np.asarray(frame["all_points"], dtype=np.float32).reshape(-1, 3)
+    order, inner, num_kept = frame_order(frame)
+    prefix = max(point_budget, num_kept)
+    kept = np.sort(order[:prefix])
+    return {
+        "all_points": points[kept],
+        "inner_points": points[kept[inner[kept]]],
+        "outermost_points": frame["outermost_points"],
+        "anomaly_points": frame["anomaly_points"],
+        "faces": frame["faces"],
+        "point_indices": kept,
+        "lod": {"total_points": len(points), "kept_points": len(kept), "point_budget": point_budget, "next": prefix},
+    }
+
+
+class ProgressiveFrame:
+    """
+    Points of a frame with their progressive order, computed once and sliced by every
+    `frame_detail` request of the frame.
+
+    Args:
+    - frame: The full frame.
+    """
+    __slots__ = ("points", "order", "inner", "nbytes")
+
+    def __init__(self, frame):
+        self.points = np.asarray(frame["all_points"], dtype=np.float32).reshape(-1, 3)
+        order, self.inner, _ = frame_order(frame)
+        self.order = order.astype(np.uint32)
+        self.nbytes = self.points.nbytes + self.order.nbytes + self.inner.nbytes
+
+
+def frame_detail(frame, start, count):
+    """
+    Next points of a frame in progressive order, for a client refining a decimated frame.
+
+    Args:
+    - frame: The full frame, or its `ProgressiveFrame` to reuse the order.
+    - start: Number of points of the progressive order the client already has (`lod.next`).
+    - count: Number of points to return.
+
+    Returns:
+    - Dict with the points, their indices in the full frame and whether each is an inner point.
+    """
+    if not isinstance(frame, ProgressiveFrame):
+        frame = ProgressiveFrame(frame)
+    indices = frame.order[start:start + count]
+    return {
+        "total_points": len(frame.points),
+        "start": start,
+        "end": start + len(indices),
+        "point_indices": indices,
+        "points": frame.points[indices],
+        "inner": frame.inner[indices],
+    }
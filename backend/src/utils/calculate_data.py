@@ -1,32 +1,44 @@
 from scipy.spatial import ConvexHull
 from backend.src.features.faces import Faces
 from backend.src.features.ads_techniques import detect_anomalies
+from backend.src.utils.frame_result import FrameResult
+from backend.src.utils.metrics import span, count
 import numpy as np
 
-def calculate_data(points):
-    hull = ConvexHull(points)
+def calculate_data(points, anomaly_points=None):
+    """
+    Analyse one frame: convex hull, simplified faces, anomalies and inner points.
+
+    Args:
+    - points: The (N, 3) points of the frame.
+    - anomaly_points: Anomaly points known in advance (ready datasets, temporal tracking); they are
+      detected with `detect_anomalies` when not given.
+
+    Returns:
+    - The analysed frame as a `FrameResult`.
+    """
+    count("frames")
+    count("points", len(points))
+
+    with span("convex_hull"):
+        hull = ConvexHull(points)
     simplices = hull.simplices
     org_triangles = [points[s] for s in simplices]
 
-    f = Faces(org_triangles)
-    faces_simplified = f.simplify()
-
-    # Convert NumPy arrays to lists for JSON serialization
-    all_points = points.tolist()  # All points
-    inner_points = points.tolist()  # All points will be excluded from outermost points
-    outermost_points = hull.points[hull.vertices, :].tolist()  # Vertices of the convex hull
-    anomaly_points = detect_anomalies(points.tolist())  # Anomalies
-    
-    # Filter out outermost points from inner points
-    inner_points = [p for p in inner_points if p not in outermost_points]
-
-    # Prepare JSON data
-    data = {
-        "all_points": all_points,
-        "inner_points": inner_points,
-        "outermost_points": outermost_points,
-        "anomaly_points": anomaly_points,
-        "faces": [np.array(face).tolist() for face in faces_simplified]
-    }
-    
-    return data
\ No newline at end of file
+    with span("faces_simplify"):
+        f = Faces(org_triangles)
+        faces_simplified = f.simplify()
+
+    if anomaly_points is None:
+        with span("detect_anomalies"):
+            anomaly_points = detect_anomalies(points)  # Anomalies
+
+    # Inner points: every point not equal to a vertex of the convex hull (duplicates included)
+    with span("inner_points"):
+        _, point_ids = np.unique(points, axis=0, return_inverse=True)
+        point_ids = point_ids.reshape(-1)
+        inner = ~np.isin(point_ids, point_ids[hull.vertices])
+
+    # Coordinates are kept once; hull vertices and faces refer to them by index until the response
+    # is serialized
+    return FrameResult.from_faces(points, hull.vertices, inner, anomaly_points, faces_simplified)
@@ -0,0 +1,66 @@
+import os
+import tempfile
+
+# Server settings, read once from the environment at import time.
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+# Inference mode of the depth network: "fp32", "fused" or "int8" (see inference_modes.py)
+INFERENCE_MODE = os.environ.get("MESH_INFERENCE_MODE", "fp32")
+
+# Result store: directory shared by all worker processes, time to live and memory budget
+RESULT_DIR = os.environ.get("MESH_RESULT_DIR", "./.mesh_results")
+RESULT_TTL_SECONDS = _env_float("MESH_RESULT_TTL_SECONDS", 3600.0)
+RESULT_MEMORY_BUDGET_BYTES = _env_int("MESH_RESULT_MEMORY_BUDGET_MB", 256) * 1024 * 1024
+RESULT_SPILL_BYTES = _env_int("MESH_RESULT_SPILL_MB", 32) * 1024 * 1024
+
+# Video uploads: spool directory for the per-job files and maximum accepted size
+SPOOL_DIR = os.environ.get("MESH_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "mesh_uploads"))
+MAX_UPLOAD_BYTES = _env_int("MESH_MAX_UPLOAD_MB", 512) * 1024 * 1024
+
+# CPU work: worker processes of the shared pool, heavy jobs running at once and waiting in line
+CPU_WORKERS = _env_int("MESH_CPU_WORKERS", os.cpu_count() or 1)
+MAX_HEAVY_JOBS = _env_int("MESH_MAX_HEAVY_JOBS", CPU_WORKERS)
+MAX_QUEUED_JOBS = _env_int("MESH_MAX_QUEUED_JOBS", 16)
+RETRY_AFTER_SECONDS = _env_int("MESH_RETRY_AFTER_SECONDS", 5)
+
+# Response cache of the seeded synthetic endpoints
+RESPONSE_CACHE_BYTES = _env_int("MESH_RESPONSE_CACHE_MB", 128) * 1024 * 1024
+
+# Memory budget of the per-frame spatial indexes used by the region query endpoints
+SPATIAL_INDEX_CACHE_BYTES = _env_int("MESH_SPATIAL_INDEX_CACHE_MB", 256) * 1024 * 1024
+
+# Memory budget of the progressive orders of the frames refined through /frame_detail
+DETAIL_ORDER_CACHE_BYTES = _env_int("MESH_DETAIL_ORDER_CACHE_MB", 64) * 1024 * 1024
+
+# Live frames (append-only point streams): number kept per worker and updates kept per frame
+MAX_LIVE_FRAMES = _env_int("MESH_MAX_LIVE_FRAMES", 64)
+LIVE_FRAME_HISTORY = _env_int("MESH_LIVE_FRAME_HISTORY", 256)
+
+# Metric streams (raw telemetry projected to 3-D online): number kept per worker
+MAX_METRIC_STREAMS = _env_int("MESH_MAX_METRIC_STREAMS", 64)
+
+# Requests cut short by their deadline: continuations kept per worker
+MAX_CONTINUATIONS = _env_int("MESH_MAX_CONTINUATIONS", 64)
+
+# Decimals kept for floats in JSON responses; unset keeps full precision
+JSON_FLOAT_DECIMALS = _env_int("MESH_JSON_DECIMALS", None)
+
+# Stage timers, counters and the /metrics endpoint
+METRICS_ENABLED = os.environ.get("MESH_METRICS", "1") not in ("0", "false", "False", "")
+
+# Per-request profiling: disabled unless MESH_PROFILING=1; profiles are stored in PROFILE_DIR, for a
+# limited time and up to a maximum number of profiles
+PROFILING_ENABLED = os.environ.get("MESH_PROFILING", "0") in ("1", "true", "True")
+PROFILE_DIR = os.environ.get("MESH_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "mesh_profiles"))
+PROFILE_RETENTION_SECONDS = _env_float("MESH_PROFILE_RETENTION_SECONDS", 24 * 3600.0)
+MAX_PROFILES = _env_int("MESH_MAX_PROFILES", 100)
@@ -5,10 +5,16 @@ import torch
 from torchvision import transforms
 from PIL import Image
 from backend.src.models.monodepth2.networks import ResnetEncoder, DepthDecoder
+from backend.src.utils.pipeline import Pipeline
+from backend.src.utils.inference_modes import optimize_depth_model
+from backend.src.utils.metrics import span
 
-def load_model(encoder_path, depth_decoder_path, device=torch.device("cpu")):
+def load_model(encoder_path, depth_decoder_path, device=torch.device("cpu"), mode="fp32"):
     """
     Load the Monodepth2 model with the weights mapped to the specified device (CPU by default).
+
+    `mode` selects the inference mode (see `INFERENCE_MODES` in `inference_modes`); anything other
+    than "fp32" returns fused, frozen TorchScript modules with the same call convention.
     """
     # Create the model instances
     num_layers = 18  # Adjust based on your model
@@ -27,11 +33,11 @@ def load_model(encoder_path, depth_decoder_path, device=torch.device("cpu")):
     encoder.eval()
     depth_decoder.eval()
 
-    return encoder, depth_decoder
+    return optimize_depth_model(encoder, depth_decoder, mode=mode)
 
-def process_image(image, encoder, depth_decoder):
+def estimate_disparity(image, encoder, depth_decoder):
     """
-    Process an image and estimate depth.
+    Run the depth network on an image and return its disparity map at the original resolution.
     """
     # Preprocessing the image
     input_image = image.convert('RGB')
@@ -47,9 +53,13 @@ def process_image(image, encoder, depth_decoder):
     disp = outputs[("disp", 0)]
     disp_resized = torch.nn.functional.interpolate(disp, (original_height, original_width), mode="bilinear", align_corners=False)
 
-    # Saving depth images
-    disp_resized_np = disp_resized.squeeze().cpu().numpy()
-    vmax = np.percentile(disp_resized_np, 95)
+    return disp_resized.squeeze().cpu().numpy()
+
+
+def disparity_to_depth_image(disp_resized_np):
+    """
+    Convert a disparity map into the colour-mapped depth image used to build point clouds.
+    """
     normalized_disp = cv2.normalize(disp_resized_np, None, beta=0, alpha=255, norm_type=cv2.NORM_MINMAX)
     normalized_disp = np.array(normalized_disp, dtype=np.uint8)
     depth_colormap = cv2.applyColorMap(normalized_disp, cv2.COLORMAP_MAGMA)
@@ -57,23 +67,19 @@ def process_image(image, encoder, depth_decoder):
     return depth_colormap
 
 
-def video_to_frames(video_path, frames_per_second=24):
+def process_image(image, encoder, depth_decoder):
     """
-    Extract frames from the video at the specified rate.
+    Process an image and estimate depth.
     """
-    cap = cv2.VideoCapture(video_path)
-    frames = []
+    disp_resized_np = estimate_disparity(image, encoder, depth_decoder)
+    return disparity_to_depth_image(disp_resized_np)
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        frames.append(frame)
-        if len(frames) == frames_per_second * 3:  # for 3 seconds of video
-            break
 
-    cap.release()
-    return frames
+def video_to_frames(video_path, target_fps=None, start_time=None, end_time=None, max_frames=None):
+    """
+    Extract frames from the video, honouring the same ingestion limits as `iter_video_frames`.
+    """
+    return list(iter_video_frames(video_path, target_fps, start_time, end_time, max_frames))
 
 
 def generate_point_cloud(rgb_image, depth_image, num_points=500, scale_factor=1000, depth_scale=1000.0, depth_trunc=3.0):
@@ -117,6 +123,151 @@ def generate_point_cloud(rgb_image, depth_image, num_points=500, scale_factor=10
     return scaled_points
 
 
+class FrameChangeDetector:
+    """
+    Cheap change detector used to skip depth inference on near-static frames.
+
+    Each frame is reduced to a small grayscale thumbnail and compared with the thumbnail of the
+    last frame that went through the network. When the mean absolute difference (scaled to 0-1)
+    stays below `threshold`, the previous depth result can be reused.
+
+    Args:
+    - threshold: Mean absolute thumbnail difference below which a frame counts as unchanged.
+    - size: (width, height) of the comparison thumbnail.
+    """
+    def __init__(self, threshold=0.02, size=(64, 36)):
+        self.threshold = threshold
+        self.size = size
+        self.inferred = 0
+        self.reused = 0
+        self._reference = None
+
+    def _thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA).astype(np.float32) / 255.0
+
+    def is_unchanged(self, frame):
+        """
+        Return True when the frame is close enough to the last inferred frame to reuse its depth.
+        """
+        thumbnail = self._thumbnail(frame)
+        if self._reference is not None and np.mean(np.abs(thumbnail - self._reference)) < self.threshold:
+            self.reused += 1
+            return True
+
+        self._reference = thumbnail
+        self.inferred += 1
+        return False
+
+    def as_dict(self):
+        return {
+            "threshold": self.threshold,
+            "inferred_frames": self.inferred,
+            "reused_frames": self.reused,
+        }
+
+
+def iter_video_frames(video_path, target_fps=None, start_time=None, end_time=None, max_frames=None):
+    """
+    Decode a video file frame by frame, limited to the requested rate and time window.
+
+    Frames that are not needed are skipped with `cap.grab()`, so they are never decoded.
+
+    Args:
+    - video_path: Path to the video file.
+    - target_fps: Output frame rate; frames are dropped evenly when it is below the source rate.
+    - start_time: Timestamp (seconds) of the first frame to consider.
+    - end_time: Timestamp (seconds) after which decoding stops.
+    - max_frames: Maximum number of frames to yield.
+
+    Yields:
+    - The decoded BGR frames, in order.
+    """
+    cap = cv2.VideoCapture(video_path)
+    source_fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+
+    # Keep every `step`-th source frame (fractional steps spread the kept frames evenly)
+    step = 1.0
+    if target_fps and source_fps and target_fps < source_fps:
+        step = source_fps / target_fps
+
+    if start_time:
+        cap.set(cv2.CAP_PROP_POS_MSEC, start_time * 1000.0)
+    start_time = start_time or 0.0
+
+    index = 0
+    next_kept_index = 0.0
+    emitted = 0
+    try:
+        while cap.isOpened():
+            if max_frames is not None and emitted >= max_frames:
+                break
+            if end_time is not None and source_fps and start_time + index / source_fps > end_time:
+                break
+            if not cap.grab():
+                break
+
+            if index >= next_kept_index:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                next_kept_index += step
+                emitted += 1
+                yield frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def build_video_pipeline(video_path, encoder, depth_decoder, num_points_per_frame=500, analyse=None, queue_size=4,
+                         target_fps=None, start_time=None, end_time=None, max_frames=None, skip_threshold=None):
+    """
+    Build a staged pipeline turning a video into point clouds.
+
+    Decoding, depth inference, point cloud generation and the optional analysis step each run
+    in their own thread, connected by bounded queues, so the stages overlap and at most
+    `queue_size` frames wait between two stages.
+
+    Args:
+    - video_path: Path to the video file.
+    - encoder: The trained encoder model for depth estimation.
+    - depth_decoder: The trained depth decoder model.
+    - num_points_per_frame: Number of points to sample in each point cloud.
+    - analyse: Optional function applied to every point cloud (e.g. `calculate_data`).
+    - queue_size: Maximum number of items waiting between two stages.
+    - target_fps, start_time, end_time, max_frames: Ingestion limits, see `iter_video_frames`.
+    - skip_threshold: When set, frames that barely differ from the last inferred frame reuse its
+      depth instead of running the network (see `FrameChangeDetector`).
+
+    Returns:
+    - Pipeline whose `run()` yields one result per frame and whose `stats()` reports per-stage throughput.
+    """
+    detector = FrameChangeDetector(skip_threshold) if skip_threshold is not None else None
+    last_disparity = None
+
+    def infer(frame):
+        nonlocal last_disparity
+        if detector is None or not detector.is_unchanged(frame):
+            # Convert frame to PIL Image for processing
+            frame_pil = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            with span("depth_inference"):
+                last_disparity = estimate_disparity(frame_pil, encoder, depth_decoder)
+        return frame, disparity_to_depth_image(last_disparity)
+
+    def to_point_cloud(item):
+        frame, depth_image = item
+        with span("point_cloud"):
+            return generate_point_cloud(frame, depth_image, num_points=num_points_per_frame)
+
+    stages = [("inference", infer), ("point_cloud", to_point_cloud)]
+    if analyse is not None:
+        stages.append(("analysis", analyse))
+
+    frames = iter_video_frames(video_path, target_fps, start_time, end_time, max_frames)
+    extras = {"depth_reuse": detector} if detector is not None else None
+    return Pipeline(frames, stages, queue_size=queue_size, source_name="decode", extras=extras)
+
+
 def video_to_point_clouds(video_path, encoder, depth_decoder, num_points_per_frame=500):
     """
     Process a video file and convert each frame to a point cloud.
@@ -130,23 +281,5 @@ def video_to_point_clouds(video_path, encoder, depth_decoder, num_points_per_fra
     Returns:
     - List of point clouds, one for each frame.
     """
-    cap = cv2.VideoCapture(video_path)
-    point_clouds = []
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        # Convert frame to PIL Image for processing
-        frame_pil = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-        
-        # Estimate depth
-        depth_image = process_image(frame_pil, encoder, depth_decoder)
-        
-        # Generate point cloud
-        point_cloud = generate_point_cloud(frame, depth_image, num_points=num_points_per_frame)
-        point_clouds.append(point_cloud)
-
-    cap.release()
-    return point_clouds
+    pipeline = build_video_pipeline(video_path, encoder, depth_decoder, num_points_per_frame=num_points_per_frame)
+    return list(pipeline.run())
@@ -0,0 +1,166 @@
+import json
+import struct
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+# Compact in-memory form of an analysed frame. Coordinates are stored once, as float32; hull
+# vertices and face vertices are indices into them and inner points are a mask, instead of every
+# derived list repeating the coordinates. Frames keep this form in the pool results, the result
+# store and the caches, and only become JSON (or the sequence codec) when a response is written.
+#
+# Binary layout used by the result store (little-endian):
+#   b"FRM1", uint32 header length, header JSON, then
+#   points float32[n, 3], outermost uint32[hull], inner uint8[ceil(n / 8)] (bit mask),
+#   anomaly points float32[anomalies, 3], face sizes uint32[faces], face vertices uint32[face_vertices]
+
+MAGIC = b"FRM1"
+_KEYS = ("all_points", "inner_points", "outermost_points", "anomaly_points", "faces")
+
+
+class FrameResult:
+    """
+    Analysed frame holding float32 coordinates and index arrays.
+
+    Reads like the frame dict of `calculate_data` (`frame["all_points"]`, `frame["faces"]`, ...),
+    deriving each entry from the compact arrays on access; `to_dict` gives the dict to serialize.
+
+    Args:
+    - points: The (N, 3) points of the frame.
+    - outermost: Indices of the hull vertices.
+    - inner: Boolean mask of the inner points.
+    - anomaly_points: The (M, 3) anomaly points (not necessarily points of the frame).
+    - face_sizes: Number of vertices of every face.
+    - face_indices: Vertices of all faces, one after the other, as indices into the points.
+    - extra: Optional dict of other entries (e.g. level-of-detail metadata).
+    """
+    __slots__ = ("points", "outermost", "inner", "anomaly_points", "face_sizes", "face_indices", "extra")
+
+    def __init__(self, points, outermost, inner, anomaly_points, face_sizes, face_indices, extra=None):
+        self.points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        self.outermost = np.asarray(outermost, dtype=np.uint32)
+        self.inner = np.asarray(inner, dtype=bool)
+        self.anomaly_points = np.asarray(anomaly_points, dtype=np.float32).reshape(-1, 3)
+        self.face_sizes = np.asarray(face_sizes, dtype=np.uint32)
+        self.face_indices = np.asarray(face_indices, dtype=np.uint32)
+        self.extra = extra
+
+    @classmethod
+    def from_faces(cls, points, outermost, inner, anomaly_points, faces):
+        """
+        Build a frame whose faces are given as polygons of hull vertex coordinates.
+
+        Face vertices are matched to the nearest hull vertex, since face coordinates may be rounded.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        outermost = np.asarray(outermost, dtype=np.int64)
+        faces = [np.asarray(face, dtype=np.float64).reshape(-1, 3) for face in faces]
+        face_indices = np.empty(0, dtype=np.int64)
+        if faces and len(outermost):
+            _, nearest = cKDTree(points[outermost]).query(np.concatenate(faces))
+            face_indices = outermost[nearest]
+        return cls(points, outermost, inner, anomaly_points, [len(face) for face in faces], face_indices)
+
+    @classmethod
+    def from_dict(cls, frame):
+        """
+        Convert a frame dict (NumPy arrays or nested lists, e.g. decoded JSON) to a FrameResult.
+        """
+        if isinstance(frame, cls):
+            return frame
+        points = np.asarray(frame["all_points"], dtype=np.float64).reshape(-1, 3)
+        hull = np.asarray(frame["outermost_points"], dtype=np.float64).reshape(-1, 3)
+        outermost = np.empty(0, dtype=np.int64)
+        inner = np.ones(len(points), dtype=bool)
+        if len(hull) and len(points):
+            # Hull vertices are points of the frame; every copy of a vertex counts as outermost
+            distances, _ = cKDTree(hull).query(points)
+            inner = distances != 0
+            _, outermost = cKDTree(points).query(hull)
+        result = cls.from_faces(points, outermost, inner, frame["anomaly_points"], frame["faces"])
+        extra = {key: value for key, value in frame.items() if key not in _KEYS}
+        result.extra = extra or None
+        return result
+
+    def __getitem__(self, key):
+        if key == "all_points":
+            return self.points
+        if key == "inner_points":
+            return self.points[self.inner]
+        if key == "outermost_points":
+            return self.points[self.outermost]
+        if key == "anomaly_points":
+            return self.anomaly_points
+        if key == "faces":
+            return np.split(self.points[self.face_indices], np.cumsum(self.face_sizes)[:-1]) if len(self.face_sizes) else []
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in _KEYS or (self.extra is not None and key in self.extra)
+
+    def to_dict(self):
+        """
+        The frame as a dict of NumPy arrays, in the shape returned by the JSON endpoints.
+        """
+        frame = {key: self[key] for key in _KEYS}
+        if self.extra:
+            frame.update(self.extra)
+        return frame
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (
+            self.points, self.outermost, self.inner, self.anomaly_points, self.face_sizes, self.face_indices
+        ))
+
+    def to_bytes(self):
+        """
+        Serialize the frame to the binary layout described at the top of this module.
+        """
+        header = {
+            "points": len(self.points), "hull": len(self.outermost), "anomalies": len(self.anomaly_points),
+            "faces": len(self.face_sizes), "face_vertices": len(self.face_indices),
+        }
+        if self.extra:
+            header["extra"] = self.extra
+        # Extra entries may hold NumPy arrays
+        header = json.dumps(header, separators=(",", ":"), default=lambda obj: obj.tolist()).encode("utf-8")
+        return b"".join([
+            MAGIC, struct.pack("<I", len(header)), header,
+            self.points.astype("<f4").tobytes(),
+            self.outermost.astype("<u4").tobytes(),
+            np.packbits(self.inner, bitorder="little").tobytes(),
+            self.anomaly_points.astype("<f4").tobytes(),
+            self.face_sizes.astype("<u4").tobytes(),
+            self.face_indices.astype("<u4").tobytes(),
+        ])
+
+    @classmethod
+    def from_bytes(cls, payload):
+        """
+        Deserialize a frame written by `to_bytes`; the arrays are copied out of `payload`.
+        """
+        if payload[:4] != MAGIC:
+            raise ValueError("Not a frame payload")
+        (header_length,) = struct.unpack_from("<I", payload, 4)
+        header = json.loads(payload[8:8 + header_length])
+        offset = 8 + header_length
+
+        def read(dtype, count):
+            nonlocal offset
+            if count == 0:
+                return np.empty(0, dtype=dtype)
+            array = np.frombuffer(payload, dtype=dtype, count=count, offset=offset).copy()
+            offset += array.nbytes
+            return array
+
+        n = header["points"]
+        points = read("<f4", 3 * n)
+        outermost = read("<u4", header["hull"])
+        inner = np.unpackbits(read("u1", (n + 7) // 8), count=n, bitorder="little").astype(bool)
+        anomaly_points = read("<f4", 3 * header["anomalies"])
+        face_sizes = read("<u4", header["faces"])
+        face_indices = read("<u4", header["face_vertices"])
+        return cls(points, outermost, inner, anomaly_points, face_sizes, face_indices, header.get("extra"))
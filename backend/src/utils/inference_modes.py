@@ -0,0 +1,170 @@
+import copy
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+# Inference modes accepted by `optimize_depth_model`
+#   - fp32:  plain eager execution (the reference path)
+#   - fused: conv+BN fusion, channels-last memory format, TorchScript tracing and freezing
+#   - int8:  `fused` plus static int8 quantization (FX graph mode, calibrated on sample inputs)
+INFERENCE_MODES = ("fp32", "fused", "int8")
+
+# Size (height, width) of the network input used by `estimate_disparity`
+INPUT_SIZE = (192, 640)
+
+
+class _FinestDisparity(nn.Module):
+    """Depth decoder that only returns the full-resolution disparity, so unused scales can be pruned."""
+    def __init__(self, depth_decoder):
+        super().__init__()
+        self.depth_decoder = depth_decoder
+
+    def forward(self, features):
+        return self.depth_decoder(features)[("disp", 0)]
+
+
+class _ChannelsLast(nn.Module):
+    """Converts the input to channels-last memory format before running the wrapped module."""
+    def __init__(self, module):
+        super().__init__()
+        self.module = module
+
+    def forward(self, x):
+        return self.module(x.contiguous(memory_format=torch.channels_last))
+
+
+class _DisparityOutput(nn.Module):
+    """Restores the `{("disp", 0): tensor}` output of `DepthDecoder` around an optimized decoder."""
+    def __init__(self, decoder):
+        super().__init__()
+        self.decoder = decoder
+
+    def forward(self, features):
+        return {("disp", 0): self.decoder(list(features))}
+
+
+def _calibration_batch(calibration_inputs, num_samples=8):
+    if calibration_inputs is not None:
+        return [x for x in calibration_inputs]
+    # Without real frames, calibrate on smooth random images in the [0, 1] input range
+    generator = torch.Generator().manual_seed(0)
+    low_res = [torch.rand(1, 3, INPUT_SIZE[0] // 8, INPUT_SIZE[1] // 8, generator=generator) for _ in range(num_samples)]
+    return [torch.nn.functional.interpolate(x, INPUT_SIZE, mode="bilinear", align_corners=False) for x in low_res]
+
+
+def _quantize_int8(encoder, decoder, calibration):
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+    qconfig_mapping = get_default_qconfig_mapping("fbgemm")
+    example = calibration[0]
+    example_features = encoder(example)
+
+    prepared_encoder = prepare_fx(encoder, qconfig_mapping, (example,))
+    prepared_decoder = prepare_fx(decoder, qconfig_mapping, (example_features,))
+
+    # Observe activation ranges on the calibration inputs
+    with torch.no_grad():
+        for x in calibration:
+            prepared_decoder(prepared_encoder(x))
+
+    return convert_fx(prepared_encoder), convert_fx(prepared_decoder)
+
+
+def optimize_depth_model(encoder, depth_decoder, mode="fused", calibration_inputs=None):
+    """
+    Build an optimized CPU inference version of a Monodepth2 encoder/decoder pair.
+
+    The returned modules keep the call convention of the originals: the encoder returns the list
+    of features and the decoder returns a dict holding `("disp", 0)`. The other disparity scales are
+    not needed for inference and are pruned when the graph is frozen.
+
+    Args:
+    - encoder: The trained `ResnetEncoder`, in eval mode.
+    - depth_decoder: The trained `DepthDecoder`, in eval mode.
+    - mode: One of `INFERENCE_MODES`.
+    - calibration_inputs: Optional list of (1, 3, 192, 640) tensors used to calibrate int8 quantization.
+
+    Returns:
+    - Tuple (encoder, depth_decoder) to use in place of the originals.
+    """
+    if mode not in INFERENCE_MODES:
+        raise ValueError("{} is not a valid inference mode, expected one of {}".format(mode, INFERENCE_MODES))
+    if mode == "fp32":
+        return encoder, depth_decoder
+
+    from torch.fx.experimental.optimization import fuse
+
+    encoder = copy.deepcopy(encoder).eval()
+    decoder = _FinestDisparity(copy.deepcopy(depth_decoder)).eval()
+
+    # Fold every BatchNorm into the preceding convolution
+    encoder = fuse(encoder)
+
+    calibration = _calibration_batch(calibration_inputs)
+    if mode == "int8":
+        encoder, decoder = _quantize_int8(encoder, decoder, calibration)
+    else:
+        encoder = _ChannelsLast(encoder.to(memory_format=torch.channels_last))
+        decoder = decoder.to(memory_format=torch.channels_last)
+
+    # Trace and freeze both halves so TorchScript can constant-fold weights and drop dead outputs
+    example = calibration[0]
+    with torch.no_grad():
+        traced_encoder = torch.jit.trace(encoder, example, check_trace=False)
+        example_features = list(traced_encoder(example))
+        traced_decoder = torch.jit.trace(decoder, (example_features,), check_trace=False)
+
+    frozen_encoder = torch.jit.optimize_for_inference(torch.jit.freeze(traced_encoder.eval()))
+    frozen_decoder = torch.jit.optimize_for_inference(torch.jit.freeze(traced_decoder.eval()))
+
+    return frozen_encoder, _DisparityOutput(frozen_decoder).eval()
+
+
+def disparity_delta(reference, candidate, inputs):
+    """
+    Measure how far an optimized model pair drifts from the reference pair.
+
+    Args:
+    - reference: Tuple (encoder, depth_decoder) of the fp32 reference models.
+    - candidate: Tuple (encoder, depth_decoder) of the models to check.
+    - inputs: List of (1, 3, 192, 640) input tensors.
+
+    Returns:
+    - Dict with the maximum and mean absolute disparity difference over all inputs.
+    """
+    max_abs, total_abs, count = 0.0, 0.0, 0
+    with torch.no_grad():
+        for x in inputs:
+            expected = reference[1](reference[0](x))[("disp", 0)]
+            actual = candidate[1](candidate[0](x))[("disp", 0)]
+            diff = (expected - actual).abs()
+            max_abs = max(max_abs, diff.max().item())
+            total_abs += diff.sum().item()
+            count += diff.numel()
+
+    return {"max_abs_diff": max_abs, "mean_abs_diff": total_abs / max(count, 1)}
+
+
+def measure_throughput(models, inputs, warmup=2, repeat=5):
+    """
+    Measure inference throughput of an (encoder, depth_decoder) pair.
+
+    Returns:
+    - Dict with the median seconds per frame and the corresponding frames per second.
+    """
+    encoder, depth_decoder = models
+    timings = []
+    with torch.no_grad():
+        for _ in range(warmup):
+            depth_decoder(encoder(inputs[0]))
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for x in inputs:
+                depth_decoder(encoder(x))
+            timings.append((time.perf_counter() - start) / len(inputs))
+
+    seconds_per_frame = float(np.median(timings))
+    return {"seconds_per_frame": seconds_per_frame, "frames_per_second": 1.0 / seconds_per_frame}
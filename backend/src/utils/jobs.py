@@ -0,0 +1,344 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+
+from starlette.concurrency import run_in_threadpool
+
+from backend.src.utils import metrics, profiling
+
+# Process pool running the CPU-bound work (generation, convex hull, face merging, DBSCAN) away from
+# the event loop. It is created on first use so importing this module never starts processes.
+# A worker dying (e.g. killed for running out of memory) breaks the whole pool, which is then
+# replaced by a new one instead of failing every later call.
+_executor = None
+_executor_workers = None
+_executor_broken = False
+_executor_restarts = 0
+_executor_lock = threading.Lock()
+
+
+class Overloaded(Exception):
+    """Raised when a heavy job cannot be admitted because the queue is full."""
+    def __init__(self, retry_after):
+        super().__init__("Server is busy, retry in {} seconds".format(retry_after))
+        self.retry_after = retry_after
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client of a request went away before its response was ready."""
+
+
+def configure_executor(max_workers):
+    """
+    Set the number of worker processes used by the pool created on first use.
+    """
+    global _executor_workers
+    _executor_workers = max_workers
+
+
+def get_executor():
+    """
+    Return the shared process pool, creating it on first use and replacing it once it is broken.
+    """
+    global _executor, _executor_broken, _executor_restarts
+    with _executor_lock:
+        if _executor is not None and _executor_broken:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+            _executor_restarts += 1
+            metrics.count("pool_restarts")
+        if _executor is None:
+            # Spawned workers start clean instead of inheriting the server's threads and locks
+            _executor = ProcessPoolExecutor(max_workers=_executor_workers, mp_context=multiprocessing.get_context("spawn"))
+            _executor_broken = False
+        return _executor
+
+
+def _mark_broken(executor):
+    global _executor_broken
+    with _executor_lock:
+        if executor is _executor:
+            _executor_broken = True
+
+
+def _watch_broken(executor, future):
+    # The calls of a broken pool fail with BrokenProcessPool; the next call then gets a new pool
+    if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+        _mark_broken(executor)
+
+
+def recover_executor():
+    """
+    Replace the shared process pool if it is broken, without waiting for the next call to do it.
+    """
+    if _executor_broken:
+        get_executor()
+
+
+def executor_status():
+    """
+    State of the shared process pool: "idle" (not created yet), "running" or "broken", its number
+    of workers and how many times it was replaced after breaking.
+    """
+    state = "idle" if _executor is None else "broken" if _executor_broken else "running"
+    return {"state": state, "workers": _executor_workers, "restarts": _executor_restarts}
+
+
+def shutdown_executor():
+    """
+    Stop the shared process pool, cancelling the tasks that have not started yet.
+    """
+    global _executor, _executor_broken
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+            _executor_broken = False
+
+
+def _with_profiling(function, args):
+    # Profiled requests run their pool tasks under cProfile in the worker
+    profile_id = profiling.current_profile_id()
+    if profile_id is None:
+        return function, args
+    return profiling.profiled, (profile_id, function) + args
+
+
+def _submit(function, args):
+    # With metrics enabled, the result of the pool future also carries the worker's stage timings
+    function, args = _with_profiling(function, args)
+    if metrics.ENABLED:
+        function, args = metrics.collected, (function,) + args
+    executor = get_executor()
+    try:
+        future = executor.submit(function, *args)
+    except BrokenProcessPool:
+        # The pool broke since the last call; submit once more to its replacement
+        _mark_broken(executor)
+        executor = get_executor()
+        future = executor.submit(function, *args)
+    future.add_done_callback(functools.partial(_watch_broken, executor))
+    return future
+
+
+def _collected(result):
+    # Merge the stage timings and counters recorded in the worker into the server's metrics
+    if not metrics.ENABLED:
+        return result
+    result, spans, counts = result
+    metrics.merge(spans, counts)
+    return result
+
+
+async def run_in_thread(function, *args):
+    """
+    Run a blocking `function(*args)` in Starlette's thread pool, under cProfile if the request is profiled.
+    """
+    return await run_in_threadpool(profiling.maybe_profiled, function, *args)
+
+
+async def run_cpu(function, *args):
+    """
+    Run `function(*args)` in the process pool and wait for its result without blocking the event loop.
+
+    Stage timings and counters recorded in the worker are merged into the server's metrics.
+    """
+    return _collected(await asyncio.wrap_future(_submit(function, args)))
+
+
+def call_cpu(function, *args):
+    """
+    Blocking variant of `run_cpu`, for code running in a thread rather than on the event loop.
+    """
+    return _collected(_submit(function, args).result())
+
+
+async def map_cpu(function, *iterables):
+    """
+    Run `function` over the zipped iterables in the process pool; results keep the input order.
+    """
+    return await asyncio.gather(*(run_cpu(function, *args) for args in zip(*iterables)))
+
+
+def _timeout(deadline):
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+async def _finish(future):
+    return _collected(await future)
+
+
+def _retrieve(task):
+    # Results of calls left running may never be awaited; reading their outcome silences the warning
+    if not task.cancelled():
+        task.exception()
+
+
+async def map_cpu_until(deadline, function, *iterables, wait_first=False):
+    """
+    Variant of `map_cpu` that stops waiting at `deadline` (a `time.monotonic()` value; None waits
+    for every result).
+
+    With a deadline, calls are handed to the pool one per worker, in input order, as workers free
+    up: the pool cannot withdraw a call once a worker has it, so this leaves at most one call per
+    worker running past the deadline. Those calls are left to finish: their entry is a task to
+    await later (e.g. when the request is continued) instead of a result. The calls not submitted
+    by the deadline are never run. With `wait_first`, the first call is waited for past the
+    deadline, so that a caller returning results in order always makes progress.
+
+    Returns:
+    - One entry per call, in input order: its result, a task for a call still running, or None
+      for a call that never ran.
+    """
+    if deadline is None:
+        return await map_cpu(function, *iterables)
+
+    calls = list(zip(*iterables))
+    results = [None] * len(calls)
+    window = _executor_workers or os.cpu_count() or 1
+    pending = {}    # asyncio future -> (pool future, index)
+    submitted = 0
+    try:
+        while submitted < len(calls) or pending:
+            if _timeout(deadline) == 0:
+                if wait_first and submitted == 0:
+                    # The deadline passed before anything was submitted; the first call runs anyway
+                    pool_future = _submit(function, calls[0])
+                    pending[asyncio.wrap_future(pool_future)] = (pool_future, 0)
+                    submitted = 1
+                first = [future for future, (_, index) in pending.items() if index == 0]
+                if not (wait_first and first):
+                    break
+                done, _ = await asyncio.wait(first)
+            else:
+                while submitted < len(calls) and len(pending) < window:
+                    pool_future = _submit(function, calls[submitted])
+                    pending[asyncio.wrap_future(pool_future)] = (pool_future, submitted)
+                    submitted += 1
+                done, _ = await asyncio.wait(pending, timeout=_timeout(deadline), return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                _, index = pending.pop(future)
+                results[index] = _collected(future.result())
+    except BaseException:
+        for future in pending:
+            future.cancel()
+        raise
+
+    for future, (pool_future, index) in pending.items():
+        if future.done():
+            results[index] = _collected(future.result())
+        elif not pool_future.cancel():
+            task = asyncio.ensure_future(_finish(future))
+            task.add_done_callback(_retrieve)
+            results[index] = task
+    return results
+
+
+async def wait_until(deadline, futures):
+    """
+    Wait for `futures` until `deadline` (a `time.monotonic()` value; None waits for all of them),
+    without cancelling the ones that are not done.
+    """
+    if futures:
+        await asyncio.wait(futures, timeout=_timeout(deadline))
+
+
+class DisconnectWatch:
+    """
+    Polls whether the client of a request is still connected while the request is being worked on.
+
+    Used as an async context manager around the work; `on_disconnect()` is called once when the
+    client goes away (e.g. to cancel the work or stop a pipeline), and `disconnected` tells
+    afterwards whether that happened.
+
+    Args:
+    - request: The Starlette request; its body must have been read already.
+    - on_disconnect: Function called without arguments when the client disconnects.
+    - poll_interval: Seconds between two checks.
+    """
+    def __init__(self, request, on_disconnect, poll_interval=0.25):
+        self.request = request
+        self.on_disconnect = on_disconnect
+        self.poll_interval = poll_interval
+        self.disconnected = False
+        self._watcher = None
+
+    async def _watch(self):
+        while not await self.request.is_disconnected():
+            await asyncio.sleep(self.poll_interval)
+        self.disconnected = True
+        metrics.count("cancelled_requests")
+        self.on_disconnect()
+
+    async def __aenter__(self):
+        self._watcher = asyncio.ensure_future(self._watch())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._watcher.cancel()
+
+
+async def cancel_on_disconnect(request, awaitable):
+    """
+    Await `awaitable`, cancelling it as soon as the client of `request` disconnects.
+
+    Cancellation reaches the pool calls it awaits: the queued ones are withdrawn, so the remaining
+    frames of an abandoned request are not computed.
+
+    Raises:
+    - ClientDisconnected: The client went away before the result was ready.
+    """
+    task = asyncio.ensure_future(awaitable)
+    async with DisconnectWatch(request, task.cancel) as watch:
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if watch.disconnected:
+                raise ClientDisconnected() from None
+            raise
+
+
+class AdmissionController:
+    """
+    Caps the number of heavy jobs running at once and the number waiting for a slot.
+
+    Up to `max_in_flight` jobs run concurrently and up to `max_queued` more wait in line; beyond
+    that, `admit()` raises `Overloaded` immediately so the server can answer 429 instead of letting
+    latency grow without bound.
+
+    Args:
+    - max_in_flight: Maximum number of heavy jobs running at the same time.
+    - max_queued: Maximum number of heavy jobs waiting for a slot.
+    - retry_after: Seconds suggested to rejected clients in the Retry-After header.
+    """
+    def __init__(self, max_in_flight, max_queued, retry_after=5):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.queued = 0
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+    @asynccontextmanager
+    async def admit(self):
+        if self._semaphore.locked() and self.queued >= self.max_queued:
+            raise Overloaded(self.retry_after)
+
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
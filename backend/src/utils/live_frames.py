@@ -0,0 +1,198 @@
+import threading
+from collections import deque
+
+import numpy as np
+from scipy.spatial import ConvexHull, QhullError
+
+from backend.src.features.faces import Faces
+from backend.src.features.ads_techniques import detect_anomalies
+from backend.src.utils.frame_result import FrameResult
+from backend.src.utils.metrics import span, count
+
+# Live frames: frames whose points are appended over time (live feeds). The convex hull is kept in
+# an incremental Qhull, so an update only inserts the new points instead of rebuilding the hull.
+#
+# Points keep the index they were appended at. Every update gets a version; clients ask for the
+# changes since the version they have and receive the new points, the hull vertices that appeared
+# or disappeared (by point index; a point is an inner point when it is not a hull vertex) and the
+# faces that changed. Faces are the coplanar groups of hull triangles merged into polygons (as in
+# `calculate_data`); a face is identified by its plane, and only the faces whose triangles changed
+# are simplified again.
+
+# Decimals of the plane equations grouping hull triangles into faces
+_PLANE_DECIMALS = 10
+
+
+class LiveFrame:
+    """
+    Append-only frame with an incrementally updated convex hull and a history of versioned changes.
+
+    The hull exists once the frame has 4 points that are not coplanar; until then updates only add
+    points.
+
+    Args:
+    - history: Number of updates kept to answer `changes_since`; older clients get a full snapshot.
+    """
+    def __init__(self, history=256):
+        self.points = np.empty((0, 3))
+        self.hull = None
+        self.version = 0
+        self.vertices = np.empty(0, dtype=np.int64)
+        self.faces = {}             # face id -> list of polygons
+        self._face_ids = {}         # plane key -> face id
+        self._face_triangles = {}   # face id -> frozenset of sorted triangle index triples
+        self._next_face_id = 0
+        self._history = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def add_points(self, points):
+        """
+        Append points to the frame and update its hull.
+
+        Returns:
+        - The version after the update.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        with self._lock:
+            start = len(self.points)
+            first_face_id = self._next_face_id
+            count("points", len(points))
+            with span("convex_hull"):
+                if self.hull is not None:
+                    self.hull.add_points(points)
+                else:
+                    self.points = np.concatenate([self.points, points])
+                    try:
+                        self.hull = ConvexHull(self.points, incremental=True)
+                    except QhullError:
+                        # Too few points, or all coplanar: the hull waits for more points
+                        pass
+            if self.hull is None:
+                added = removed = np.empty(0, dtype=np.int64)
+                changed_faces, removed_faces = {}, []
+            else:
+                self.points = self.hull.points
+                added, removed = self._update_vertices()
+                with span("faces_simplify"):
+                    changed_faces, removed_faces = self._update_faces()
+
+            self.version += 1
+            self._history.append((self.version, start, first_face_id, added, removed, changed_faces, removed_faces))
+            return self.version
+
+    def _update_vertices(self):
+        vertices = np.asarray(self.hull.vertices, dtype=np.int64)
+        added = np.setdiff1d(vertices, self.vertices, assume_unique=True)
+        removed = np.setdiff1d(self.vertices, vertices, assume_unique=True)
+        self.vertices = vertices
+        return added, removed
+
+    def _update_faces(self):
+        """
+        Regroup the hull triangles by plane and simplify the faces whose triangles changed.
+
+        Returns:
+        - Tuple (changed, removed): polygons of the new or changed faces by id, and the removed face ids.
+        """
+        triangles = np.sort(self.hull.simplices, axis=1)
+        planes, plane_of = np.unique(np.round(self.hull.equations, _PLANE_DECIMALS), axis=0, return_inverse=True)
+        plane_of = plane_of.reshape(-1)
+        groups = {}
+        for plane, triangle in zip(plane_of.tolist(), map(tuple, triangles.tolist())):
+            groups.setdefault(plane, []).append(triangle)
+
+        face_triangles = {}
+        changed = {}
+        for plane, group in groups.items():
+            key = planes[plane].tobytes()
+            if key not in self._face_ids:
+                self._face_ids[key] = self._next_face_id
+                self._next_face_id += 1
+            face_id = self._face_ids[key]
+            group = frozenset(group)
+            face_triangles[face_id] = group
+            if self._face_triangles.get(face_id) != group:
+                changed[face_id] = Faces([self.points[list(triangle)] for triangle in group]).simplify()
+
+        removed = [face_id for face_id in self._face_triangles if face_id not in face_triangles]
+        for face_id in removed:
+            del self.faces[face_id]
+        self._face_ids = {key: face_id for key, face_id in self._face_ids.items() if face_id in face_triangles}
+        self._face_triangles = face_triangles
+        self.faces.update(changed)
+        return changed, removed
+
+    def changes_since(self, version=None):
+        """
+        Changes of the frame since `version`, to bring a client holding that version up to date.
+
+        A client without a version (None), with an unknown one, or one older than the kept history,
+        receives a full snapshot (`reset` is true).
+
+        Returns:
+        - Dict with the current `version`, `reset`, the index `start` of the first new point, the new
+          `points`, the `added_vertices` and `removed_vertices` (point indices), the new or changed
+          `faces` (list of {"id", "polygons"}) and the `removed_faces` ids.
+        """
+        with self._lock:
+            history = [entry for entry in self._history if version is not None and entry[0] > version]
+            reset = (
+                version is None or version > self.version or version < 0
+                or (version < self.version and history[0][0] != version + 1)
+            )
+            if reset:
+                start = 0
+                added, removed = self.vertices, np.empty(0, dtype=np.int64)
+                changed, removed_faces = dict(self.faces), []
+            else:
+                start = history[0][1] if history else len(self.points)
+                # Faces are never given an id twice, so the faces the client has are those below this one
+                known_faces = history[0][2] if history else self._next_face_id
+                added, removed, changed, removed_faces = set(), set(), {}, set()
+                for _, _, _, entry_added, entry_removed, entry_changed, entry_removed_faces in history:
+                    # A vertex removed after being added cancels out, and the other way around
+                    for vertex in entry_added.tolist():
+                        if vertex in removed:
+                            removed.discard(vertex)
+                        else:
+                            added.add(vertex)
+                    for vertex in entry_removed.tolist():
+                        if vertex in added:
+                            added.discard(vertex)
+                        else:
+                            removed.add(vertex)
+                    for face_id in entry_removed_faces:
+                        changed.pop(face_id, None)
+                        if face_id < known_faces:
+                            removed_faces.add(face_id)
+                    for face_id, polygons in entry_changed.items():
+                        changed[face_id] = polygons
+                        removed_faces.discard(face_id)
+                added = np.array(sorted(added), dtype=np.int64)
+                removed = np.array(sorted(removed), dtype=np.int64)
+                removed_faces = sorted(removed_faces)
+
+            return {
+                "version": self.version,
+                "reset": reset,
+                "start": start,
+                "points": self.points[start:],
+                "added_vertices": added,
+                "removed_vertices": removed,
+                "faces": [{"id": face_id, "polygons": polygons} for face_id, polygons in sorted(changed.items())],
+                "removed_faces": removed_faces,
+            }
+
+    def frame(self):
+        """
+        The current frame as a `FrameResult`, like the frames returned by `calculate_data`.
+        """
+        with self._lock:
+            points = self.points
+            vertices = self.vertices
+            inner = np.ones(len(points), dtype=bool)
+            inner[vertices] = False
+            faces = [polygon for polygons in self.faces.values() for polygon in polygons]
+        with span("detect_anomalies"):
+            anomaly_points = detect_anomalies(points) if len(points) else np.empty((0, 3))
+        return FrameResult.from_faces(points, vertices, inner, anomaly_points, faces)
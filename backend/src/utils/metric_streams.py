@@ -0,0 +1,123 @@
+import threading
+
+import numpy as np
+from sklearn.decomposition import IncrementalPCA
+
+from backend.src.utils.metrics import span, count
+
+# Online counterpart of the ready datasets, which are 3-D projections of server machine metrics
+# computed offline. Raw rows of multivariate metrics are standardized with running statistics and
+# projected to 3-D by a projection updated once per mini-batch; after every batch, the rows of a
+# sliding window are projected with the current projection and emitted as the points of a frame.
+#
+# The work per row is bounded by the batch and window sizes, whatever the number of rows ingested:
+# the statistics and IncrementalPCA are updated from the batch alone, and only the window is kept.
+
+
+class MetricStream:
+    """
+    Sliding window of raw metric rows, projected to 3-D by a projection updated in mini-batches.
+
+    Args:
+    - num_features: Number of metrics in a row (at least 3).
+    - window: Number of most recent rows shown by a frame.
+    - batch_size: Rows per projection update (at least 4, the fewest points with a 3-D hull); a
+      frame is emitted after every batch.
+    - method: "pca" for an IncrementalPCA updated with every batch, or "random" for a fixed Gaussian
+      random projection (only the standardization is updated).
+    - seed: Seed of the random projection.
+    """
+    def __init__(self, num_features, window=500, batch_size=50, method="pca", seed=0):
+        if num_features < 3 or batch_size < 4 or window < 4:
+            raise ValueError("num_features must be at least 3, batch_size and window at least 4")
+        if method not in ("pca", "random"):
+            raise ValueError("Unknown projection method: {}".format(method))
+        self.num_features = num_features
+        self.window = window
+        self.batch_size = batch_size
+        self.method = method
+        self.rows = 0
+        self._window = np.zeros((window, num_features))
+        self._batch = np.zeros((batch_size, num_features))
+        self._batch_rows = 0
+        # Running mean and sum of squared deviations, merged batch by batch (Chan et al.)
+        self._seen = 0
+        self._mean = np.zeros(num_features)
+        self._m2 = np.zeros(num_features)
+        self._pca = IncrementalPCA(n_components=3) if method == "pca" else None
+        self._components = None
+        if method == "random":
+            self._components = np.random.default_rng(seed).normal(size=(3, num_features)) / np.sqrt(3)
+        self._lock = threading.Lock()
+
+    def ingest(self, rows):
+        """
+        Add rows to the stream. Rows are validated before any of them is added, so rejected rows
+        leave the stream unchanged.
+
+        Returns:
+        - The points of the frames completed by these rows: one (N, 3) array per completed batch,
+          N being the number of rows in the window.
+        """
+        if len(rows) == 0:
+            return []
+        rows = np.asarray(rows, dtype=np.float64)
+        if rows.ndim != 2 or rows.shape[1] != self.num_features:
+            raise ValueError("Rows must have {} values".format(self.num_features))
+        if not np.isfinite(rows).all():
+            raise ValueError("Rows must hold finite values")
+        frames = []
+        with self._lock:
+            count("metric_rows", len(rows))
+            position = 0
+            while position < len(rows):
+                block = rows[position:position + self.batch_size - self._batch_rows]
+                self._batch[self._batch_rows:self._batch_rows + len(block)] = block
+                self._window[(self.rows + np.arange(len(block))) % self.window] = block
+                self._batch_rows += len(block)
+                self.rows += len(block)
+                position += len(block)
+                if self._batch_rows == self.batch_size:
+                    with span("projection"):
+                        self._update(self._batch)
+                        frames.append(self._project(self._rows_in_window()))
+                    self._batch_rows = 0
+        return frames
+
+    def _update(self, batch):
+        # Merge the batch into the running statistics
+        batch_mean = batch.mean(axis=0)
+        delta = batch_mean - self._mean
+        seen = self._seen + len(batch)
+        self._m2 += ((batch - batch_mean) ** 2).sum(axis=0) + delta ** 2 * self._seen * len(batch) / seen
+        self._mean += delta * len(batch) / seen
+        self._seen = seen
+        if self._pca is None:
+            return
+
+        # Constant metrics have no variance to explain; the ratio IncrementalPCA reports is then 0/0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self._pca.partial_fit(self._standardize(batch))
+        components = self._pca.components_.copy()
+        if self._components is not None:
+            # Principal axes are defined up to their sign; keep the previous orientation so frames do not flip
+            components[np.sum(components * self._components, axis=1) < 0] *= -1
+        self._components = components
+
+    def _standardize(self, rows):
+        scale = np.sqrt(self._m2 / max(self._seen, 1))
+        scale[scale == 0] = 1.0
+        return (rows - self._mean) / scale
+
+    def _rows_in_window(self):
+        # Oldest row first
+        if self.rows <= self.window:
+            return self._window[:self.rows]
+        start = self.rows % self.window
+        return np.concatenate([self._window[start:], self._window[:start]])
+
+    def _project(self, rows):
+        standardized = self._standardize(rows)
+        if self._pca is not None:
+            standardized = standardized - self._pca.mean_
+        return standardized @ self._components.T
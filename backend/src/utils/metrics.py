@@ -0,0 +1,234 @@
+import contextvars
+import threading
+import time
+from collections import defaultdict
+
+from backend.src.utils import config
+
+# Lightweight instrumentation: stage timers and counters aggregated per endpoint and rendered in the
+# Prometheus text format. With MESH_METRICS=0 every call below returns immediately.
+ENABLED = config.METRICS_ENABLED
+
+# Upper bounds (seconds) of the histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Endpoint the current request is attributed to, and the collector used inside pool workers
+_endpoint = contextvars.ContextVar("mesh_metrics_endpoint", default="")
+_collector = contextvars.ContextVar("mesh_metrics_collector", default=None)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "total", "count")
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[index] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class _Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = defaultdict(_Histogram)  # (metric, labels) -> histogram
+        self.counters = defaultdict(float)  # (metric, labels) -> value
+        self.gauges = {}  # metric -> (help, function returning {labels: value})
+
+    def observe(self, metric, labels, value):
+        with self.lock:
+            self.histograms[(metric, labels)].observe(value)
+
+    def inc(self, metric, labels, value):
+        with self.lock:
+            self.counters[(metric, labels)] += value
+
+
+_registry = _Registry()
+
+_HELP = {
+    "mesh_stage_seconds": ("histogram", "Time spent in each processing stage."),
+    "mesh_request_seconds": ("histogram", "End-to-end request latency."),
+    "mesh_requests_total": ("counter", "Number of requests by status code."),
+    "mesh_frames_total": ("counter", "Number of frames analysed."),
+    "mesh_points_total": ("counter", "Number of points analysed."),
+    "mesh_response_bytes_total": ("counter", "Number of response body bytes sent."),
+    "mesh_pool_restarts_total": ("counter", "Number of times the process pool was replaced after a worker died."),
+    "mesh_cancelled_requests_total": ("counter", "Number of requests cancelled because their client disconnected."),
+    "mesh_partial_responses_total": ("counter", "Number of responses cut short by their deadline."),
+}
+
+
+class _Collector:
+    """Buffers stage timings and counters recorded in a pool worker until they are sent back."""
+    __slots__ = ("spans", "counts")
+
+    def __init__(self):
+        self.spans = []
+        self.counts = []
+
+
+def _record_span(stage, seconds):
+    collector = _collector.get()
+    if collector is not None:
+        collector.spans.append((stage, seconds))
+    else:
+        _registry.observe("mesh_stage_seconds", (("endpoint", _endpoint.get()), ("stage", stage)), seconds)
+
+
+class _Span:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record_span(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(stage):
+    """
+    Context manager timing a processing stage of the current request.
+
+    Usage:
+        with span("convex_hull"):
+            hull = ConvexHull(points)
+    """
+    return _Span(stage) if ENABLED else _NULL_SPAN
+
+
+def count(name, value=1):
+    """
+    Add `value` to the counter `mesh_<name>_total` of the current endpoint.
+    """
+    if not ENABLED:
+        return
+    collector = _collector.get()
+    if collector is not None:
+        collector.counts.append((name, value))
+    else:
+        _registry.inc("mesh_{}_total".format(name), (("endpoint", _endpoint.get()),), value)
+
+
+def set_endpoint(endpoint):
+    """
+    Attribute everything recorded in the current context to `endpoint`; returns a reset token.
+    """
+    return _endpoint.set(endpoint)
+
+
+def reset_endpoint(token):
+    _endpoint.reset(token)
+
+
+def observe_request(endpoint, status_code, seconds):
+    if not ENABLED:
+        return
+    _registry.observe("mesh_request_seconds", (("endpoint", endpoint),), seconds)
+    _registry.inc("mesh_requests_total", (("endpoint", endpoint), ("status", str(status_code))), 1)
+
+
+def collected(function, *args):
+    """
+    Run `function(*args)` while buffering its metrics; meant to be executed in a pool worker.
+
+    Returns:
+    - Tuple (result, spans, counts) to pass to `merge` in the server process.
+    """
+    collector = _Collector()
+    token = _collector.set(collector)
+    try:
+        result = function(*args)
+    finally:
+        _collector.reset(token)
+    return result, collector.spans, collector.counts
+
+
+def merge(spans, counts):
+    """
+    Record the metrics buffered by `collected` under the current endpoint.
+    """
+    for stage, seconds in spans:
+        _record_span(stage, seconds)
+    for name, value in counts:
+        count(name, value)
+
+
+def register_gauge(metric, help_text, function):
+    """
+    Register a gauge whose values are read from `function()` at scrape time.
+
+    `function` returns a dict mapping a tuple of (label, value) pairs to the gauge value.
+    """
+    _registry.gauges[metric] = (help_text, function)
+
+
+def _format_labels(labels, extra=()):
+    pairs = tuple(labels) + tuple(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(key, str(value).replace('"', '\\"')) for key, value in pairs) + "}"
+
+
+def render():
+    """
+    Render every metric in the Prometheus text exposition format.
+    """
+    with _registry.lock:
+        histograms = {key: (list(h.buckets), h.total, h.count) for key, h in _registry.histograms.items()}
+        counters = dict(_registry.counters)
+
+    lines = []
+    for metric, (kind, help_text) in _HELP.items():
+        if kind == "histogram":
+            series = sorted((labels, values) for (name, labels), values in histograms.items() if name == metric)
+        else:
+            series = sorted((labels, value) for (name, labels), value in counters.items() if name == metric)
+        if not series:
+            continue
+        lines.append("# HELP {} {}".format(metric, help_text))
+        lines.append("# TYPE {} {}".format(metric, kind))
+        for labels, values in series:
+            if kind == "histogram":
+                buckets, total, observations = values
+                cumulative = 0
+                for bound, bucket in zip(BUCKETS, buckets):
+                    cumulative += bucket
+                    lines.append("{}_bucket{} {}".format(metric, _format_labels(labels, (("le", bound),)), cumulative))
+                lines.append("{}_bucket{} {}".format(metric, _format_labels(labels, (("le", "+Inf"),)), observations))
+                lines.append("{}_sum{} {}".format(metric, _format_labels(labels), total))
+                lines.append("{}_count{} {}".format(metric, _format_labels(labels), observations))
+            else:
+                lines.append("{}{} {}".format(metric, _format_labels(labels), values))
+
+    for metric, (help_text, function) in sorted(_registry.gauges.items()):
+        lines.append("# HELP {} {}".format(metric, help_text))
+        lines.append("# TYPE {} gauge".format(metric))
+        for labels, value in sorted(function().items()):
+            lines.append("{}{} {}".format(metric, _format_labels(labels), value))
+
+    return "\n".join(lines) + "\n"
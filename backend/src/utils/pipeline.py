@@ -0,0 +1,202 @@
+import contextvars
+import queue
+import threading
+import time
+
+from backend.src.utils.profiling import maybe_profiled
+
+# Sentinel passed down the queues once a stage has no more items
+_DONE = object()
+
+
+class _Failure:
+    """Wraps an exception raised inside a stage so it can travel down the queues."""
+    def __init__(self, exc):
+        self.exc = exc
+
+
+class StageStats:
+    """
+    Throughput counters for a single pipeline stage.
+
+    Attributes:
+    - name: Name of the stage.
+    - items: Number of items the stage has produced.
+    - busy_seconds: Time spent inside the stage function.
+    - wait_seconds: Time spent blocked on the input or output queue.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    def as_dict(self):
+        return {
+            "stage": self.name,
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 4),
+            "wait_seconds": round(self.wait_seconds, 4),
+            "items_per_second": round(self.items / self.busy_seconds, 3) if self.busy_seconds > 0 else None,
+        }
+
+
+class Pipeline:
+    """
+    A linear pipeline of stages, each running in its own thread and connected by bounded queues.
+
+    The source iterable is consumed by the first thread, every stage function is applied by a
+    dedicated thread, and the results are yielded in order by `run()`. Because every queue is
+    bounded, at most `queue_size` items wait between two stages, so peak memory depends on the
+    queue depth and not on the length of the input.
+
+    Args:
+    - source: Iterable producing the input items (consumed in the source thread).
+    - stages: List of (name, function) tuples applied in order.
+    - queue_size: Maximum number of items waiting between two stages.
+    - source_name: Name reported for the source stage.
+    - extras: Optional mapping of name to an object with `as_dict()`, reported alongside the stage counters.
+    """
+    def __init__(self, source, stages, queue_size=4, source_name="source", extras=None):
+        self.source = source
+        self.extras = dict(extras or {})
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self._stats = [StageStats(source_name)] + [StageStats(name) for name, _ in self.stages]
+        self._stop = threading.Event()
+        self.stopped = False  # True when `stop()` ended the pipeline before its source was exhausted
+        self._started_at = None
+        self._finished_at = None
+
+    def _put(self, q, item, stats):
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        stats.wait_seconds += time.perf_counter() - start
+
+    def _get(self, q, stats):
+        start = time.perf_counter()
+        while True:
+            if self._stop.is_set():
+                item = _DONE
+                break
+            try:
+                item = q.get(timeout=0.1)
+                break
+            except queue.Empty:
+                continue
+        stats.wait_seconds += time.perf_counter() - start
+        return item
+
+    def _run_source(self, out_q, stats):
+        try:
+            iterator = iter(self.source)
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    stats.busy_seconds += time.perf_counter() - start
+                stats.items += 1
+                self._put(out_q, item, stats)
+        except Exception as exc:
+            self._put(out_q, _Failure(exc), stats)
+        self._put(out_q, _DONE, stats)
+
+    def _run_stage(self, function, in_q, out_q, stats):
+        while True:
+            item = self._get(in_q, stats)
+            if item is _DONE or isinstance(item, _Failure):
+                self._put(out_q, item, stats)
+                if item is _DONE:
+                    return
+                continue
+            start = time.perf_counter()
+            try:
+                result = function(item)
+            except Exception as exc:
+                result = _Failure(exc)
+            stats.busy_seconds += time.perf_counter() - start
+            if not isinstance(result, _Failure):
+                stats.items += 1
+            self._put(out_q, result, stats)
+
+    def run(self):
+        """
+        Start the stage threads and yield the output of the last stage in input order.
+
+        Any exception raised in a stage is re-raised here. Closing the generator early, or calling
+        `stop()`, stops every stage thread.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        # Each thread runs in its own copy of the caller's context, so context variables
+        # (e.g. the endpoint metrics are attributed to, or an active profile) are visible inside the stages
+        threads = [threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(maybe_profiled, self._run_source, queues[0], self._stats[0]),
+            daemon=True
+        )]
+        for index, (name, function) in enumerate(self.stages):
+            threads.append(threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(maybe_profiled, self._run_stage, function, queues[index], queues[index + 1], self._stats[index + 1]),
+                name=f"pipeline-{name}",
+                daemon=True
+            ))
+
+        self._started_at = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                try:
+                    item = queues[-1].get(timeout=0.1)
+                except queue.Empty:
+                    # Once stopped, the stages drop their output instead of passing _DONE along
+                    if self._stop.is_set():
+                        break
+                    continue
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.exc
+                yield item
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self._finished_at = time.perf_counter()
+
+    def stop(self):
+        """
+        Stop the pipeline from another thread: no new item enters it, the items a stage is working on
+        are dropped, and `run()` ends after yielding the results already produced.
+        """
+        if self._finished_at is None:
+            self.stopped = True
+        self._stop.set()
+
+    def stats(self):
+        """
+        Return the per-stage throughput report of the pipeline.
+
+        Returns:
+        - Dict with the wall time, the queue size and the list of per-stage counters.
+        """
+        end = self._finished_at if self._finished_at is not None else time.perf_counter()
+        wall_seconds = end - self._started_at if self._started_at is not None else 0.0
+        report = {
+            "wall_seconds": round(wall_seconds, 4),
+            "queue_size": self.queue_size,
+            "stages": [stats.as_dict() for stats in self._stats],
+        }
+        for name, extra in self.extras.items():
+            report[name] = extra.as_dict()
+        return report
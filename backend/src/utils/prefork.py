@@ -0,0 +1,145 @@
+import os
+import signal
+import socket
+import time
+import traceback
+
+import uvicorn
+from uvicorn.importer import import_from_string
+
+
+class PreforkServer:
+    """
+    Pre-forking launcher running several uvicorn workers on one shared listening socket.
+
+    The master imports the application (and runs the `preload` hooks) before forking, so heavy
+    modules and anything loaded by the hooks, such as model weights, are shared copy-on-write by
+    the workers. Workers that die are replaced. SIGHUP restarts the workers gracefully: a new set
+    is forked first, then the old workers stop accepting connections and finish their in-flight
+    requests. SIGTERM and SIGINT stop everything the same way.
+
+    The master never reloads code: changes to the application need a full restart.
+
+    Args:
+    - app: Import string of the ASGI application, e.g. "backend.server:app".
+    - host: Address to bind.
+    - port: Port to bind.
+    - workers: Number of worker processes.
+    - preload: Callables run in the master after the import and before forking.
+    - graceful_timeout: Seconds a stopping worker gets to finish its requests before being killed.
+    - log_level: uvicorn log level of the workers.
+    """
+    def __init__(self, app, host="127.0.0.1", port=8000, workers=2, preload=(), graceful_timeout=30,
+                 log_level="info"):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.num_workers = workers
+        self.preload = preload
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self.workers = set()  # pids of the current workers
+        self.retiring = {}  # pid -> time after which a stopping worker is killed
+        self._restart = False
+        self._stop = False
+
+    def _bind(self):
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self, app, sock):
+        pid = os.fork()
+        if pid:
+            self.workers.add(pid)
+            return
+        # Worker: uvicorn installs its own SIGINT/SIGTERM handlers for a graceful shutdown
+        status = 1
+        try:
+            for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+                signal.signal(signum, signal.SIG_DFL)
+            config = uvicorn.Config(app, log_level=self.log_level, timeout_graceful_shutdown=self.graceful_timeout)
+            uvicorn.Server(config).run(sockets=[sock])
+            status = 0
+        except Exception:
+            traceback.print_exc()
+        finally:
+            os._exit(status)
+
+    def _retire(self, pids):
+        for pid in pids:
+            self.workers.discard(pid)
+            self.retiring[pid] = time.monotonic() + self.graceful_timeout
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reap(self):
+        """
+        Collect exited workers; returns the number of current workers that died unexpectedly.
+        """
+        died = 0
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            if pid in self.workers:
+                self.workers.discard(pid)
+                died += 1
+            self.retiring.pop(pid, None)
+
+        now = time.monotonic()
+        for pid, deadline in list(self.retiring.items()):
+            if now > deadline:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    self.retiring.pop(pid, None)
+        return died
+
+    def _on_signal(self, signum, frame):
+        if signum == signal.SIGHUP:
+            self._restart = True
+        else:
+            self._stop = True
+
+    def run(self):
+        app = import_from_string(self.app)
+        for hook in self.preload:
+            hook()
+        sock = self._bind()
+
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._on_signal)
+
+        print("Serving {} on http://{}:{} with {} workers (master pid {})".format(
+            self.app, self.host, self.port, self.num_workers, os.getpid()))
+        for _ in range(self.num_workers):
+            self._spawn(app, sock)
+
+        try:
+            while not self._stop:
+                time.sleep(0.5)
+                for _ in range(self._reap()):
+                    self._spawn(app, sock)
+                if self._restart:
+                    self._restart = False
+                    old = list(self.workers)
+                    self.workers.clear()
+                    # New workers share the socket, so no connection is refused while the old ones drain
+                    for _ in range(self.num_workers):
+                        self._spawn(app, sock)
+                    self._retire(old)
+        finally:
+            self._retire(list(self.workers))
+            while self.retiring:
+                self._reap()
+                time.sleep(0.1)
+            sock.close()
@@ -0,0 +1,186 @@
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+import time
+import uuid
+from contextlib import contextmanager
+
+from backend.src.utils import config
+
+# Opt-in per-request profiling. A flagged request gets a profile id; every piece of its work (on the
+# event loop, in threads, and in pool workers) is run under cProfile and dumped as a pstats file
+# named after that id, so only the flagged request pays the profiler overhead. Profiles older than
+# PROFILE_RETENTION_SECONDS, and beyond the newest MAX_PROFILES, are deleted.
+
+# Id of the profile the current request writes to, or None when it is not profiled
+_profile_id = contextvars.ContextVar("mesh_profile_id", default=None)
+
+# Profiler of the event loop while a request of this process is being profiled
+_event_loop_profiler = None
+
+
+def new_profile_id():
+    return uuid.uuid4().hex
+
+
+def start(profile_id):
+    """
+    Mark the current context as profiled under `profile_id`; returns a reset token.
+    """
+    return _profile_id.set(profile_id)
+
+
+def stop(token):
+    _profile_id.reset(token)
+
+
+def current_profile_id():
+    return _profile_id.get()
+
+
+def _dump(profiler, profile_id):
+    os.makedirs(config.PROFILE_DIR, exist_ok=True)
+    # One file per profiled piece of work; they are merged when the profile is read
+    name = "{}.{}.{}.pstats".format(profile_id, os.getpid(), time.perf_counter_ns())
+    profiler.dump_stats(os.path.join(config.PROFILE_DIR, name))
+
+
+def profiled(profile_id, function, *args):
+    """
+    Run `function(*args)` under cProfile and store the statistics under `profile_id`.
+
+    Safe to call in pool workers: it only depends on its arguments.
+    """
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args)
+    finally:
+        _dump(profiler, profile_id)
+
+
+@contextmanager
+def profile_request():
+    """
+    Profile the current request: its work on the event loop runs under cProfile, and its context is
+    marked so that its thread and pool work is profiled as well.
+
+    cProfile follows a whole thread, so the event loop part also holds whatever else the loop runs
+    meanwhile, and only one request per process is profiled at a time.
+
+    Yields:
+    - The profile id, or None when another request is being profiled (this one then is not).
+    """
+    global _event_loop_profiler
+    if _event_loop_profiler is not None:
+        yield None
+        return
+    profile_id = new_profile_id()
+    token = start(profile_id)
+    profiler = _event_loop_profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profile_id
+    finally:
+        profiler.disable()
+        _event_loop_profiler = None
+        stop(token)
+        _dump(profiler, profile_id)
+        prune()
+
+
+def prune(now=None):
+    """
+    Delete the profiles older than the retention period, then the oldest beyond the maximum count.
+    """
+    directory = config.PROFILE_DIR
+    if not os.path.isdir(directory):
+        return
+    now = time.time() if now is None else now
+    parts = {}
+    for name in os.listdir(directory):
+        if name.endswith(".pstats"):
+            path = os.path.join(directory, name)
+            try:
+                parts.setdefault(name.split(".", 1)[0], []).append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                continue
+    # Newest profile first, by the time of its last part
+    profiles = sorted(parts.values(), key=lambda paths: max(paths)[0], reverse=True)
+    for index, paths in enumerate(profiles):
+        if index >= config.MAX_PROFILES or now - max(paths)[0] > config.PROFILE_RETENTION_SECONDS:
+            for _, path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+
+def maybe_profiled(function, *args):
+    """
+    Call `function(*args)`, under cProfile if the current request is profiled.
+    """
+    profile_id = _profile_id.get()
+    if profile_id is None:
+        return function(*args)
+    return profiled(profile_id, function, *args)
+
+
+def _parts(profile_id):
+    directory = config.PROFILE_DIR
+    if not os.path.isdir(directory) or not profile_id.isalnum():
+        return []
+    prefix = profile_id + "."
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.startswith(prefix))
+
+
+def list_profiles():
+    """
+    Return the ids of the stored profiles.
+    """
+    if not os.path.isdir(config.PROFILE_DIR):
+        return []
+    return sorted({name.split(".", 1)[0] for name in os.listdir(config.PROFILE_DIR) if name.endswith(".pstats")})
+
+
+def report(profile_id, sort="cumulative", limit=50):
+    """
+    Merge the stored parts of a profile and return the pstats text report, or None if it does not exist.
+    """
+    parts = _parts(profile_id)
+    if not parts:
+        return None
+    output = io.StringIO()
+    stats = pstats.Stats(parts[0], stream=output)
+    for part in parts[1:]:
+        stats.add(part)
+    stats.sort_stats(sort).print_stats(limit)
+    return output.getvalue()
+
+
+def collapsed_stacks(profile_id):
+    """
+    Return the profile as collapsed caller;callee lines weighted by microseconds of own time,
+    readable by flame graph tools, or None if it does not exist.
+
+    cProfile only records direct callers, so each line holds one caller/callee edge rather than a full stack.
+    """
+    parts = _parts(profile_id)
+    if not parts:
+        return None
+    stats = pstats.Stats(parts[0])
+    for part in parts[1:]:
+        stats.add(part)
+
+    def label(func):
+        filename, line, name = func
+        return "{}:{}:{}".format(os.path.basename(filename), line, name)
+
+    lines = []
+    for func, (_, _, own_time, _, callers) in stats.stats.items():
+        if not callers:
+            lines.append("{} {}".format(label(func), int(own_time * 1e6)))
+        for caller, caller_stats in callers.items():
+            lines.append("{};{} {}".format(label(caller), label(func), int(caller_stats[2] * 1e6)))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized responses with single-flight computation.
+
+    Entries are the final response bytes, keyed by a digest of the canonicalized request. The total
+    size of the cached bodies is kept under `max_bytes` by evicting the least recently used entries.
+    Concurrent requests for a key that is being computed wait for that computation instead of
+    starting their own.
+
+    Args:
+    - max_bytes: Maximum total size of the cached response bodies.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self._entries = OrderedDict()  # key -> body
+        self._bytes = 0
+        self._in_flight = {}  # key -> Future resolved with the body
+
+    @staticmethod
+    def make_key(endpoint, params, response_format="json"):
+        """
+        Build the cache key of a request from its endpoint, parameters and response format.
+        """
+        canonical = json.dumps(
+            {"endpoint": endpoint, "params": params, "format": response_format},
+            sort_keys=True, separators=(",", ":")
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _store(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        self._entries[key] = body
+        self._bytes += len(body)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    async def get_or_compute(self, key, compute):
+        """
+        Return the cached body for `key`, or await `compute()` to produce and cache it.
+
+        Args:
+        - key: Cache key from `make_key`.
+        - compute: Coroutine function returning the response body as bytes.
+
+        Returns:
+        - The response body.
+        """
+        body = self._entries.get(key)
+        if body is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return body
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.shared += 1
+            try:
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                # The leading request was cancelled (e.g. its client went away) while this one still waits
+                if not in_flight.cancelled():
+                    raise
+                return await self.get_or_compute(key, compute)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            body = await compute()
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(exc)
+                # Followers re-raise it; mark it retrieved so an unawaited future does not log it
+                future.exception()
+            raise
+        else:
+            self._store(key, body)
+            future.set_result(body)
+            return body
+        finally:
+            del self._in_flight[key]
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+        }
@@ -0,0 +1,257 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+
+from backend.src.utils.frame_result import FrameResult, MAGIC
+from backend.src.utils.serialization import encode
+
+
+def _decode(payload):
+    payload = zlib.decompress(payload)
+    if payload[:len(MAGIC)] == MAGIC:
+        return FrameResult.from_bytes(payload)
+    # Rows written before frames were stored in binary hold the frame JSON
+    return FrameResult.from_dict(json.loads(payload))
+
+
+class ResultStore:
+    """
+    Bounded store for processed frame sequences, shared by every worker process.
+
+    Frames are kept as `FrameResult` objects and only serialized to JSON when read for a response.
+    Every result is written to a SQLite database in `directory` (one zlib-compressed binary frame
+    per row, see frame_result.py), so it survives reloads and can be looked up from any process.
+    Small results are also kept in an in-process LRU cache limited to `memory_budget` bytes; results
+    larger than `spill_bytes` only live on disk. Entries expire `ttl` seconds after they were stored;
+    expired rows are deleted by `put`, at most once every `purge_interval` seconds.
+
+    Args:
+    - directory: Directory holding the database file.
+    - ttl: Time to live of a result, in seconds.
+    - memory_budget: Maximum size (bytes of frame arrays) of the in-memory cache.
+    - spill_bytes: Results larger than this are never kept in memory.
+    - purge_interval: Minimum number of seconds between two purges of the expired results.
+    """
+    def __init__(self, directory, ttl=3600.0, memory_budget=256 * 1024 * 1024, spill_bytes=32 * 1024 * 1024,
+                 purge_interval=60.0):
+        self.directory = directory
+        self.ttl = ttl
+        self.memory_budget = memory_budget
+        self.spill_bytes = spill_bytes
+        self.purge_interval = purge_interval
+        self.path = os.path.join(directory, "results.sqlite3")
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # data_id -> (expires_at, [FrameResult])
+        self._memory_bytes = 0
+        self._last_purge = None
+
+        os.makedirs(directory, exist_ok=True)
+        with self._transaction() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "data_id TEXT PRIMARY KEY, expires_at REAL NOT NULL, num_frames INTEGER NOT NULL, size_bytes INTEGER NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS frames ("
+                "data_id TEXT NOT NULL, frame_index INTEGER NOT NULL, payload BLOB NOT NULL, "
+                "PRIMARY KEY (data_id, frame_index))"
+            )
+
+    def _connect(self):
+        # Streaming responses iterate from thread pool workers, so connections may cross threads
+        return sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+
+    @contextmanager
+    def _transaction(self):
+        with closing(self._connect()) as connection:
+            with connection:
+                yield connection
+
+    def _remember(self, data_id, expires_at, frames, size):
+        if size > self.spill_bytes or size > self.memory_budget:
+            return
+        with self._lock:
+            previous = self._memory.pop(data_id, None)
+            if previous is not None:
+                self._memory_bytes -= sum(frame.nbytes for frame in previous[1])
+            self._memory[data_id] = (expires_at, frames)
+            self._memory_bytes += size
+            # Evict the least recently used results until the cache fits its budget again
+            while self._memory_bytes > self.memory_budget:
+                _, (_, evicted) = self._memory.popitem(last=False)
+                self._memory_bytes -= sum(frame.nbytes for frame in evicted)
+
+    def _forget(self, data_id):
+        with self._lock:
+            entry = self._memory.pop(data_id, None)
+            if entry is not None:
+                self._memory_bytes -= sum(frame.nbytes for frame in entry[1])
+
+    def _lookup_memory(self, data_id):
+        with self._lock:
+            entry = self._memory.get(data_id)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._memory[data_id]
+                self._memory_bytes -= sum(frame.nbytes for frame in entry[1])
+                return None
+            self._memory.move_to_end(data_id)
+            return entry[1]
+
+    def purge_expired(self):
+        """
+        Delete every expired result from the database.
+        """
+        now = time.time()
+        self._last_purge = now
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM frames WHERE data_id IN (SELECT data_id FROM results WHERE expires_at < ?)", (now,))
+            connection.execute("DELETE FROM results WHERE expires_at < ?", (now,))
+
+    def put(self, frames, data_id=None):
+        """
+        Store a sequence of analysed frames.
+
+        Args:
+        - frames: Iterable of frames (`FrameResult` objects from `calculate_data`, or frame dicts);
+          consumed lazily.
+        - data_id: Optional id to store the result under, replacing any result stored under it; a new
+          UUID is generated by default.
+
+        Returns:
+        - The id of the stored result.
+        """
+        data_id = data_id or str(uuid.uuid4())
+        now = time.time()
+        expires_at = now + self.ttl
+        if self._last_purge is None or now - self._last_purge >= self.purge_interval:
+            self.purge_expired()
+        # A result replaced by a shorter one must not keep the frames beyond its end
+        self.delete(data_id)
+
+        kept = []
+        size = 0
+        num_frames = 0
+        connection = self._connect()
+        try:
+            for index, frame in enumerate(frames):
+                frame = FrameResult.from_dict(frame)
+                size += frame.nbytes
+                num_frames += 1
+                # Commit frame by frame so a long-running producer never holds the write lock
+                with connection:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO frames (data_id, frame_index, payload) VALUES (?, ?, ?)",
+                        (data_id, index, zlib.compress(frame.to_bytes()))
+                    )
+                # Stop buffering in memory once the result is too large to be cached anyway
+                if kept is not None:
+                    kept.append(frame)
+                    if size > self.spill_bytes:
+                        kept = None
+            # The result only becomes visible once its header row exists
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO results (data_id, expires_at, num_frames, size_bytes) VALUES (?, ?, ?, ?)",
+                    (data_id, expires_at, num_frames, size)
+                )
+        except BaseException:
+            with connection:
+                connection.execute("DELETE FROM frames WHERE data_id = ?", (data_id,))
+            raise
+        finally:
+            connection.close()
+
+        if kept is not None:
+            self._remember(data_id, expires_at, kept, size)
+        return data_id
+
+    def exists(self, data_id):
+        """
+        Return True if a non-expired result is stored under `data_id`.
+        """
+        if self._lookup_memory(data_id) is not None:
+            return True
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT 1 FROM results WHERE data_id = ? AND expires_at >= ?", (data_id, time.time())
+            ).fetchone()
+        return row is not None
+
+    def iter_frames(self, data_id):
+        """
+        Yield the frames of a result as `FrameResult` objects, one frame at a time.
+
+        Frames are read from the database row by row, so a result is never fully loaded into memory.
+        """
+        frames = self._lookup_memory(data_id)
+        if frames is not None:
+            yield from frames
+            return
+
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                "SELECT payload FROM frames WHERE data_id = ? ORDER BY frame_index", (data_id,)
+            )
+            for (payload,) in rows:
+                yield _decode(payload)
+        finally:
+            connection.close()
+
+    def iter_payloads(self, data_id):
+        """
+        Yield the serialized JSON of every frame of a result, one frame at a time.
+        """
+        for frame in self.iter_frames(data_id):
+            yield encode(frame)
+
+    def iter_json(self, data_id):
+        """
+        Yield a result as chunks of a JSON array, suitable for a streaming response.
+        """
+        yield b"["
+        for index, payload in enumerate(self.iter_payloads(data_id)):
+            yield payload if index == 0 else b"," + payload
+        yield b"]"
+
+    def get(self, data_id):
+        """
+        Return the frames (`FrameResult`) of a result, or None if it does not exist or has expired.
+        """
+        if not self.exists(data_id):
+            return None
+        return list(self.iter_frames(data_id))
+
+    def get_frame(self, data_id, frame_index):
+        """
+        Return one frame (`FrameResult`) of a result, or None if the result or the frame does not exist.
+        """
+        frames = self._lookup_memory(data_id)
+        if frames is not None:
+            return frames[frame_index] if 0 <= frame_index < len(frames) else None
+        if not self.exists(data_id):
+            return None
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT payload FROM frames WHERE data_id = ? AND frame_index = ?", (data_id, frame_index)
+            ).fetchone()
+        return _decode(row[0]) if row is not None else None
+
+    def delete(self, data_id):
+        """
+        Remove a result from memory and from the database.
+        """
+        self._forget(data_id)
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM frames WHERE data_id = ?", (data_id,))
+            connection.execute("DELETE FROM results WHERE data_id = ?", (data_id,))
@@ -0,0 +1,260 @@
+import atexit
+import json
+import os
+import threading
+
+import numpy as np
+from scipy.spatial import QhullError
+
+from backend.src.features.ads_techniques import TemporalAnomalyTracker
+from backend.src.features.level_of_detail import ProgressiveFrame, decimate_frame, frame_detail
+from backend.src.utils import shared_frames
+from backend.src.utils.calculate_data import calculate_data
+from backend.src.utils.metrics import span
+from backend.src.utils.serialization import encode
+from backend.src.utils.sequence_codec import encode_sequence
+from backend.src.utils.synthetic_data_generator import (
+    generate_synthetic_time_series,
+    apply_sinusoidal_transformation_with_noise_and_anomalies,
+    generate_hallow_sphere_point_cloud,
+    generate_filled_sphere_point_cloud,
+    apply_harmonic_transformation_with_noise_and_anomalies
+)
+
+# Frame generation and analysis for every scenario. These are plain module-level functions of
+# picklable arguments so the server can run them in worker processes. Frames travel between
+# processes through shared memory (see shared_frames.py); tasks only carry their handles.
+
+# Ready datasets: request name -> (dataset folder, dataset file, anomaly file)
+READY_DATASETS = {
+    "serverMachineDatasetPca": ("serverMachineDataset", "SMD_pca", "SMD_anomaly_pca"),
+    "serverMachineDatasetUmap": ("serverMachineDataset", "SMD_umap", "SMD_anomaly_umap"),
+    "serverMachineDatasetTsne": ("serverMachineDataset", "SMD_tsne", "SMD_anomaly_tsne"),
+    "serverMachineDatasetAutoencoder": ("serverMachineDataset", "SMD_autoencoder", "SMD_anomaly_autoencoder"),
+}
+
+
+def _load_ready_dataset(ready_data):
+    dataset_folder_name, dataset_name, anomaly_dataset_name = READY_DATASETS[ready_data]
+
+    # Read the JSON file
+    with open('./backend/data/' + dataset_folder_name + '/' + dataset_name + '.json', 'r') as file:
+        pca_list = json.load(file)
+
+    with open('./backend/data/' + dataset_folder_name + '/' + anomaly_dataset_name + '.json', 'r') as file:
+        anomaly_points_list = json.load(file)
+
+    # Convert each sublist into a NumPy array
+    frames_data = [np.array(sublist) for sublist in pca_list]
+    anomaly_points = [frame["anomaly_points"] for frame in anomaly_points_list]
+    return frames_data, anomaly_points
+
+
+# Ready datasets in shared memory: name -> (pid of the loading process, frame handles, anomaly points)
+_shared_datasets = {}
+_shared_datasets_lock = threading.Lock()
+
+
+@atexit.register
+def _release_shared_datasets():
+    # Forked server workers inherit the datasets; only the process that loaded them frees them
+    for pid, handles, _ in _shared_datasets.values():
+        if pid == os.getpid():
+            shared_frames.release(handles)
+
+
+def ready_dataset_frames(ready_data, start_index, end_index):
+    """
+    Return a slice of a ready dataset, loading the whole dataset into shared memory on first use.
+
+    Runs in the server process. Datasets loaded before the production launcher forks its workers
+    (see `preload` in server.py) are shared by all of them.
+
+    Returns:
+    - Tuple (frames, anomaly_points): the shared memory handles of each frame and the matching anomaly points.
+    """
+    with _shared_datasets_lock:
+        if ready_data not in _shared_datasets:
+            with span("generation"):
+                frames_data, anomaly_points = _load_ready_dataset(ready_data)
+                segment, handles = shared_frames.share(frames_data)
+            segment.close()
+            _shared_datasets[ready_data] = (os.getpid(), handles, anomaly_points)
+        _, handles, anomaly_points = _shared_datasets[ready_data]
+    return handles[start_index:end_index], anomaly_points[start_index:end_index]
+
+
+def time_series_frames(num_frames, num_points_per_frame, noise_level, anomaly_level):
+    return generate_synthetic_time_series(num_frames, num_points_per_frame, noise_level, anomaly_level)
+
+
+def scaled_sphere_frames(num_points, num_frames, scale_min, scale_max, num_cycles, noise_level,
+                         anomaly_percentage, distortion_coefficient, hollow=False):
+    # Generate the base point cloud
+    if hollow:
+        base_point_cloud = generate_hallow_sphere_point_cloud(num_points)
+    else:
+        base_point_cloud = generate_filled_sphere_point_cloud(num_points)
+
+    # Generate the animated point clouds
+    return [
+        apply_sinusoidal_transformation_with_noise_and_anomalies(
+                base_point_cloud, frame,
+                num_frames, scale_min, scale_max,
+                num_cycles, noise_level,
+                anomaly_percentage, distortion_coefficient
+            )
+        for frame in range(num_frames)
+    ]
+
+
+def harmonic_oscillating_frames(num_points, num_frames, d, w0, noise_level, anomaly_percentage, distortion_coefficient):
+    # Generate the base point cloud
+    base_point_cloud = generate_filled_sphere_point_cloud(num_points)
+
+    # Generate the animated point clouds
+    return [
+        apply_harmonic_transformation_with_noise_and_anomalies(
+                base_point_cloud, frame,
+                num_frames, d, w0,
+                noise_level, anomaly_percentage,
+                distortion_coefficient
+            )
+        for frame in range(num_frames)
+    ]
+
+
+def encode_json(content):
+    """
+    Serialize content, NumPy arrays included, to compact JSON bytes.
+    """
+    with span("serialization"):
+        return encode(content)
+
+
+def analyse_frame(points, anomaly_points=None, serialize=True):
+    """
+    Run `calculate_data` on one frame and return the serialized frame.
+
+    Args:
+    - points: The (N, 3) points of the frame.
+    - anomaly_points: Optional anomaly points used instead of detecting them (ready datasets,
+      temporal tracking).
+    - serialize: Return JSON bytes; when False the `FrameResult` is returned for `encode_frames`.
+
+    Returns:
+    - The frame as JSON bytes, or the `FrameResult`.
+    """
+    frame = calculate_data(points, anomaly_points)
+    return encode_json(frame) if serialize else frame
+
+
+def analyse_stream_frame(points):
+    """
+    Like `analyse_frame`, but returns None for a frame without a 3-D hull (fewer than 4 distinct
+    points, or all of them coplanar), as projected metric rows may be.
+    """
+    try:
+        return analyse_frame(points)
+    except QhullError:
+        return None
+
+
+def analyse_shared_frame(handle, anomaly_points=None, serialize=True):
+    """
+    Run `analyse_frame` on a frame read in place from shared memory.
+    """
+    # The view of the points is only valid while the segment is mapped; frames copy their points
+    return shared_frames.read(handle, lambda points: analyse_frame(points, anomaly_points, serialize))
+
+
+def copy_shared_frames(handles):
+    """
+    Copy frames out of shared memory, to keep them once their segment is released.
+    """
+    return [shared_frames.read(handle, np.array) for handle in handles]
+
+
+def track_shared_anomalies(handles):
+    """
+    Run a `TemporalAnomalyTracker` over a sequence of shared frames, in order.
+
+    Returns:
+    - The anomaly points of every frame, to pass to `analyse_shared_frame`.
+    """
+    tracker = TemporalAnomalyTracker()
+    with span("detect_anomalies"):
+        return [shared_frames.read(handle, tracker.update) for handle in handles]
+
+
+def shared_generation(function, *args):
+    """
+    Call `function(*args)` and place the frames it returns in shared memory; meant for pool workers.
+
+    Returns:
+    - The frame handles; free them with `shared_frames.release` once the frames are analysed.
+    """
+    segment, handles = shared_frames.share(function(*args))
+    segment.close()
+    return handles
+
+
+def level_of_detail_frame(frame, point_budget, data_id, frame_index, serialize=True):
+    """
+    Decimate an analysed frame to `point_budget` points (see level_of_detail.py).
+
+    Args:
+    - frame: The full frame dict.
+    - point_budget: Approximate number of points to keep.
+    - data_id: Id of the stored full frames, from which the client fetches more detail.
+    - frame_index: Index of the frame in the stored result.
+    - serialize: Return JSON bytes instead of the frame dict.
+    """
+    with span("level_of_detail"):
+        frame = decimate_frame(frame, point_budget)
+    frame["lod"].update(data_id=data_id, frame_index=frame_index)
+    return encode_json(frame) if serialize else frame
+
+
+def progressive_frame(frame):
+    """
+    Compute the progressive order of a stored frame once, for the `/frame_detail` requests that follow.
+    """
+    with span("level_of_detail"):
+        return ProgressiveFrame(frame)
+
+
+def encode_frame_detail(frame, start, count):
+    """
+    Serialize the next `count` points of a frame (or of its `ProgressiveFrame`) in progressive
+    order, starting at `start`.
+    """
+    with span("level_of_detail"):
+        detail = frame_detail(frame, start, count)
+    return encode_json(detail)
+
+
+def encode_frames(frames):
+    """
+    Encode a whole sequence of frame dicts with the compact sequence codec.
+    """
+    with span("serialization"):
+        return encode_sequence(frames)
+
+
+def seeded(seed, function, *args):
+    """
+    Call `function(*args)` after seeding NumPy's global generator, so a seed fully determines the frames.
+
+    The generator state of the worker is restored afterwards, so later unseeded calls stay random.
+    """
+    if seed is None:
+        with span("generation"):
+            return function(*args)
+    state = np.random.get_state()
+    np.random.seed(seed)
+    try:
+        with span("generation"):
+            return function(*args)
+    finally:
+        np.random.set_state(state)
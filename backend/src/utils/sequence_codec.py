@@ -0,0 +1,181 @@
+import json
+import struct
+import zlib
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from backend.src.utils.frame_result import FrameResult
+
+# Compact binary encoding of a whole frame sequence, served with `?format=sequence`.
+#
+# Coordinates are quantized to int16 over the bounding box of the sequence. Frames with the same
+# number of points as the previous one store the wrapping int16 difference to it, which is small
+# when points keep their identity and move a little (ready datasets, sinusoidal and harmonic
+# scenarios). Outermost points and face vertices are indices into the frame's points, inner points
+# are a bit mask; anomaly points keep explicit (quantized) coordinates. The result is compressed
+# with zlib, which browsers inflate with `DecompressionStream("deflate")`.
+#
+# Layout of the inflated payload (little-endian):
+#   b"MSQ1", uint32 header length, header JSON, then for every frame:
+#   points      int16[3 * n]   planar (x..., y..., z...), absolute or delta
+#   excluded    uint8[ceil(n / 8)]   bit i set when point i is not an inner point
+#   outermost   uint32[hull]   indices of the convex hull vertices
+#   anomalies   int16[3 * anomalies]   planar, absolute
+#   face sizes  uint16[faces]
+#   face verts  uint32[face_vertices]   indices into the points
+
+MEDIA_TYPE = "application/x-mesh-sequence"
+MAGIC = b"MSQ1"
+VERSION = 1
+_LEVELS = 65535
+_OFFSET = 32768
+
+
+def _as_points(values):
+    return np.asarray(values, dtype=np.float64).reshape(-1, 3)
+
+
+def _bounds(frames):
+    arrays = [_as_points(frame["all_points"]) for frame in frames]
+    arrays += [_as_points(frame["anomaly_points"]) for frame in frames]
+    arrays = [array for array in arrays if len(array)]
+    if not arrays:
+        return np.zeros(3), np.ones(3)
+    lower = np.min([array.min(axis=0) for array in arrays], axis=0)
+    upper = np.max([array.max(axis=0) for array in arrays], axis=0)
+    scale = (upper - lower) / _LEVELS
+    scale[scale == 0] = 1.0
+    return lower, scale
+
+
+def _quantize(points, lower, scale):
+    return (np.rint((points - lower) / scale) - _OFFSET).astype(np.int16)
+
+
+def _dequantize(quantized, lower, scale):
+    return (quantized.astype(np.float64) + _OFFSET) * scale + lower
+
+
+def _frame_indices(frame, points):
+    """
+    Hull vertex indices, mask of the points that are not inner points, face sizes and face vertex
+    indices of a frame.
+    """
+    if isinstance(frame, FrameResult):
+        # The compact form already stores them as indices into the points
+        return frame.outermost, ~frame.inner, frame.face_sizes, frame.face_indices
+    outermost = _as_points(frame["outermost_points"])
+    faces = [_as_points(face) for face in frame["faces"]]
+    face_vertices = np.concatenate(faces) if faces else np.empty((0, 3))
+    # Outermost points and face vertices are points of the frame; faces were rounded, so the
+    # nearest point is used rather than an exact match
+    tree = cKDTree(points)
+    _, outermost_indices = tree.query(outermost)
+    _, face_indices = tree.query(face_vertices)
+    # Inner points exclude every point equal to a hull vertex, duplicates included
+    distances, _ = cKDTree(outermost).query(points)
+    return outermost_indices, distances == 0, [len(face) for face in faces], face_indices
+
+
+def encode_sequence(frames, level=6):
+    """
+    Encode a sequence of analysed frames (see `calculate_data`) into the compact binary format.
+
+    Quantization is lossy: coordinates are restored to within half a step, 1/65535 of the extent of
+    the sequence along each axis.
+
+    Args:
+    - frames: List of FrameResults, or frame dicts holding NumPy arrays or nested lists.
+    - level: zlib compression level.
+
+    Returns:
+    - The compressed payload as bytes.
+    """
+    lower, scale = _bounds(frames)
+    header = {"version": VERSION, "lower": lower.tolist(), "scale": scale.tolist(), "frames": []}
+    sections = []
+    previous = None
+
+    for frame in frames:
+        points = _as_points(frame["all_points"])
+        anomalies = _as_points(frame["anomaly_points"])
+        outermost_indices, excluded, face_sizes, face_indices = _frame_indices(frame, points)
+
+        quantized = _quantize(points, lower, scale)
+        delta = previous is not None and previous.shape == quantized.shape
+        # int16 arithmetic wraps around, and so does the decoder's, so deltas never overflow
+        stored = quantized - previous if delta else quantized
+        previous = quantized
+
+        info = {
+            "points": len(points), "delta": delta, "hull": len(outermost_indices),
+            "anomalies": len(anomalies), "faces": len(face_sizes), "face_vertices": len(face_indices),
+        }
+        # Level-of-detail metadata of decimated frames travels in the header
+        if "lod" in frame:
+            info["lod"] = frame["lod"]
+        header["frames"].append(info)
+        sections += [
+            np.ascontiguousarray(stored.T).astype("<i2").tobytes(),
+            np.packbits(excluded, bitorder="little").tobytes(),
+            np.asarray(outermost_indices, dtype="<u4").tobytes(),
+            np.ascontiguousarray(_quantize(anomalies, lower, scale).T).astype("<i2").tobytes(),
+            np.asarray(face_sizes, dtype="<u2").tobytes(),
+            np.asarray(face_indices, dtype="<u4").tobytes(),
+        ]
+
+    header = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(MAGIC + struct.pack("<I", len(header)) + header + b"".join(sections), level)
+
+
+def decode_sequence(payload):
+    """
+    Decode a payload produced by `encode_sequence`.
+
+    Returns:
+    - List of frame dicts holding float64 NumPy arrays; faces is a list of (k, 3) arrays.
+    """
+    data = zlib.decompress(payload)
+    if data[:4] != MAGIC:
+        raise ValueError("Not a mesh sequence payload")
+    (header_length,) = struct.unpack_from("<I", data, 4)
+    header = json.loads(data[8:8 + header_length])
+    lower, scale = np.array(header["lower"]), np.array(header["scale"])
+    offset = 8 + header_length
+
+    def read(dtype, count):
+        nonlocal offset
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += array.nbytes
+        return array
+
+    frames = []
+    previous = None
+    for info in header["frames"]:
+        n = info["points"]
+        quantized = read("<i2", 3 * n).reshape(3, n).T.astype(np.int16)
+        if info["delta"]:
+            quantized = previous + quantized
+        previous = quantized
+        points = _dequantize(quantized, lower, scale)
+
+        excluded = np.unpackbits(read("u1", (n + 7) // 8), count=n, bitorder="little").astype(bool)
+        outermost = read("<u4", info["hull"])
+        anomalies = read("<i2", 3 * info["anomalies"]).reshape(3, -1).T
+        sizes = read("<u2", info["faces"])
+        face_indices = read("<u4", info["face_vertices"])
+
+        frame = {
+            "all_points": points,
+            "inner_points": points[~excluded],
+            "outermost_points": points[outermost],
+            "anomaly_points": _dequantize(anomalies, lower, scale),
+            "faces": np.split(points[face_indices], np.cumsum(sizes)[:-1]) if len(sizes) else [],
+        }
+        if "lod" in info:
+            frame["lod"] = info["lod"]
+        frames.append(frame)
+    return frames
@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+
+from backend.src.utils import config
+from backend.src.utils.frame_result import FrameResult
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSON encoding of frames at the response boundary. Frames stay NumPy arrays until here and are
+# encoded in a single pass: orjson serializes float arrays natively when it is installed, otherwise
+# the stdlib encoder converts each array with one `tolist()` call through its `default` hook.
+
+
+def _default(obj):
+    if isinstance(obj, FrameResult):
+        return obj.to_dict()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError("Object of type {} is not JSON serializable".format(type(obj).__name__))
+
+
+def _rounded(content, decimals):
+    # Frames are shallow (dicts and lists of arrays), so walking the containers is cheap
+    if isinstance(content, FrameResult):
+        content = content.to_dict()
+    if isinstance(content, np.ndarray):
+        return np.round(content, decimals) if content.dtype.kind == "f" else content
+    if isinstance(content, dict):
+        return {key: _rounded(value, decimals) for key, value in content.items()}
+    if isinstance(content, (list, tuple)):
+        return [_rounded(value, decimals) for value in content]
+    if isinstance(content, float):
+        return round(content, decimals)
+    return content
+
+
+def encode(content, decimals=config.JSON_FLOAT_DECIMALS):
+    """
+    Serialize content holding NumPy arrays and scalars to compact JSON.
+
+    Args:
+    - content: Dicts, lists, numbers, strings, NumPy arrays or scalars and `FrameResult` frames.
+    - decimals: Number of decimals kept for floats; None keeps full precision.
+
+    Returns:
+    - The JSON document as UTF-8 bytes.
+    """
+    if decimals is not None:
+        content = _rounded(content, decimals)
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
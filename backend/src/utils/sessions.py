@@ -0,0 +1,52 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+
+class SessionStore:
+    """
+    Stateful objects of this process (live frames, metric streams, continuations) by id, dropping
+    the least recently used beyond `max_entries`.
+
+    Sessions live in the memory of the worker process that created them, so with several workers
+    the requests of a session must reach the same worker.
+
+    Args:
+    - max_entries: Maximum number of sessions kept.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def add(self, session):
+        """
+        Store a session under a new unique id and return the id.
+        """
+        session_id = str(uuid.uuid4())
+        with self._lock:
+            self._entries[session_id] = session
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return session_id
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._entries.get(session_id)
+            if session is not None:
+                self._entries.move_to_end(session_id)
+            return session
+
+    def pop(self, session_id):
+        """
+        Remove a session and return it, or None if there is no session with this id.
+        """
+        with self._lock:
+            return self._entries.pop(session_id, None)
+
+    def delete(self, session_id):
+        return self.pop(session_id) is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,79 @@
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Frames placed in POSIX shared memory, so pool workers read them in place instead of receiving a
+# pickled copy. A segment holds the arrays of a whole sequence back to back; tasks only carry small
+# handles. The process that creates a segment does not need to be the one that frees it: generated
+# sequences are written by a pool worker and released by the server once they are analysed.
+
+# Location of one frame: shared memory segment name, byte offset, array shape and dtype
+FrameHandle = namedtuple("FrameHandle", ["segment", "offset", "shape", "dtype"])
+
+# Offsets are aligned so every frame starts on a cache line
+_ALIGNMENT = 64
+
+
+def _aligned(size):
+    return -(-size // _ALIGNMENT) * _ALIGNMENT
+
+
+def share(frames):
+    """
+    Copy a sequence of arrays into a new shared memory segment.
+
+    Args:
+    - frames: Iterable of NumPy arrays (or nested lists), e.g. the (N, 3) points of every frame.
+
+    Returns:
+    - Tuple (segment, handles): the open `SharedMemory` (close it once done writing; free it with
+      `release`) and the handle of every frame.
+    """
+    arrays = [np.ascontiguousarray(frame, dtype=np.float64) for frame in frames]
+    size = sum(_aligned(array.nbytes) for array in arrays)
+    segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+
+    handles = []
+    offset = 0
+    view = None
+    for array in arrays:
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf, offset=offset)
+        view[...] = array
+        handles.append(FrameHandle(segment.name, offset, array.shape, array.dtype.str))
+        offset += _aligned(array.nbytes)
+    del view
+    return segment, handles
+
+
+def read(handle, function):
+    """
+    Call `function(points)` with a read-only view of a shared frame and return its result.
+
+    The view is only valid during the call: the result must not keep references to it.
+    """
+    segment = shared_memory.SharedMemory(name=handle.segment)
+    view = np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=segment.buf, offset=handle.offset)
+    view.flags.writeable = False
+    try:
+        return function(view)
+    finally:
+        del view
+        try:
+            segment.close()
+        except BufferError:
+            # A traceback still references the view; the mapping goes away with it
+            pass
+
+
+def release(handles):
+    """
+    Free the shared memory segments referenced by `handles`; views already open stay valid.
+    """
+    for name in {handle.segment for handle in handles}:
+        try:
+            segment = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            continue
+        segment.unlink()
+        segment.close()
@@ -0,0 +1,108 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class FrameIndex:
+    """
+    KD-tree over the points of one stored frame, answering box, radius and nearest-neighbour queries.
+
+    Queries return indices into the frame's `all_points`.
+    """
+    __slots__ = ("points", "tree", "nbytes")
+
+    def __init__(self, points):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.tree = cKDTree(self.points)
+        # The tree stores a permutation and node bounds on top of its copy of the data
+        self.nbytes = 3 * self.points.nbytes
+
+    def box(self, lower, upper):
+        """
+        Indices of the points inside the axis-aligned box [lower, upper], in increasing order.
+        """
+        lower = np.asarray(lower, dtype=np.float64)
+        upper = np.asarray(upper, dtype=np.float64)
+        half = (upper - lower) / 2
+        if len(self.points) == 0 or (half < 0).any():
+            return np.empty(0, dtype=np.int64)
+        # The cube (Chebyshev ball) around the box centre bounds the candidates
+        candidates = np.asarray(self.tree.query_ball_point(lower + half, half.max(), p=np.inf), dtype=np.int64)
+        inside = np.all((self.points[candidates] >= lower) & (self.points[candidates] <= upper), axis=1)
+        return np.sort(candidates[inside])
+
+    def radius(self, center, radius):
+        """
+        Indices and distances of the points within `radius` of `center`, nearest first.
+        """
+        indices = np.asarray(self.tree.query_ball_point(center, radius), dtype=np.int64)
+        distances = np.linalg.norm(self.points[indices] - np.asarray(center, dtype=np.float64), axis=1)
+        order = np.argsort(distances, kind="stable")
+        return indices[order], distances[order]
+
+    def nearest(self, center, k):
+        """
+        Indices and distances of the `k` points nearest to `center`, nearest first.
+        """
+        k = min(k, len(self.points))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        distances, indices = self.tree.query(center, k=k)
+        return np.atleast_1d(indices).astype(np.int64), np.atleast_1d(distances)
+
+
+class SpatialIndexCache:
+    """
+    LRU cache of per-frame indexes of stored frames (`FrameIndex` objects by default), keyed by
+    (data_id, frame_index).
+
+    Indexes are built on first use from the frames returned by `load_frame` and kept while their
+    estimated size fits in `max_bytes`.
+
+    Args:
+    - load_frame: Function (data_id, frame_index) -> frame dict or None, e.g. `ResultStore.get_frame`.
+    - max_bytes: Memory budget of the cached indexes.
+    - build: Function frame -> index with an `nbytes` attribute.
+    """
+    def __init__(self, load_frame, max_bytes, build=None):
+        self.load_frame = load_frame
+        self.max_bytes = max_bytes
+        self.build = build or (lambda frame: FrameIndex(frame["all_points"]))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (data_id, frame_index) -> FrameIndex
+        self._bytes = 0
+
+    def get(self, data_id, frame_index):
+        """
+        Return the index of a stored frame, building it if needed, or None if the frame does not exist.
+        """
+        key = (data_id, frame_index)
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return index
+            self.misses += 1
+
+        frame = self.load_frame(data_id, frame_index)
+        if frame is None:
+            return None
+        index = self.build(frame)
+
+        with self._lock:
+            if key not in self._entries and index.nbytes <= self.max_bytes:
+                self._entries[key] = index
+                self._bytes += index.nbytes
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+        return index
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
@@ -1,5 +1,4 @@
 import numpy as np
-import torch
 
 ######################################################################
 # Generate a synthetic time series dataset with scale input.         #   -   START
@@ -164,18 +163,17 @@ def oscillator(d, w0, x):
     w = np.sqrt(w0**2 - d**2)
     phi = np.arctan(-d / w)
     A = 1 / (2 * np.cos(phi))
-    cos = torch.cos(phi + w * x)
-    exp = torch.exp(-d * x)
+    cos = np.cos(phi + w * x)
+    exp = np.exp(-d * x)
     y = exp * 2 * A * cos
     return y
 
 def apply_harmonic_sinusoidal_transformation(base_point, num_frames, d, w0, noise_level):
     # Create a time array
     time = np.linspace(0, 1, num_frames)
-    time_tensor = torch.tensor(time, dtype=torch.float32).view(-1, 1)
     
     # Calculate the harmonic oscillator scale
-    harmonic_scale = oscillator(d, w0, time_tensor).numpy().flatten()
+    harmonic_scale = oscillator(d, w0, time)
     
     # Apply the transformation to each coordinate
     transformed_points = []
@@ -191,10 +189,9 @@ def apply_harmonic_sinusoidal_transformation(base_point, num_frames, d, w0, nois
 def apply_harmonic_transformation_with_noise_and_anomalies(base_points, frame, num_frames, d, w0, noise_level, anomaly_percentage, distortion_coefficient):
     # Create a time array
     time = np.linspace(0, 1, num_frames)
-    time_tensor = torch.tensor(time, dtype=torch.float32).view(-1, 1)
     
     # Calculate the harmonic oscillator scale
-    harmonic_scale = oscillator(d, w0, time_tensor).numpy().flatten()
+    harmonic_scale = oscillator(d, w0, time)
     
     transformed_points = []
     for point in base_points:
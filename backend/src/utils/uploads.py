@@ -0,0 +1,57 @@
+import os
+import uuid
+from contextlib import asynccontextmanager
+
+from starlette.concurrency import run_in_threadpool
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured size limit."""
+    def __init__(self, max_bytes):
+        super().__init__("Upload exceeds the limit of {} bytes".format(max_bytes))
+        self.max_bytes = max_bytes
+
+
+def _safe_suffix(filename):
+    # Keep the original extension (it helps the decoder pick a demuxer) but nothing else from the client
+    suffix = os.path.splitext(filename or "")[1].lower()
+    return suffix if 1 < len(suffix) <= 8 and suffix[1:].isalnum() else ".bin"
+
+
+@asynccontextmanager
+async def spooled_upload(upload, directory, max_bytes, chunk_size=1024 * 1024):
+    """
+    Stream an upload into a file of its own and remove that file when the block exits.
+
+    The upload is copied chunk by chunk into a uniquely named file in `directory`, so concurrent
+    uploads never share a path and the whole body is never held in memory. The file is deleted on
+    exit, including when processing or the copy itself fails.
+
+    Args:
+    - upload: The `UploadFile` received by the endpoint.
+    - directory: Spool directory for the per-job files.
+    - max_bytes: Maximum accepted upload size; larger uploads raise `UploadTooLarge`.
+    - chunk_size: Number of bytes copied per read.
+
+    Yields:
+    - Path of the spooled file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, uuid.uuid4().hex + _safe_suffix(upload.filename))
+
+    try:
+        written = 0
+        with open(path, "wb") as buffer:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                await run_in_threadpool(buffer.write, chunk)
+        yield path
+    finally:
+        await upload.close()
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,46 @@
+"""
+Synthetic inputs shared by the benchmarks.
+"""
+import os
+import tempfile
+
+import numpy as np
+
+
+def sphere_points(num_points, seed=0):
+    """
+    Return `num_points` points uniformly distributed in the unit ball.
+    """
+    rng = np.random.default_rng(seed)
+    directions = rng.normal(size=(num_points, 3))
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    radii = rng.random(num_points) ** (1 / 3)
+    return directions * radii[:, np.newaxis]
+
+
+def synthetic_video(num_frames=12, size=(160, 96), fps=12, directory=None):
+    """
+    Write a tiny video of a moving gradient and a bouncing square, standing in for real uploads.
+
+    Returns:
+    - Path of the video file; the caller removes it.
+    """
+    import cv2
+
+    width, height = size
+    handle, path = tempfile.mkstemp(suffix=".avi", dir=directory)
+    os.close(handle)
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    for index in range(num_frames):
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        shifted = (x + index * 8) % 256
+        frame[:, :, 0] = shifted.astype(np.uint8)
+        frame[:, :, 1] = shifted[::-1].astype(np.uint8)
+        frame[:, :, 2] = 128
+        left = (index * 6) % (width - 20)
+        frame[30:50, left:left + 20] = 255
+        writer.write(frame)
+    writer.release()
+    return path
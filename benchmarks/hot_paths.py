@@ -0,0 +1,190 @@
+"""
+Benchmark the analysis and generation hot paths across input sizes.
+
+Every stage is swept over points-per-frame and frame counts; for each size the median wall time and
+the peak traced memory are recorded. Results are written as JSON, and `--compare` flags regressions
+against a stored baseline (exit status 1 when any stage is slower or larger than the tolerance).
+
+Usage:
+    python -m benchmarks.hot_paths --output bench.json
+    python -m benchmarks.hot_paths --compare bench.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+from scipy.spatial import ConvexHull
+
+from benchmarks.fixtures import sphere_points, synthetic_video
+from backend.src.features.faces import Faces
+from backend.src.features.ads_techniques import detect_anomalies
+from backend.src.utils.calculate_data import calculate_data
+from backend.src.utils.scenarios import (
+    time_series_frames,
+    scaled_sphere_frames,
+    harmonic_oscillating_frames
+)
+
+
+# Each case takes (num_points, num_frames), prepares its inputs and returns the callable to measure
+
+def _calculate_data_case(num_points, num_frames):
+    frames = [sphere_points(num_points, seed) for seed in range(num_frames)]
+    return lambda: [calculate_data(points) for points in frames]
+
+
+def _faces_simplify_case(num_points, num_frames):
+    hulls = [(points, ConvexHull(points)) for points in (sphere_points(num_points, seed) for seed in range(num_frames))]
+    return lambda: [Faces([points[s] for s in hull.simplices]).simplify() for points, hull in hulls]
+
+
+def _detect_anomalies_case(num_points, num_frames):
+    frames = [sphere_points(num_points, seed).tolist() for seed in range(num_frames)]
+    return lambda: [detect_anomalies(points) for points in frames]
+
+
+def _time_series_case(num_points, num_frames):
+    return lambda: time_series_frames(num_frames, num_points, 0.1, 0.1)
+
+
+def _sphere_case(num_points, num_frames):
+    return lambda: scaled_sphere_frames(num_points, num_frames, 0.5, 2.0, 3, 0.1, 0.1, 0.5)
+
+
+def _harmonic_case(num_points, num_frames):
+    return lambda: harmonic_oscillating_frames(num_points, num_frames, 0.1, 1.0, 0.05, 0.1, 1.5)
+
+
+def _video_case(num_points, num_frames):
+    import torch
+    from backend.src.models.monodepth2.networks import ResnetEncoder, DepthDecoder
+    from backend.src.utils.data_generator_from_video import build_video_pipeline
+
+    # Randomly initialised networks cost the same as the trained ones
+    torch.manual_seed(0)
+    encoder = ResnetEncoder(18, False).eval()
+    depth_decoder = DepthDecoder(num_ch_enc=encoder.num_ch_enc).eval()
+    path = synthetic_video(num_frames=num_frames)
+
+    def run():
+        pipeline = build_video_pipeline(path, encoder, depth_decoder, num_points_per_frame=num_points)
+        return list(pipeline.run())
+    run.cleanup = lambda: os.remove(path)
+    return run
+
+
+STAGES = {
+    "calculate_data": _calculate_data_case,
+    "faces_simplify": _faces_simplify_case,
+    "detect_anomalies": _detect_anomalies_case,
+    "time_series_generator": _time_series_case,
+    "sphere_generator": _sphere_case,
+    "harmonic_generator": _harmonic_case,
+    "video_to_point_clouds": _video_case,
+}
+
+
+def measure(function, repeat):
+    """
+    Return the median wall time of `function()` over `repeat` runs and its peak traced memory.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    # Memory is traced in a separate run so tracing overhead does not distort the timings
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return statistics.median(timings), peak
+
+
+def run(stages, points, frames, repeat, max_seconds):
+    results = []
+    for stage in stages:
+        for num_frames in frames:
+            for num_points in points:
+                np.random.seed(0)
+                case = STAGES[stage](num_points, num_frames)
+                try:
+                    seconds, peak = measure(case, repeat)
+                finally:
+                    getattr(case, "cleanup", lambda: None)()
+                result = {"stage": stage, "points": num_points, "frames": num_frames,
+                          "seconds": seconds, "peak_bytes": peak}
+                results.append(result)
+                print("{stage:24s} points={points:<7d} frames={frames:<4d} {seconds:10.4f}s {peak_bytes:>12d}B".format(**result))
+                # Larger inputs would only take longer; move on to the next sweep
+                if seconds > max_seconds:
+                    break
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results with a baseline run and return the list of regressions.
+    """
+    previous = {(r["stage"], r["points"], r["frames"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        reference = previous.get((result["stage"], result["points"], result["frames"]))
+        if reference is None:
+            continue
+        for field in ("seconds", "peak_bytes"):
+            if reference[field] > 0 and result[field] > reference[field] * (1 + tolerance):
+                regressions.append({
+                    "stage": result["stage"], "points": result["points"], "frames": result["frames"],
+                    "field": field, "baseline": reference[field], "current": result[field],
+                    "ratio": result[field] / reference[field],
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", default=[s for s in STAGES if s != "video_to_point_clouds"],
+                        choices=list(STAGES), help="Stages to run (the video stage needs torch and cv2)")
+    parser.add_argument("--points", nargs="+", type=int, default=[100, 1000, 10000, 100000])
+    parser.add_argument("--frames", nargs="+", type=int, default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-seconds", type=float, default=30.0,
+                        help="Skip the larger sizes of a sweep once one run exceeds this time")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown/growth")
+    args = parser.parse_args()
+
+    results = run(args.stages, sorted(args.points), sorted(args.frames), args.repeat, args.max_seconds)
+    report = {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(),
+                 "numpy": np.__version__, "timestamp": time.time()},
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION {stage} points={points} frames={frames} {field}: "
+                  "{baseline:.4g} -> {current:.4g} (x{ratio:.2f})".format(**regression))
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Measure the cold import time of the server and of the modules the process pool workers load.
+
+Every module is imported in a fresh interpreter (as a worker start or a `--reload` cycle does), a
+few times, and the median wall time is reported together with the slowest imports under it (from
+`python -X importtime`). The run fails (exit status 1) when an import takes longer than
+`--max-seconds` or loads one of the heavy modules that only video uploads need.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --max-seconds 2 --output imports.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported by the server process, and by every process pool worker
+DEFAULT_MODULES = ["backend.server", "backend.src.utils.scenarios"]
+
+# Loaded on the first video upload only
+HEAVY_MODULES = ["torch", "torchvision", "cv2", "open3d"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "heavy": sorted(m for m in {heavy!r} if m in sys.modules)}}))
+"""
+
+
+def parse_importtime(stderr, top):
+    """
+    Slowest imports (cumulative microseconds) from the output of `python -X importtime`.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports.append({"module": name.strip(), "cumulative_us": int(cumulative)})
+    return sorted(imports, key=lambda entry: entry["cumulative_us"], reverse=True)[:top]
+
+
+def measure(module, repeat, environment, top=10):
+    """
+    Import `module` in `repeat` fresh interpreters and return the median time, the heavy modules it
+    loaded and its slowest imports.
+    """
+    runs = []
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=ROOT, env=environment, capture_output=True, text=True
+        )
+        if process.returncode != 0:
+            raise RuntimeError("Importing {} failed:\n{}".format(module, process.stderr[-2000:]))
+        runs.append((json.loads(process.stdout.splitlines()[-1]), process.stderr))
+    result, stderr = runs[-1]
+    return {
+        "module": module,
+        "seconds": statistics.median(run["seconds"] for run, _ in runs),
+        "heavy": result["heavy"],
+        "slowest": parse_importtime(stderr, top),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=3.0, help="Slowest acceptable median import time")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    failures = []
+    results = []
+    with tempfile.TemporaryDirectory() as result_dir:
+        # Importing the server opens its result store; keep it out of the working tree
+        environment = dict(os.environ, MESH_RESULT_DIR=result_dir)
+        for module in args.modules:
+            result = measure(module, args.repeat, environment)
+            results.append(result)
+            print("{module:32s} {seconds:8.3f}s".format(**result))
+            for entry in result["slowest"]:
+                print("    {cumulative_us:>10d}us  {module}".format(**entry))
+            if result["seconds"] > args.max_seconds:
+                failures.append("{} imports in {:.2f}s (limit {:.2f}s)".format(module, result["seconds"], args.max_seconds))
+            if result["heavy"]:
+                failures.append("{} loads {}".format(module, ", ".join(result["heavy"])))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"python": sys.version, "results": results}, file, indent=2)
+
+    for failure in failures:
+        print("FAILED " + failure)
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
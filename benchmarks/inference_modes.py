@@ -0,0 +1,66 @@
+"""
+Compare the depth network inference modes against the fp32 reference.
+
+For every mode the script reports the disparity drift from fp32 (accuracy delta) and the CPU
+throughput. Without `--weights`, randomly initialised networks are used, which is enough to
+compare speed but not accuracy.
+
+Usage:
+    python -m benchmarks.inference_modes [--weights ./backend/src/models/monodepth2/mono+stereo_640x192]
+"""
+import argparse
+import json
+import os
+
+import torch
+
+from backend.src.models.monodepth2.networks import ResnetEncoder, DepthDecoder
+from backend.src.utils.data_generator_from_video import load_model
+from backend.src.utils.inference_modes import (
+    INFERENCE_MODES,
+    INPUT_SIZE,
+    optimize_depth_model,
+    disparity_delta,
+    measure_throughput
+)
+
+
+def reference_models(weights):
+    if weights:
+        return load_model(os.path.join(weights, "encoder.pth"), os.path.join(weights, "depth.pth"))
+    encoder = ResnetEncoder(18, False).eval()
+    depth_decoder = DepthDecoder(num_ch_enc=encoder.num_ch_enc).eval()
+    return encoder, depth_decoder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", help="Directory holding encoder.pth and depth.pth")
+    parser.add_argument("--modes", nargs="+", default=list(INFERENCE_MODES), choices=INFERENCE_MODES)
+    parser.add_argument("--frames", type=int, default=8, help="Number of input frames per measurement")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    parser.add_argument("--max-delta", type=float, default=0.05, help="Largest acceptable max_abs_diff")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    generator = torch.Generator().manual_seed(1)
+    inputs = [torch.rand(1, 3, *INPUT_SIZE, generator=generator) for _ in range(args.frames)]
+
+    reference = reference_models(args.weights)
+    results = {}
+    for mode in args.modes:
+        models = optimize_depth_model(*reference, mode=mode)
+        result = measure_throughput(models, inputs)
+        result.update(disparity_delta(reference, models, inputs))
+        result["within_tolerance"] = result["max_abs_diff"] <= args.max_delta
+        results[mode] = result
+
+    print(json.dumps(results, indent=2))
+    if not all(result["within_tolerance"] for result in results.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Replay a mix of API requests against a locally started server and report latency percentiles.
+
+The harness starts `backend.server:app` with uvicorn on a free local port (fully offline), seeds a
+stored result for `retrieve_data`, then sends a weighted mix of the scenario endpoints either from a
+fixed number of concurrent clients (`--concurrency`) or at a fixed arrival rate (`--rate`). For
+each endpoint it reports p50/p95/p99 latency, throughput, error rate and mean response size.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 8 --duration 30
+    python -m benchmarks.load_test --rate 20 --duration 60 --mix mix.json --output load.json
+
+A mix file maps endpoint names (see DEFAULT_MIX) to weights, e.g. {"time_series": 3, "retrieve_data": 5}.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.fixtures import sphere_points, synthetic_video
+from backend.src.utils import config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Endpoint name -> relative weight in the mix
+DEFAULT_MIX = {
+    "ready_dataset": 1,
+    "time_series": 2,
+    "animated_sphere": 2,
+    "hollow_sphere": 2,
+    "harmonic_oscillating": 1,
+    "upload_video": 0,
+    "retrieve_data": 4,
+}
+
+# Endpoint name -> (method, path, JSON body)
+REQUESTS = {
+    "ready_dataset": ("POST", "/generate_ready_dataset_points",
+                      {"ready_data": "serverMachineDatasetPca", "start_index": 0, "end_index": 10}),
+    "time_series": ("POST", "/generate_time_series_noise_anomalies",
+                    {"num_frames": 10, "num_points_per_frame": 100, "noise_level": 0.1, "anomaly_level": 0.2}),
+    "animated_sphere": ("POST", "/generate_animated_scaled_sphere",
+                        {"num_points": 200, "num_frames": 10, "scale_min": 0.5, "scale_max": 2.0, "num_cycles": 3}),
+    "hollow_sphere": ("POST", "/generate_custom_scaled_hollow_sphere",
+                      {"num_points": 200, "num_frames": 10, "scale_min": 0.2, "scale_max": 1.5, "num_cycles": 3}),
+    "harmonic_oscillating": ("POST", "/generate_custom_harmonic_oscillating",
+                             {"num_points": 100, "num_frames": 10, "d": 0.1, "w0": 1.0}),
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, environment):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.server:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        # Dataset and model paths in the server are relative to the repository root
+        cwd=ROOT, env=environment
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Server exited with status {}".format(process.returncode))
+        try:
+            if httpx.get("http://127.0.0.1:{}/metrics".format(port), timeout=1.0).status_code < 500:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Server did not start within 60 seconds")
+
+
+def seed_result(result_dir):
+    """
+    Store a small processed sequence directly in the server's result store and return its id.
+    """
+    from backend.src.utils.calculate_data import calculate_data
+    from backend.src.utils.result_store import ResultStore
+
+    store = ResultStore(result_dir)
+    return store.put(calculate_data(sphere_points(200, seed)) for seed in range(10))
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}  # endpoint -> list of (seconds, status, bytes)
+
+    def add(self, endpoint, seconds, status, size):
+        self.samples.setdefault(endpoint, []).append((seconds, status, size))
+
+    def report(self, duration):
+        report = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            latencies = np.array([s[0] for s in samples])
+            errors = sum(1 for s in samples if not 200 <= s[1] < 300)
+            report[endpoint] = {
+                "requests": len(samples),
+                "throughput_rps": len(samples) / duration,
+                "error_rate": errors / len(samples),
+                "p50_ms": float(np.percentile(latencies, 50) * 1000),
+                "p95_ms": float(np.percentile(latencies, 95) * 1000),
+                "p99_ms": float(np.percentile(latencies, 99) * 1000),
+                "mean_bytes": float(np.mean([s[2] for s in samples])),
+                "statuses": {str(code): sum(1 for s in samples if s[1] == code) for code in sorted({s[1] for s in samples})},
+            }
+        return report
+
+
+async def send(client, endpoint, data_id, video_path, recorder):
+    start = time.perf_counter()
+    try:
+        if endpoint == "retrieve_data":
+            response = await client.get("/retrieve_data/{}".format(data_id))
+        elif endpoint == "upload_video":
+            with open(video_path, "rb") as video:
+                response = await client.post("/uploadvideo/", files={"file": ("clip.avi", video)},
+                                             data={"num_points_per_frame": "200"})
+        else:
+            method, path, body = REQUESTS[endpoint]
+            response = await client.request(method, path, json=body)
+        status, size = response.status_code, len(response.content)
+    except httpx.HTTPError:
+        status, size = 0, 0
+    recorder.add(endpoint, time.perf_counter() - start, status, size)
+
+
+async def closed_loop(choose, concurrency, duration, send_one):
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            await send_one(choose())
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def open_loop(choose, rate, duration, send_one):
+    deadline = time.perf_counter() + duration
+    tasks = []
+    while time.perf_counter() < deadline:
+        tasks.append(asyncio.create_task(send_one(choose())))
+        # Poisson arrivals at the target rate
+        await asyncio.sleep(random.expovariate(rate))
+    await asyncio.gather(*tasks)
+
+
+async def run_load(base_url, mix, args, data_id, video_path):
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    choose = lambda: random.choices(names, weights)[0]
+    recorder = Recorder()
+
+    limits = httpx.Limits(max_connections=max(args.concurrency, 100))
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        send_one = lambda endpoint: send(client, endpoint, data_id, video_path, recorder)
+        start = time.perf_counter()
+        if args.rate:
+            await open_loop(choose, args.rate, args.duration, send_one)
+        else:
+            await closed_loop(choose, args.concurrency, args.duration, send_one)
+        elapsed = time.perf_counter() - start
+
+    return recorder.report(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent clients (closed loop)")
+    parser.add_argument("--rate", type=float, default=None, help="Target requests per second (open loop)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--mix", help="JSON file mapping endpoint names to weights")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--url", help="Use an already running server instead of starting one")
+    parser.add_argument("--result-dir", default=config.RESULT_DIR,
+                        help="Result store of the server given by --url, used to seed retrieve_data")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    mix = dict(DEFAULT_MIX)
+    if args.mix:
+        with open(args.mix) as file:
+            mix.update(json.load(file))
+    unknown = set(mix) - set(DEFAULT_MIX)
+    if unknown:
+        parser.error("unknown endpoints in mix: {}".format(", ".join(sorted(unknown))))
+
+    workdir = tempfile.mkdtemp(prefix="mesh_load_")
+    # A locally started server gets its own result store so runs do not touch stored results
+    result_dir = args.result_dir if args.url else os.path.join(workdir, "results")
+    server = None
+    try:
+        data_id = seed_result(result_dir)
+        video_path = synthetic_video(directory=workdir) if mix.get("upload_video") else None
+
+        base_url = args.url
+        if base_url is None:
+            port = free_port()
+            server = start_server(port, dict(os.environ, MESH_RESULT_DIR=result_dir))
+            base_url = "http://127.0.0.1:{}".format(port)
+        report = asyncio.run(run_load(base_url, mix, args, data_id, video_path))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("{:22s} {:>8s} {:>8s} {:>7s} {:>9s} {:>9s} {:>9s} {:>11s}".format(
+        "endpoint", "requests", "rps", "errors", "p50 ms", "p95 ms", "p99 ms", "mean bytes"))
+    for endpoint, row in report.items():
+        print("{:22s} {:>8d} {:>8.2f} {:>6.1%} {:>9.1f} {:>9.1f} {:>9.1f} {:>11.0f}".format(
+            endpoint, row["requests"], row["throughput_rps"], row["error_rate"],
+            row["p50_ms"], row["p95_ms"], row["p99_ms"], row["mean_bytes"]))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"mix": mix, "concurrency": args.concurrency, "rate": args.rate,
+                       "duration": args.duration, "endpoints": report}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
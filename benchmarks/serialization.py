@@ -0,0 +1,85 @@
+"""
+Compare the NumPy-aware frame encoder with the previous list-based JSON path.
+
+The previous path converted every array with `.tolist()` in `calculate_data`, walked the result
+with `jsonable_encoder` and encoded it with `json.dumps`. The current path hands the arrays to
+`serialization.encode` (orjson when installed, the stdlib encoder otherwise). The `sequence` row is
+the quantized, delta-encoded and compressed sequence codec served with `?format=sequence`.
+
+Frames come from the animated sphere scenario, whose points keep their identity across frames.
+
+Usage:
+    python -m benchmarks.serialization --points 1000 10000 100000 --frames 10 --decimals 4
+"""
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from backend.src.utils import serialization
+from backend.src.utils.calculate_data import calculate_data
+from backend.src.utils.scenarios import scaled_sphere_frames
+from backend.src.utils.sequence_codec import encode_sequence
+
+
+def legacy_encode(frames):
+    lists = [{key: value.tolist() if hasattr(value, "tolist") else [face.tolist() for face in value]
+              for key, value in frame.to_dict().items()} for frame in frames]
+    return json.dumps(jsonable_encoder(lists), ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def stdlib_encode(frames, decimals):
+    # Forces the fallback encoder even when orjson is installed
+    orjson, serialization.orjson = serialization.orjson, None
+    try:
+        return serialization.encode(frames, decimals)
+    finally:
+        serialization.orjson = orjson
+
+
+def median_seconds(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--frames", type=int, default=10)
+    parser.add_argument("--decimals", type=int, default=None, help="Float precision of the new encoder")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    encoders = {
+        "legacy": legacy_encode,
+        "stdlib": lambda frames: stdlib_encode(frames, args.decimals),
+    }
+    if serialization.orjson is not None:
+        encoders["orjson"] = lambda frames: serialization.encode(frames, args.decimals)
+    encoders["sequence"] = encode_sequence
+
+    print("{:>8s} {:8s} {:>10s} {:>8s} {:>12s} {:>8s}".format(
+        "points", "encoder", "seconds", "speedup", "bytes", "smaller"))
+    for num_points in args.points:
+        np.random.seed(0)
+        points = scaled_sphere_frames(num_points, args.frames, 0.5, 2.0, 3, 0.05, 0.05, 0.5)
+        frames = [calculate_data(frame) for frame in points]
+        baseline = None
+        for name, function in encoders.items():
+            seconds = median_seconds(lambda: function(frames), args.repeat)
+            size = len(function(frames))
+            baseline = baseline or (seconds, size)
+            print("{:>8d} {:8s} {:>10.4f} {:>7.1f}x {:>12d} {:>7.1f}x".format(
+                num_points, name, seconds, baseline[0] / seconds, size, baseline[1] / size))
+
+
+if __name__ == "__main__":
+    main()
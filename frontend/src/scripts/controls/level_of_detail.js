@@ -0,0 +1,36 @@
+import { fetchFrameDetail } from '../data/fetch_data.js';
+import { framesData, camera } from '../main.js';
+import { frameIndexForDetails } from '../animation/animation.js';
+import { updateScene } from '../scene/scene_update.js';
+
+// Zooming in by this factor since the last detail request fetches more points of the frame
+const ZOOM_STEP = 0.8;
+
+/**
+ * Fetches more points of the displayed frame as the camera zooms in, for frames decimated to a point budget.
+ * 
+ * @param {OrbitControls} controls - The orbit controls of the camera.
+ */
+export function setupLevelOfDetail(controls) {
+    let detailDistance = camera.position.distanceTo(controls.target);
+    let loading = false;
+
+    controls.addEventListener('end', async () => {
+        const distance = camera.position.distanceTo(controls.target);
+        if (loading || distance > detailDistance * ZOOM_STEP) {
+            return;
+        }
+        const frame = framesData[frameIndexForDetails];
+        if (!frame || !frame.lod) {
+            return;
+        }
+
+        // Each zoom step doubles the points of the frame
+        loading = true;
+        detailDistance = distance;
+        if (await fetchFrameDetail(frame, frame.lod.kept_points)) {
+            updateScene(frame);
+        }
+        loading = false;
+    });
+}
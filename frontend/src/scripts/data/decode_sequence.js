@@ -0,0 +1,110 @@
+// Decoder for the compact sequence format returned with `?format=sequence`
+// (see backend/src/utils/sequence_codec.py for the layout).
+
+const MAGIC = 'MSQ1';
+const OFFSET = 32768;
+
+/**
+ * Whether the browser can inflate sequence payloads.
+ *
+ * @returns {Boolean} True when DecompressionStream is available.
+ */
+export function supportsSequenceFormat() {
+    return typeof DecompressionStream !== 'undefined';
+}
+
+/**
+ * Inflates a zlib-compressed buffer.
+ *
+ * @param {ArrayBuffer} buffer The compressed payload.
+ *
+ * @returns {ArrayBuffer} The inflated bytes.
+ */
+async function inflate(buffer) {
+    const stream = new Blob([buffer]).stream().pipeThrough(new DecompressionStream('deflate'));
+    return await new Response(stream).arrayBuffer();
+}
+
+/**
+ * Decodes a sequence payload into frames shaped like the JSON response.
+ *
+ * @param {ArrayBuffer} buffer The compressed payload.
+ *
+ * @returns {Array} The frames, each with all_points, inner_points, outermost_points, anomaly_points and faces.
+ */
+export async function decodeSequence(buffer) {
+    const data = await inflate(buffer);
+    const bytes = new Uint8Array(data);
+    if (new TextDecoder().decode(bytes.subarray(0, 4)) !== MAGIC) {
+        throw new Error('Not a mesh sequence payload');
+    }
+
+    const headerLength = new DataView(data).getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(bytes.subarray(8, 8 + headerLength)));
+    const [lowerX, lowerY, lowerZ] = header.lower;
+    const [scaleX, scaleY, scaleZ] = header.scale;
+    let offset = 8 + headerLength;
+
+    // Sections are not aligned, so each one is copied before being viewed as a typed array
+    function read(ArrayType, count) {
+        const length = count * ArrayType.BYTES_PER_ELEMENT;
+        const array = new ArrayType(data.slice(offset, offset + length));
+        offset += length;
+        return array;
+    }
+
+    // Planar int16 coordinates (x..., y..., z...) to [x, y, z] points
+    function toPoints(planar, count) {
+        const points = new Array(count);
+        for (let i = 0; i < count; i++) {
+            points[i] = [
+                (planar[i] + OFFSET) * scaleX + lowerX,
+                (planar[count + i] + OFFSET) * scaleY + lowerY,
+                (planar[2 * count + i] + OFFSET) * scaleZ + lowerZ
+            ];
+        }
+        return points;
+    }
+
+    const frames = [];
+    let previous = null;
+    for (const info of header.frames) {
+        const n = info.points;
+        const quantized = read(Int16Array, 3 * n);
+        if (info.delta) {
+            // Int16Array stores wrap around exactly like the encoder's int16 arithmetic
+            for (let i = 0; i < quantized.length; i++) {
+                quantized[i] += previous[i];
+            }
+        }
+        previous = quantized;
+        const allPoints = toPoints(quantized, n);
+
+        const excluded = read(Uint8Array, (n + 7) >> 3);
+        const outermost = read(Uint32Array, info.hull);
+        const anomalies = read(Int16Array, 3 * info.anomalies);
+        const faceSizes = read(Uint16Array, info.faces);
+        const faceIndices = read(Uint32Array, info.face_vertices);
+
+        const innerPoints = allPoints.filter((_, i) => !(excluded[i >> 3] & (1 << (i & 7))));
+        const faces = [];
+        let start = 0;
+        for (const size of faceSizes) {
+            faces.push(Array.from(faceIndices.subarray(start, start + size), index => allPoints[index]));
+            start += size;
+        }
+
+        const frame = {
+            all_points: allPoints,
+            inner_points: innerPoints,
+            outermost_points: Array.from(outermost, index => allPoints[index]),
+            anomaly_points: toPoints(anomalies, info.anomalies),
+            faces: faces
+        };
+        if (info.lod) {
+            frame.lod = info.lod;
+        }
+        frames.push(frame);
+    }
+    return frames;
+}
@@ -1,35 +1,42 @@
 import { hideLoadingScreen } from '../ui/loading_screen.js';
+import { decodeSequence, supportsSequenceFormat } from './decode_sequence.js';
+
+// Request the compact binary sequence encoding when the browser can inflate it
+const RESPONSE_FORMAT = supportsSequenceFormat() ? 'sequence' : 'json';
+
+// Scenarios 1-5 take an optional point budget: frames are then decimated to about that many points,
+// and more detail is fetched with fetchFrameDetail as the camera zooms in
 
 // Scenario 1: Fetch Random Scaled Points
-export async function fetchReadyDataset(readyData, startIndex, endIndex) {
+export async function fetchReadyDataset(readyData, startIndex, endIndex, pointBudget = null) {
     const url = 'http://127.0.0.1:8000/generate_ready_dataset_points';
-    const payload = { ready_data: readyData, start_index: startIndex, end_index: endIndex };
+    const payload = { ready_data: readyData, start_index: startIndex, end_index: endIndex, point_budget: pointBudget };
     return await postData(url, payload);
 }
 
 // Scenario 2: Fetch Time Series with Noise and Anomalies
-export async function fetchTimeSeriesNoiseAnomalies(numFrames, numPointsPerFrame, noiseLevel, anomalyLevel) {
+export async function fetchTimeSeriesNoiseAnomalies(numFrames, numPointsPerFrame, noiseLevel, anomalyLevel, pointBudget = null) {
     const url = 'http://127.0.0.1:8000/generate_time_series_noise_anomalies';
-    const payload = { num_frames: numFrames, num_points_per_frame: numPointsPerFrame, noise_level: noiseLevel, anomaly_level: anomalyLevel };
+    const payload = { num_frames: numFrames, num_points_per_frame: numPointsPerFrame, noise_level: noiseLevel, anomaly_level: anomalyLevel, point_budget: pointBudget };
     return await postData(url, payload);
 }
 
 // Scenario 3: Fetch Animated Scaled Sphere Point Cloud
-export async function fetchAnimatedScaledSphere(numPoints, numFrames, numCycles, scaleMin, scaleMax, noiseLevel, anomalyPercentage, distortionCoefficient) {
+export async function fetchAnimatedScaledSphere(numPoints, numFrames, numCycles, scaleMin, scaleMax, noiseLevel, anomalyPercentage, distortionCoefficient, pointBudget = null) {
     const url = 'http://127.0.0.1:8000/generate_animated_scaled_sphere';
-    const payload = { num_points: numPoints, num_frames: numFrames, num_cycles: numCycles, scale_min: scaleMin, scale_max: scaleMax, noise_level: noiseLevel, anomaly_percentage: anomalyPercentage, distortion_coefficient: distortionCoefficient };
+    const payload = { num_points: numPoints, num_frames: numFrames, num_cycles: numCycles, scale_min: scaleMin, scale_max: scaleMax, noise_level: noiseLevel, anomaly_percentage: anomalyPercentage, distortion_coefficient: distortionCoefficient, point_budget: pointBudget };
     return await postData(url, payload);
 }
 
 // Scenario 4: Fetch Custom Scaled Hollow Sphere Point Cloud
-export async function fetchCustomScaledHollowSphere(numPoints, numFrames, numCycles, scaleMin, scaleMax, noiseLevel, anomalyPercentage, distortionCoefficient) {
+export async function fetchCustomScaledHollowSphere(numPoints, numFrames, numCycles, scaleMin, scaleMax, noiseLevel, anomalyPercentage, distortionCoefficient, pointBudget = null) {
     const url = 'http://127.0.0.1:8000/generate_custom_scaled_hollow_sphere';
-    const payload = { num_points: numPoints, num_frames: numFrames, num_cycles: numCycles, scale_min: scaleMin, scale_max: scaleMax, noise_level: noiseLevel, anomaly_percentage: anomalyPercentage, distortion_coefficient: distortionCoefficient };
+    const payload = { num_points: numPoints, num_frames: numFrames, num_cycles: numCycles, scale_min: scaleMin, scale_max: scaleMax, noise_level: noiseLevel, anomaly_percentage: anomalyPercentage, distortion_coefficient: distortionCoefficient, point_budget: pointBudget };
     return await postData(url, payload);
 }
 
 // Scenario 5: Fetch Custom Harmonic Oscillating Point Cloud
-export async function fetchCustomHarmonicOscillating(numPoints, numFrames, d, w0, noiseLevel, anomalyPercentage, distortionCoefficient) {
+export async function fetchCustomHarmonicOscillating(numPoints, numFrames, d, w0, noiseLevel, anomalyPercentage, distortionCoefficient, pointBudget = null) {
     const url = 'http://127.0.0.1:8000/generate_custom_harmonic_oscillating';
     const payload = { 
         num_points: numPoints, 
@@ -38,21 +45,21 @@ export async function fetchCustomHarmonicOscillating(numPoints, numFrames, d, w0
         w0: w0, 
         noise_level: noiseLevel, 
         anomaly_percentage: anomalyPercentage, 
-        distortion_coefficient: distortionCoefficient 
+        distortion_coefficient: distortionCoefficient,
+        point_budget: pointBudget
     };
     return await postData(url, payload);
 }
 
-
 // Scenario 6: Fetch a Time Series Point Cloud by Loading a video file
 export async function fetchVideo(dataRef) {
-    const url = `http://127.0.0.1:8000/retrieve_data/${dataRef}`;
+    const url = `http://127.0.0.1:8000/retrieve_data/${dataRef}?format=${RESPONSE_FORMAT}`;
     try {
         const response = await fetch(url);
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
-        const data = await response.json();
+        const data = await readFrames(response);
         hideLoadingScreen();  // Hide the loading screen on successful data retrieval
         return data;
     } catch (error) {
@@ -63,6 +70,62 @@ export async function fetchVideo(dataRef) {
 }
 
 
+// Level of detail: fetch more points of a decimated frame (requested with a point_budget)
+/**
+ * Fetches the next points of a decimated frame and adds them to it, e.g. when the camera zooms in.
+ * 
+ * @param {Object} frame A frame carrying `lod` information.
+ * @param {Number} count Number of points to add.
+ * 
+ * @returns {Boolean} True if points were added, false when the frame is complete or on error.
+ */
+export async function fetchFrameDetail(frame, count) {
+    const lod = frame.lod;
+    if (!lod || lod.next >= lod.total_points) {
+        return false;
+    }
+    const url = `http://127.0.0.1:8000/frame_detail/${lod.data_id}/${lod.frame_index}?start=${lod.next}&count=${count}`;
+    try {
+        const response = await fetch(url);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const detail = await response.json();
+        detail.points.forEach((point, i) => {
+            frame.all_points.push(point);
+            if (detail.inner[i]) {
+                frame.inner_points.push(point);
+            }
+        });
+        if (frame.point_indices) {
+            frame.point_indices.push(...detail.point_indices);
+        }
+        lod.next = detail.end;
+        lod.kept_points += detail.points.length;
+        return detail.points.length > 0;
+    } catch (error) {
+        console.error('Error fetching frame detail:', error);
+        return false;
+    }
+}
+
+
+// Helper function decoding a response in either format
+/**
+ * Reads the frames of a response, decoding the sequence format when the server used it.
+ * 
+ * @param {Response} response The fetch response.
+ * 
+ * @returns {Array} The frames.
+ */
+async function readFrames(response) {
+    if (response.headers.get('Content-Type') === 'application/x-mesh-sequence') {
+        return await decodeSequence(await response.arrayBuffer());
+    }
+    return await response.json();
+}
+
+
 // Helper function for POST requests
 /**
  * Sends a POST request to the server and returns the response.
@@ -74,13 +137,13 @@ export async function fetchVideo(dataRef) {
  */
 async function postData(url, payload) {
     try {
-        const response = await fetch(url, {
+        const response = await fetch(`${url}?format=${RESPONSE_FORMAT}`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(payload)
         });
 
-        const frames = await response.json();
+        const frames = await readFrames(response);
         console.log('Response from server:', frames);
         hideLoadingScreen();
         return frames;
@@ -14,6 +14,7 @@ import { createPlanes } from './scene/plane.js';
 import { handleTimeBarClick, updateProgressBar } from './controls/time_bar.js';
 import { exportToImage } from './controls/export.js';
 import { populateDropdown } from './controls/dropdown_points.js';
+import { setupLevelOfDetail } from './controls/level_of_detail.js';
 
 // Global variables for scene
 export let scene, camera, renderer;
@@ -47,13 +48,16 @@ async function main() {
     const urlParams = new URLSearchParams(window.location.search);
     const scenario = urlParams.get('scenario');
 
+    // Optional point budget: frames are decimated, and more points are loaded when zooming in
+    const pointBudget = urlParams.has('pointBudget') ? parseInt(urlParams.get('pointBudget'), 10) : null;
+
     // Fetch data based on scenario
     switch (scenario) {
         case '1':
             const readyData = urlParams.get('readyData');
             const startIndex = parseInt(urlParams.get('startIndex'), 10);
             const endIndex = parseInt(urlParams.get('endIndex'), 10);
-            framesData = await fetchReadyDataset(readyData, startIndex, endIndex);
+            framesData = await fetchReadyDataset(readyData, startIndex, endIndex, pointBudget);
             break;
 
         case '2':
@@ -61,7 +65,7 @@ async function main() {
             const numPointsPerFrame = parseInt(urlParams.get('numPointsPerFrame'), 10);
             const noiseLevel1 = parseFloat(urlParams.get('noiseLevel'));
             const anomalyLevel = parseFloat(urlParams.get('anomalyLevel'));
-            framesData = await fetchTimeSeriesNoiseAnomalies(numFrames2, numPointsPerFrame, noiseLevel1, anomalyLevel);
+            framesData = await fetchTimeSeriesNoiseAnomalies(numFrames2, numPointsPerFrame, noiseLevel1, anomalyLevel, pointBudget);
             break;
 
         case '3':
@@ -74,7 +78,7 @@ async function main() {
             const anomalyPercentage1 = parseFloat(urlParams.get('anomalyPercentage'));
             const distortionCoefficient1 = parseFloat(urlParams.get('distortionCoefficient'));
             console.log("scaleMin: ", scaleMin);
-            framesData = await fetchAnimatedScaledSphere(numPoints3, numFrames3, numCycles, scaleMin, scaleMax, noiseLevel2, anomalyPercentage1, distortionCoefficient1);
+            framesData = await fetchAnimatedScaledSphere(numPoints3, numFrames3, numCycles, scaleMin, scaleMax, noiseLevel2, anomalyPercentage1, distortionCoefficient1, pointBudget);
             break;
 
         case '4':
@@ -86,7 +90,7 @@ async function main() {
             const noiseLevel3 = parseFloat(urlParams.get('noiseLevel'));
             const anomalyPercentage2 = parseFloat(urlParams.get('anomalyPercentage'));
             const distortionCoefficient2 = parseFloat(urlParams.get('distortionCoefficient'));
-            framesData = await fetchCustomScaledHollowSphere(numPoints4, numFrames4, numCycles4, scaleMin4, scaleMax4, noiseLevel3, anomalyPercentage2, distortionCoefficient2);
+            framesData = await fetchCustomScaledHollowSphere(numPoints4, numFrames4, numCycles4, scaleMin4, scaleMax4, noiseLevel3, anomalyPercentage2, distortionCoefficient2, pointBudget);
             break;
 
         case '5':
@@ -97,7 +101,7 @@ async function main() {
             const noiseLevel5 = parseFloat(urlParams.get('noiseLevel'));
             const anomalyPercentage5 = parseFloat(urlParams.get('anomalyPercentage'));
             const distortionCoefficient5 = parseFloat(urlParams.get('distortionCoefficient'));
-            framesData = await fetchCustomHarmonicOscillating(numPoints5, numFrames5, d5, w05, noiseLevel5, anomalyPercentage5, distortionCoefficient5);
+            framesData = await fetchCustomHarmonicOscillating(numPoints5, numFrames5, d5, w05, noiseLevel5, anomalyPercentage5, distortionCoefficient5, pointBudget);
             break;
             
         case '6':
@@ -285,8 +289,9 @@ function init(frameData) {
         }
     );
 
-    // Add orbit controls
-    addOrbitControls(camera, renderer);
+    // Add orbit controls, and load more points of decimated frames when zooming in
+    const controls = addOrbitControls(camera, renderer);
+    setupLevelOfDetail(controls);
     
     // Add event listener for mouse move
     document.addEventListener('mousemove', onDocumentMouseMove, false);
@@ -36,8 +36,10 @@ export function createScene(postion_of_camera) {
  * 
  * @param {THREE.Camera} camera - The camera to which the controls will be added.
  * @param {THREE.Renderer} renderer - The renderer on which the camera is rendering.
+ * 
+ * @returns {OrbitControls} The orbit controls.
  */
 export function addOrbitControls(camera, renderer) {
     // Initialize orbit controls for interactive camera movement
-    new OrbitControls(camera, renderer.domElement);
+    return new OrbitControls(camera, renderer.domElement);
 }
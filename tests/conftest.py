@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# Settings are read when backend.src.utils.config is imported: keep the result store out of the
+# working tree and the process pool small
+os.environ.setdefault("MESH_RESULT_DIR", os.path.join(tempfile.mkdtemp(prefix="mesh_tests_"), "results"))
+os.environ.setdefault("MESH_CPU_WORKERS", "2")
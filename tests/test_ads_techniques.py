@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from sklearn.cluster import DBSCAN
+
+from backend.src.features.ads_techniques import TemporalAnomalyTracker, detect_anomalies
+
+
+def dbscan_noise(points, eps, min_samples):
+    return DBSCAN(eps=eps, min_samples=min_samples).fit(points).labels_ == -1
+
+
+def drifting_frames(num_frames=12, num_points=300, step=0.05, seed=0):
+    # Correlated frames: clusters plus scattered points, every point drifting a little per frame
+    rng = np.random.default_rng(seed)
+    centres = rng.uniform(-5, 5, size=(4, 3))
+    points = np.concatenate([centres[rng.integers(4, size=num_points - 40)] + rng.normal(scale=0.6, size=(num_points - 40, 3)),
+                             rng.uniform(-8, 8, size=(40, 3))])
+    for _ in range(num_frames):
+        points = points + rng.normal(scale=step, size=points.shape)
+        yield points
+
+
+@pytest.mark.parametrize("eps, min_samples", [(1.0, 2), (0.8, 4), (1.5, 6)])
+def test_noise_matches_dbscan_on_every_frame(eps, min_samples):
+    tracker = TemporalAnomalyTracker(eps=eps, min_samples=min_samples)
+    for points in drifting_frames():
+        tracker.update(points)
+        np.testing.assert_array_equal(tracker.noise, dbscan_noise(points, eps, min_samples))
+    # Correlated frames reuse most neighbourhoods instead of querying every point again
+    assert tracker.requeried < 12 * 300
+
+
+def test_noise_matches_dbscan_across_large_moves_and_size_changes():
+    tracker = TemporalAnomalyTracker(eps=1.0, min_samples=3)
+    frames = list(drifting_frames(num_frames=4, step=1.0)) + list(drifting_frames(num_frames=3, num_points=200, seed=1))
+    for points in frames:
+        tracker.update(points)
+        np.testing.assert_array_equal(tracker.noise, dbscan_noise(points, 1.0, 3))
+
+
+def test_duplicate_points():
+    points = np.concatenate([np.zeros((5, 3)), np.ones((1, 3)) * 10, np.random.default_rng(0).normal(size=(20, 3))])
+    tracker = TemporalAnomalyTracker(eps=1.0, min_samples=3)
+    for _ in range(2):
+        tracker.update(points)
+        np.testing.assert_array_equal(tracker.noise, dbscan_noise(points, 1.0, 3))
+    np.testing.assert_array_equal(points[tracker.noise], detect_anomalies(points, eps=1.0, min_samples=3))
+
+
+def test_alerts_follow_points_leaving_their_cluster():
+    cluster = np.random.default_rng(0).normal(scale=0.1, size=(20, 3))
+    outlier = np.array([[50.0, 50.0, 50.0]])
+    tracker = TemporalAnomalyTracker(eps=1.0, min_samples=2, decay=0.5, enter=0.5, exit=0.2)
+
+    def frame(leaving_at):
+        points = np.concatenate([cluster, outlier])
+        points[0] = leaving_at
+        return points
+
+    tracker.update(frame(cluster[0]))
+    # Point 0 leaves its cluster: score 0.5 raises the alert; the outlier was never a member
+    alerts = tracker.update(frame([20.0, 0.0, 0.0]))
+    np.testing.assert_array_equal(alerts, [[20.0, 0.0, 0.0]])
+    # Back in the cluster, the alert holds until the score drops below `exit`
+    assert tracker.alerts[0] and not tracker.alerts[-1]
+    tracker.update(frame(cluster[0]))
+    assert tracker.alerts[0]
+    tracker.update(frame(cluster[0]))
+    assert not tracker.alerts.any()
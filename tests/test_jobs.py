@@ -0,0 +1,76 @@
+import asyncio
+import os
+import signal
+import time
+
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+
+from backend.src.utils import jobs
+
+
+def kill_worker():
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+@pytest.fixture
+def executor():
+    workers = jobs._executor_workers
+    jobs.shutdown_executor()
+    jobs.configure_executor(1)
+    yield
+    jobs.shutdown_executor()
+    jobs.configure_executor(workers)
+
+
+def test_broken_pool_is_replaced(executor):
+    assert asyncio.run(jobs.run_cpu(pow, 2, 10)) == 1024
+
+    # A worker dying fails the calls of its pool
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(jobs.run_cpu(kill_worker))
+    assert jobs.executor_status()["state"] == "broken"
+
+    restarts = jobs.executor_status()["restarts"]
+    assert asyncio.run(jobs.run_cpu(pow, 2, 10)) == 1024
+    assert jobs.call_cpu(pow, 3, 3) == 27
+    assert jobs.executor_status() == {"state": "running", "workers": 1, "restarts": restarts + 1}
+
+
+def test_recover_executor_replaces_broken_pool(executor):
+    with pytest.raises(BrokenProcessPool):
+        jobs.call_cpu(kill_worker)
+
+    jobs.recover_executor()
+    assert jobs.executor_status()["state"] == "running"
+    assert jobs.call_cpu(pow, 2, 3) == 8
+
+
+def slow_square(value, seconds):
+    time.sleep(seconds)
+    return value * value
+
+
+def test_map_cpu_until_returns_what_is_done_by_the_deadline(executor):
+    async def run():
+        # Start the worker, so the deadline is not spent spawning it
+        await jobs.run_cpu(pow, 1, 1)
+        deadline = time.monotonic() + 0.5
+        results = await jobs.map_cpu_until(deadline, slow_square, range(6), [0.2] * 6)
+        done = [result for result in results if isinstance(result, int)]
+        left = [result for result in results if isinstance(result, asyncio.Future)]
+        # Results come in order; one call (one per worker) is left running, the others never ran
+        assert done == [0, 1, 4][:len(done)] and len(done) >= 1
+        assert len(left) <= 1
+        assert results[len(done) + len(left):] == [None] * (6 - len(done) - len(left))
+        for task in left:
+            assert await task == len(done) ** 2
+    asyncio.run(run())
+
+
+def test_map_cpu_until_waits_for_the_first_call(executor):
+    async def run():
+        results = await jobs.map_cpu_until(time.monotonic() - 1, slow_square, [3, 4], [0.1, 0.1], wait_first=True)
+        assert results == [9, None]
+        assert await jobs.map_cpu_until(time.monotonic() - 1, slow_square, [3], [0.1]) == [None]
+    asyncio.run(run())
@@ -0,0 +1,58 @@
+import numpy as np
+
+from backend.src.features.level_of_detail import ProgressiveFrame, decimate_frame, frame_detail, frame_order
+from backend.src.utils.calculate_data import calculate_data
+from backend.src.utils.spatial_index import SpatialIndexCache
+
+
+def make_frame(num_points=400, seed=0):
+    points = np.random.default_rng(seed).normal(size=(num_points, 3))
+    return calculate_data(points, anomaly_points=points[:3].copy())
+
+
+def test_detail_continues_the_decimated_frame():
+    frame = make_frame()
+    decimated = decimate_frame(frame, 100)
+    start = decimated["lod"]["next"]
+    detail = frame_detail(frame, start, 50)
+
+    order, inner, _ = frame_order(frame)
+    np.testing.assert_array_equal(detail["point_indices"], order[start:start + 50])
+    np.testing.assert_array_equal(detail["inner"], inner[order[start:start + 50]])
+    # Decimated points and detail points never overlap
+    assert not set(detail["point_indices"].tolist()) & set(decimated["point_indices"].tolist())
+    assert (detail["start"], detail["end"], detail["total_points"]) == (start, start + 50, 400)
+
+
+def test_points_are_float32():
+    frame = make_frame()
+    assert decimate_frame(frame, 100)["all_points"].dtype == np.float32
+    detail = frame_detail(frame, 0, 10)
+    assert detail["points"].dtype == np.float32
+    np.testing.assert_array_equal(detail["points"], frame["all_points"][detail["point_indices"]])
+
+
+def test_progressive_frame_gives_the_same_detail():
+    frame = make_frame()
+    progressive = ProgressiveFrame(frame)
+    for start, count in [(0, 10), (100, 200), (390, 50)]:
+        expected = frame_detail(frame, start, count)
+        actual = frame_detail(progressive, start, count)
+        for key in ("point_indices", "points", "inner"):
+            np.testing.assert_array_equal(actual[key], expected[key])
+        assert actual["end"] == expected["end"]
+
+
+def test_order_is_computed_once_per_frame():
+    frames = {("result", 0): make_frame()}
+    built = []
+
+    def build(frame):
+        built.append(frame)
+        return ProgressiveFrame(frame)
+
+    cache = SpatialIndexCache(lambda data_id, index: frames.get((data_id, index)), 1 << 20, build)
+    first = cache.get("result", 0)
+    assert cache.get("result", 0) is first
+    assert len(built) == 1
+    assert cache.get("result", 1) is None
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from backend.src.utils.metric_streams import MetricStream
+from backend.src.utils.scenarios import analyse_stream_frame
+
+
+def test_batches_need_enough_points_for_a_hull():
+    with pytest.raises(ValueError):
+        MetricStream(5, batch_size=3)
+    MetricStream(5, batch_size=4)
+
+
+def test_empty_rows_are_a_no_op():
+    stream = MetricStream(5, window=20, batch_size=4)
+    assert stream.ingest([]) == []
+    assert stream.rows == 0
+
+
+@pytest.mark.parametrize("rows", [[[1.0, 2.0, 3.0]], [[1.0, 2.0, 3.0, 4.0, float("nan")]] * 4])
+def test_rejected_rows_leave_the_stream_unchanged(rows):
+    rng = np.random.default_rng(0)
+    stream = MetricStream(5, window=20, batch_size=4)
+    stream.ingest(rng.normal(size=(6, 5)))
+    before = (stream.rows, stream._batch_rows, stream._seen, stream._window.copy(), stream._components.copy())
+
+    with pytest.raises(ValueError):
+        stream.ingest(rows)
+    after = (stream.rows, stream._batch_rows, stream._seen, stream._window, stream._components)
+    assert before[:3] == after[:3]
+    np.testing.assert_array_equal(before[3], after[3])
+    np.testing.assert_array_equal(before[4], after[4])
+
+
+def test_degenerate_frames_are_skipped():
+    rng = np.random.default_rng(0)
+    stream = MetricStream(5, window=20, batch_size=4)
+    # Constant metrics project every row to the same point
+    frames = stream.ingest(np.zeros((4, 5)))
+    assert len(frames) == 1
+    assert analyse_stream_frame(frames[0]) is None
+
+    frames = stream.ingest(rng.normal(size=(16, 5)))
+    assert len(frames) == 4 and stream.rows == 20
+    assert analyse_stream_frame(frames[-1]) is not None
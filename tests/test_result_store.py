@@ -0,0 +1,133 @@
+import types
+
+import numpy as np
+import pytest
+
+from backend.src.utils import result_store
+from backend.src.utils.frame_result import FrameResult
+from backend.src.utils.result_store import ResultStore
+
+
+def make_frame(num_points=20, seed=0):
+    points = np.random.default_rng(seed).normal(size=(num_points, 3))
+    inner = np.ones(num_points, dtype=bool)
+    inner[:4] = False
+    return FrameResult(points, [0, 1, 2, 3], inner, points[:1], [3, 3], [0, 1, 2, 1, 2, 3])
+
+
+def assert_same_frame(actual, expected):
+    for key in ("all_points", "inner_points", "outermost_points", "anomaly_points"):
+        np.testing.assert_array_equal(actual[key], expected[key])
+    assert len(actual["faces"]) == len(expected["faces"])
+    for actual_face, expected_face in zip(actual["faces"], expected["faces"]):
+        np.testing.assert_array_equal(actual_face, expected_face)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Wall clock of the store, moved forward by the tests
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(result_store, "time", types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_round_trip_from_memory_and_disk(tmp_path):
+    store = ResultStore(str(tmp_path))
+    frames = [make_frame(seed=seed) for seed in range(3)]
+    data_id = store.put(frames)
+
+    for stored, frame in zip(store.get(data_id), frames):
+        assert_same_frame(stored, frame)
+
+    # A second store on the same directory (another worker process) only has the database
+    other = ResultStore(str(tmp_path))
+    for stored, frame in zip(other.get(data_id), frames):
+        assert_same_frame(stored, frame)
+    assert_same_frame(other.get_frame(data_id, 2), frames[2])
+    assert other.get_frame(data_id, 3) is None
+
+
+def test_results_expire_after_ttl(tmp_path, clock):
+    store = ResultStore(str(tmp_path), ttl=60.0)
+    data_id = store.put([make_frame()])
+    other = ResultStore(str(tmp_path), ttl=60.0)
+
+    clock.now += 59.0
+    assert store.exists(data_id) and other.exists(data_id)
+
+    clock.now += 2.0
+    assert not store.exists(data_id)
+    assert not other.exists(data_id)
+    assert store.get(data_id) is None
+    assert store.get_frame(data_id, 0) is None
+
+    # Storing another result purges the expired rows from the database
+    store.put([make_frame()])
+    assert list(other.iter_frames(data_id)) == []
+
+
+def test_memory_cache_evicts_least_recently_used(tmp_path):
+    frame_bytes = make_frame().nbytes
+    store = ResultStore(str(tmp_path), memory_budget=2 * frame_bytes, spill_bytes=2 * frame_bytes)
+    first = store.put([make_frame(seed=1)])
+    second = store.put([make_frame(seed=2)])
+    # Reading the first result makes the second one the least recently used
+    store.get(first)
+    third = store.put([make_frame(seed=3)])
+
+    assert store._lookup_memory(first) is not None
+    assert store._lookup_memory(second) is None
+    assert store._lookup_memory(third) is not None
+    assert store._memory_bytes == 2 * frame_bytes
+    # Evicted results are still read from disk
+    assert_same_frame(store.get(second)[0], make_frame(seed=2))
+
+
+def test_large_results_spill_to_disk_only(tmp_path):
+    frame_bytes = make_frame().nbytes
+    store = ResultStore(str(tmp_path), spill_bytes=2 * frame_bytes)
+    small = store.put([make_frame(seed=seed) for seed in range(2)])
+    large = store.put([make_frame(seed=seed) for seed in range(3)])
+
+    assert store._lookup_memory(small) is not None
+    assert store._lookup_memory(large) is None
+    assert store._memory_bytes == 2 * frame_bytes
+    for index, frame in enumerate(store.iter_frames(large)):
+        assert_same_frame(frame, make_frame(seed=index))
+
+
+def test_delete_removes_memory_and_disk(tmp_path):
+    store = ResultStore(str(tmp_path))
+    data_id = store.put([make_frame()])
+    store.delete(data_id)
+
+    assert not store.exists(data_id)
+    assert store._memory_bytes == 0
+    assert ResultStore(str(tmp_path)).get(data_id) is None
+
+
+def test_put_replaces_a_result_stored_under_the_same_id(tmp_path):
+    frame_bytes = make_frame().nbytes
+    store = ResultStore(str(tmp_path), memory_budget=4 * frame_bytes)
+    data_id = store.put([make_frame(seed=seed) for seed in range(3)])
+    store.put([make_frame(seed=9)], data_id=data_id)
+
+    assert store._memory_bytes == frame_bytes
+    # The frames beyond the end of the new result are gone from the database too
+    frames = list(ResultStore(str(tmp_path)).iter_frames(data_id))
+    assert len(frames) == 1
+    assert_same_frame(frames[0], make_frame(seed=9))
+
+
+def test_expired_results_are_purged_at_most_once_per_interval(tmp_path, clock):
+    store = ResultStore(str(tmp_path), ttl=10.0, purge_interval=60.0)
+    expired = store.put([make_frame()])
+    other = ResultStore(str(tmp_path))
+
+    clock.now += 30.0
+    store.put([make_frame()])
+    assert len(list(other.iter_frames(expired))) == 1
+
+    clock.now += 30.0
+    store.put([make_frame()])
+    assert list(other.iter_frames(expired)) == []
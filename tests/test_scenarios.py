@@ -0,0 +1,27 @@
+import numpy as np
+
+from backend.src.utils.scenarios import seeded
+
+
+def test_seed_determines_the_result():
+    first = seeded(7, np.random.rand, 5)
+    second = seeded(7, np.random.rand, 5)
+    np.testing.assert_array_equal(first, second)
+
+
+def test_seeded_call_restores_the_global_generator():
+    np.random.seed(1)
+    expected = np.random.rand(5)
+
+    np.random.seed(1)
+    seeded(7, np.random.rand, 5)
+    # The worker's own sequence continues as if the seeded call never happened
+    np.testing.assert_array_equal(np.random.rand(5), expected)
+
+
+def test_unseeded_calls_use_the_global_generator():
+    np.random.seed(1)
+    expected = np.random.rand(5)
+
+    np.random.seed(1)
+    np.testing.assert_array_equal(seeded(None, np.random.rand, 5), expected)
@@ -0,0 +1,99 @@
+import json
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from backend.src.utils.calculate_data import calculate_data
+from backend.src.utils.sequence_codec import encode_sequence, decode_sequence, _LEVELS
+
+
+def moving_frames(num_frames=4, num_points=60, seed=0):
+    # Points keep their identity and move a little between frames, so frames are delta-encoded
+    rng = np.random.default_rng(seed)
+    points = rng.normal(size=(num_points, 3))
+    frames = []
+    for _ in range(num_frames):
+        points = points + rng.normal(scale=0.01, size=points.shape)
+        frames.append(calculate_data(points.copy(), anomaly_points=points[:2].copy()))
+    return frames
+
+
+def step(frames):
+    # Quantization step of the sequence along each axis
+    points = np.concatenate([np.asarray(frame["all_points"], dtype=np.float64) for frame in frames])
+    return (points.max(axis=0) - points.min(axis=0)) / _LEVELS
+
+
+def header(payload):
+    data = zlib.decompress(payload)
+    (length,) = struct.unpack_from("<I", data, 4)
+    return json.loads(data[8:8 + length])
+
+
+def assert_close(decoded, frames):
+    tolerance = step(frames) / 2 + 1e-9
+    assert len(decoded) == len(frames)
+    for actual, expected in zip(decoded, frames):
+        for key in ("all_points", "inner_points", "outermost_points", "anomaly_points"):
+            expected_points = np.asarray(expected[key], dtype=np.float64).reshape(-1, 3)
+            assert actual[key].shape == expected_points.shape
+            assert np.all(np.abs(actual[key] - expected_points) <= tolerance)
+        assert [len(face) for face in actual["faces"]] == [len(face) for face in expected["faces"]]
+        for actual_face, expected_face in zip(actual["faces"], expected["faces"]):
+            assert np.all(np.abs(actual_face - np.asarray(expected_face, dtype=np.float64)) <= tolerance)
+
+
+def test_round_trip_within_half_a_step():
+    frames = moving_frames()
+    payload = encode_sequence(frames)
+    assert [info["delta"] for info in header(payload)["frames"]] == [False, True, True, True]
+    assert_close(decode_sequence(payload), frames)
+
+
+def test_frame_dicts_encode_like_frame_results():
+    frames = moving_frames()
+    # Frame dicts go through the nearest-point matching instead of the stored indices
+    dicts = [
+        {key: [face.tolist() for face in frame[key]] if key == "faces" else frame[key].tolist()
+         for key in ("all_points", "inner_points", "outermost_points", "anomaly_points", "faces")}
+        for frame in frames
+    ]
+    assert zlib.decompress(encode_sequence(dicts)) == zlib.decompress(encode_sequence(frames))
+
+
+def test_frames_of_different_sizes_are_stored_absolute():
+    frames = moving_frames(num_frames=2, num_points=60) + moving_frames(num_frames=2, num_points=40, seed=1)
+    payload = encode_sequence(frames)
+    assert [info["delta"] for info in header(payload)["frames"]] == [False, True, False, True]
+    assert_close(decode_sequence(payload), frames)
+
+
+def test_deltas_wrap_around_int16():
+    # Points jumping from one end of the bounding box to the other overflow int16 differences
+    rng = np.random.default_rng(2)
+    corners = np.array([[-1.0, -1.0, -1.0], [1.0, 1.0, 1.0]])
+    first = np.concatenate([corners, rng.uniform(-1, 1, size=(30, 3))])
+    second = -first
+    frames = [calculate_data(first, anomaly_points=first[:1]), calculate_data(second, anomaly_points=second[:1])]
+    payload = encode_sequence(frames)
+    assert header(payload)["frames"][1]["delta"]
+    assert_close(decode_sequence(payload), frames)
+
+
+def test_level_of_detail_metadata_is_kept():
+    frames = [frame.to_dict() for frame in moving_frames(num_frames=2)]
+    frames[0]["lod"] = {"data_id": "abc", "frame_index": 0, "returned": 60, "total": 60}
+    decoded = decode_sequence(encode_sequence(frames))
+    assert decoded[0]["lod"] == frames[0]["lod"]
+    assert "lod" not in decoded[1]
+
+
+def test_empty_sequence():
+    assert decode_sequence(encode_sequence([])) == []
+
+
+def test_rejects_other_payloads():
+    with pytest.raises(ValueError):
+        decode_sequence(zlib.compress(b"not a sequence"))
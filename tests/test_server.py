@@ -0,0 +1,180 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+
+import httpx
+import pytest
+import uvicorn
+
+from backend import server
+
+
+@pytest.fixture
+def client():
+    # In-process client; the app's startup and shutdown handlers run around each test
+    async def open_client():
+        await server.app.router.startup()
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test", timeout=600)
+
+    loop = asyncio.new_event_loop()
+    client = loop.run_until_complete(open_client())
+    yield lambda coroutine: loop.run_until_complete(coroutine(client))
+    loop.run_until_complete(client.aclose())
+    loop.run_until_complete(server.app.router.shutdown())
+    loop.close()
+
+
+@pytest.fixture
+def live_server():
+    # A real HTTP server, needed to see a client disconnect
+    config = uvicorn.Config(server.app, host="127.0.0.1", port=0, log_level="warning")
+    instance = uvicorn.Server(config)
+    thread = threading.Thread(target=instance.run, daemon=True)
+    thread.start()
+    while not instance.started:
+        time.sleep(0.05)
+    host, port = instance.servers[0].sockets[0].getsockname()[:2]
+    yield "http://{}:{}".format(host, port)
+    instance.should_exit = True
+    thread.join(timeout=30)
+
+
+SPHERE = {"num_points": 400, "num_frames": 8, "seed": 3}
+
+
+def fetch_with_continuations(client, path, body, deadline):
+    """
+    Fetch a scenario with a deadline and follow its continuation tokens; returns every response body.
+    """
+    async def run(client):
+        bodies = []
+        response = await client.post(path, params={"deadline": deadline}, json=body)
+        while True:
+            assert response.status_code == 200
+            bodies.append(response.json())
+            token = response.headers.get("x-continuation-token")
+            if token is None:
+                return bodies
+            response = await client.post("/continue/{}".format(token), params={"deadline": deadline})
+    return client(run)
+
+
+def test_continuations_return_every_frame_once(client):
+    full = client(lambda client: client.post("/generate_animated_scaled_sphere", json=SPHERE)).json()
+    bodies = fetch_with_continuations(client, "/generate_animated_scaled_sphere", SPHERE, 0.01)
+
+    assert len(full) == SPHERE["num_frames"]
+    # Every response makes progress, and the frames come back in order, each once
+    assert len(bodies) > 1 and all(len(body) >= 1 for body in bodies)
+    assert [frame for body in bodies for frame in body] == full
+
+
+def test_continuation_tokens_are_used_once(client):
+    async def run(client):
+        response = await client.post("/generate_animated_scaled_sphere", params={"deadline": 0.01}, json=SPHERE)
+        token = response.headers["x-continuation-token"]
+        assert (await client.post("/continue/{}".format(token))).status_code == 200
+        assert (await client.post("/continue/{}".format(token))).status_code == 404
+        assert (await client.post("/continue/unknown")).status_code == 404
+    client(run)
+
+
+def metric_value(text, name, **labels):
+    for line in text.splitlines():
+        if line.startswith(name) and all('{}="{}"'.format(key, value) in line for key, value in labels.items()):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_abandoned_request_is_cancelled(live_server):
+    body = json.dumps({"num_points": 3000, "num_frames": 40}).encode()
+    request = (
+        "POST /generate_animated_scaled_sphere HTTP/1.1\r\nHost: test\r\nContent-Type: application/json\r\n"
+        "Content-Length: {}\r\n\r\n".format(len(body)).encode() + body
+    )
+    with httpx.Client(base_url=live_server, timeout=60) as http:
+        # Start the pool, so the abandoned request is not just waiting for workers to spawn
+        assert http.post("/generate_animated_scaled_sphere", json={"num_points": 50, "num_frames": 1}).status_code == 200
+
+        # Send a heavy request and hang up before its response is ready
+        with socket.create_connection((http.base_url.host, http.base_url.port)) as connection:
+            connection.sendall(request)
+            time.sleep(1.0)
+
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            text = http.get("/metrics").text
+            if metric_value(text, "mesh_cancelled_requests_total") is not None:
+                break
+            time.sleep(0.1)
+        assert metric_value(text, "mesh_cancelled_requests_total") == 1
+        assert metric_value(text, "mesh_requests_total", endpoint="/generate_animated_scaled_sphere", status="499") == 1
+
+        # The queued frames of the abandoned request were withdrawn, so the pool is free again
+        start = time.monotonic()
+        assert http.post("/generate_animated_scaled_sphere", json={"num_points": 50, "num_frames": 1}).status_code == 200
+        assert time.monotonic() - start < 5
+
+
+def test_profiled_request_stores_a_readable_profile(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(server.config, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(server.config, "PROFILE_DIR", str(tmp_path))
+
+    async def run(client):
+        response = await client.get("/healthz", headers={"X-Profile": "1"})
+        assert response.status_code == 200
+        profile = await client.get("/profiles/{}".format(response.headers["x-profile-id"]))
+        assert profile.status_code == 200 and "function calls" in profile.text
+        # Unflagged requests are not profiled
+        assert "x-profile-id" not in (await client.get("/healthz")).headers
+    client(run)
+
+
+def test_only_the_newest_profiles_are_kept(monkeypatch, tmp_path):
+    monkeypatch.setattr(server.config, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(server.config, "MAX_PROFILES", 2)
+    monkeypatch.setattr(server.config, "PROFILE_RETENTION_SECONDS", 100.0)
+    now = time.time()
+    for age, profile_id in [(500, "expired"), (30, "old"), (20, "recent"), (10, "newest")]:
+        path = tmp_path / "{}.1.1.pstats".format(profile_id)
+        path.write_bytes(b"")
+        os.utime(path, (now - age, now - age))
+
+    server.profiling.prune(now)
+
+    assert sorted(path.name.split(".")[0] for path in tmp_path.iterdir()) == ["newest", "recent"]
+
+
+def test_spatial_queries_reject_empty_limits(client):
+    async def run(client):
+        query = {"data_id": "unknown", "center": [0, 0, 0]}
+        assert (await client.post("/query_nearest", json=dict(query, k=0))).status_code == 422
+        assert (await client.post("/query_radius", json=dict(query, radius=1, limit=0))).status_code == 422
+    client(run)
+
+
+def test_batch_requires_sub_requests(client):
+    assert client(lambda client: client.post("/batch", json={"requests": []})).status_code == 422
+
+
+def test_batch_reports_a_failed_anomaly_tracking_for_its_sub_request(client, monkeypatch):
+    run_cpu = server.run_cpu
+
+    async def failing_tracking(function, *args):
+        if function is server.track_shared_anomalies:
+            raise RuntimeError("tracking failed")
+        return await run_cpu(function, *args)
+
+    monkeypatch.setattr(server, "run_cpu", failing_tracking)
+    requests = [
+        {"id": "tracked", "scenario": "animated_scaled_sphere", "params": dict(SPHERE, anomaly_tracking=True)},
+        {"id": "plain", "scenario": "animated_scaled_sphere", "params": SPHERE},
+    ]
+    response = client(lambda client: client.post("/batch", json={"requests": requests}))
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert {"id": "tracked", "error": "tracking failed"} in lines
+    assert {"id": "plain", "done": True, "num_frames": SPHERE["num_frames"]} in lines